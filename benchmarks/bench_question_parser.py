@@ -0,0 +1,71 @@
+# benchmarks/bench_question_parser.py
+"""
+QuestionFilterParser 처리량 벤치마크
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_question_parser --iterations 200000
+
+ChatService와 같은 공개 진입점 QuestionFilterParser.parse(LRU 캐시 래퍼 포함)만 호출합니다.
+- cold: 매번 처음 보는 질문 (캐시 미스 + 파싱 + 캐시 저장/밀어내기 비용)
+- warm: 미리 한 번씩 파싱해 둔 질문이 반복되는 트래픽 (캐시 적중)
+"""
+
+import argparse
+import random
+import time
+
+from services.question_parser import QuestionFilterParser
+
+QUESTION_CORPUS = [
+    "전공필수 과목 알려줘",
+    "3학년 월요일 수업 뭐 있어?",
+    "졸업하려면 몇 학점 들어야 해?",
+    "'이수구분':'전공필수' 과목 알려줘",
+    "'이수구분':'교양선택' '학년':'1' 들을만한 과목 추천해줘",
+    "'학년':'3' '강의시간':'월' 수업 목록",
+    "'이수구분':'전공선택' '강의시간':'화' '학점':'3' 과목 있어?",
+    "\"제목\":\"경영학과\" 전공 과목 알려줘",
+    "'요일':'금' 수업 없는 과목",
+    "'교수':'김' 교수님 수업",
+    "복수전공 신청 기간이 언제야?",
+    "휴학 신청은 어떻게 해?",
+    "'구분':'교양필수' 몇 학점이야?",
+    "'학년':'2' '이수구분':'기초전공'",
+    "수강신청 정정 기간 알려줘",
+]
+
+
+def run(parser: QuestionFilterParser, questions) -> float:
+    started = time.perf_counter()
+    for question in questions:
+        parser.parse(question)
+    return time.perf_counter() - started
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="QuestionFilterParser 처리량 벤치마크")
+    arg_parser.add_argument("--iterations", type=int, default=100_000)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    random.seed(args.seed)
+    # cold: 질문마다 번호를 붙여 모두 다른 질문으로 만듭니다. (같은 패턴 구성, 캐시에는 없음)
+    cold_questions = [f"{random.choice(QUESTION_CORPUS)} {i}" for i in range(args.iterations)]
+    warm_questions = [random.choice(QUESTION_CORPUS) for _ in range(args.iterations)]
+
+    for label, questions in (("cold", cold_questions), ("warm", warm_questions)):
+        parser = QuestionFilterParser()
+        if label == "warm":
+            for question in QUESTION_CORPUS:
+                parser.parse(question)
+        elapsed = run(parser, questions)
+        print(
+            f"{label:>5}: {len(questions)}건 {elapsed * 1000:.1f}ms "
+            f"→ {len(questions) / elapsed:,.0f} questions/s "
+            f"({elapsed / len(questions) * 1e6:.2f}µs/question)"
+        )
+        print(f"       {parser.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_rerank.py
+"""
+재순위 단계 벤치마크 (유사도 검색 only vs MMR)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_rerank --queries 500
+
+OpenAI/Chroma 없이 합성 임베딩으로 측정합니다.
+- 후보 fetch_k개는 몇 개의 "같은 과목 다른 분반" 군집(유사 중복 행)으로 구성됩니다.
+- similarity : 기존 경로 (질의 유사도 상위 k개)
+- mmr-loop   : langchain_chroma의 maximal_marginal_relevance (단계마다 유사도 재계산)
+- mmr-numpy  : services.reranker.mmr_rerank (유사도 행렬 1회 계산 + 최대값 벡터 갱신)
+
+답변 품질은 LLM 호출 없이 다음 대리 지표로 비교합니다.
+- relevance : 선택 문서의 평균 질의 유사도 (높을수록 관련도 높음)
+- redundancy: 선택 문서 간 평균 유사도 (낮을수록 중복 적음)
+- coverage  : 선택 문서가 포함한 서로 다른 군집 수 (많을수록 다양한 정보)
+"""
+
+import argparse
+import time
+
+import numpy as np
+from langchain_chroma.vectorstores import maximal_marginal_relevance
+
+from services.reranker import mean_pairwise_similarity, mmr_rerank
+
+
+def make_candidates(rng: np.random.Generator, fetch_k: int, dim: int, clusters: int, noise: float):
+    # 모든 군집은 같은 주제(topic) 성분을 공유하고, 군집마다 고유 성분이 더해집니다.
+    topic = rng.normal(size=dim).astype(np.float32)
+    centers = topic + 0.7 * rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=fetch_k)
+    # 질의와 가장 가까운 군집(0번)의 유사 중복 행이 후보의 절반을 차지합니다.
+    labels[: fetch_k // 2] = 0
+    candidates = centers[labels] + noise * rng.normal(size=(fetch_k, dim)).astype(np.float32)
+    query = topic + 0.5 * (centers[0] - topic) + noise * rng.normal(size=dim).astype(np.float32)
+    return query, candidates, labels
+
+
+def similarity_top_k(query: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    normalized = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return np.argsort(-scores)[:k]
+
+
+def quality(query, candidates, labels, indexes):
+    normalized = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+    relevance = float((normalized[indexes] @ (query / np.linalg.norm(query))).mean())
+    return relevance, mean_pairwise_similarity(candidates, indexes), len(set(labels[indexes].tolist()))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="재순위(MMR) 벤치마크")
+    arg_parser.add_argument("--queries", type=int, default=500)
+    arg_parser.add_argument("--fetch-k", type=int, default=20)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--dim", type=int, default=1536)  # text-embedding-3-small
+    arg_parser.add_argument("--clusters", type=int, default=6)
+    arg_parser.add_argument("--noise", type=float, default=0.15)
+    arg_parser.add_argument("--lambda-mult", type=float, default=0.5)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    workload = [make_candidates(rng, args.fetch_k, args.dim, args.clusters, args.noise) for _ in range(args.queries)]
+
+    methods = {
+        "similarity": lambda q, c: similarity_top_k(q, c, args.k),
+        "mmr-loop": lambda q, c: np.asarray(
+            maximal_marginal_relevance(q, c, lambda_mult=args.lambda_mult, k=args.k), dtype=np.int64
+        ),
+        "mmr-numpy": lambda q, c: mmr_rerank(q, c, k=args.k, lambda_mult=args.lambda_mult),
+    }
+
+    print(f"질의 {args.queries}개, 후보 {args.fetch_k}개 → 상위 {args.k}개, 차원 {args.dim}, λ={args.lambda_mult}")
+    for name, method in methods.items():
+        started = time.perf_counter()
+        selections = [method(query, candidates) for query, candidates, _ in workload]
+        elapsed = time.perf_counter() - started
+
+        scores = np.array([
+            quality(query, candidates, labels, indexes)
+            for (query, candidates, labels), indexes in zip(workload, selections)
+        ])
+        relevance, redundancy, coverage = scores.mean(axis=0)
+        print(
+            f"{name:>10}: {elapsed / args.queries * 1000:.3f}ms/query | "
+            f"relevance {relevance:.3f}, redundancy {redundancy:.3f}, coverage {coverage:.2f}/{args.clusters}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_table_artifact.py
+"""
+표 행 파일 적재 벤치마크 (이전 RAG-TXT .txt vs 열 기반 Arrow IPC .arrow)
+
+실행 (프로젝트 루트에서):
+    python -m benchmarks.bench_table_artifact --rows 50000 --repeat 3
+
+같은 합성 표 행(강의시간표)을 두 형식으로 써 두고, abuild_from_files가 표 행을 Document로 만드는 경로를 비교합니다.
+- txt   : 한 줄씩 읽어 `{json} 제목: ..., 열: 값` 을 split(', ')로 파싱 (table_line_to_document)
+- arrow : memory-map으로 열어 레코드 배치 단위로 열을 읽고 문장은 임베딩용으로만 생성 (table_row_to_document)
+- load      : 모든 행을 Document 목록으로 만드는 시간 (repeat 중 최솟값)
+- peak      : 그동안의 파이썬 메모리 최대 사용량 (tracemalloc, memory-map된 파일 페이지는 포함되지 않음)
+- metadata  : 원본 행과 메타데이터가 다른 Document 수 (--comma-ratio 비율의 행에 쉼표가 든 '비고' 값을 넣음)
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 임베딩 모델 없이 vector_store_service의 변환 함수만 사용합니다.
+os.environ.setdefault("DEFAULT_MODEL", "FAKE")
+
+from benchmarks.load_test import make_table_rows
+from services.table_artifact import TABLE_METADATA_COLUMNS, table_row_sentence, write_table_artifact, iter_table_artifact
+from services.vector_store_service import table_line_to_document, table_row_to_document
+
+
+def write_legacy_txt(path: Path, rows: List[Dict]) -> None:
+    """이전 파이프라인과 같은 `{json-metadata} 제목: ..., 열: 값, ...` 줄을 씁니다."""
+    lines = []
+    for row in rows:
+        meta = {key: row[key] for key in ("source", "page", "type")}
+        lines.append(f"{json.dumps(meta, ensure_ascii=False)} {table_row_sentence(row)}")
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def load_txt(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [doc for doc in (table_line_to_document(line) for line in f) if doc is not None]
+
+
+def load_arrow(path: Path):
+    return [table_row_to_document(row) for row in iter_table_artifact(str(path))]
+
+
+def measure(load: Callable, path: Path, repeat: int):
+    elapsed = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load(path)
+        elapsed.append(time.perf_counter() - started)
+    tracemalloc.start()
+    documents = load(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(elapsed), peak, documents
+
+
+def metadata_mismatches(documents, rows: List[Dict]) -> int:
+    """표의 열(제목 포함)이 원본 행과 같은지 확인합니다."""
+    mismatches = 0
+    for doc, row in zip(documents, rows):
+        expected = {key: str(value) for key, value in row.items() if key not in ("source", "page", "type")}
+        actual = {
+            key: str(value) for key, value in doc.metadata.items()
+            if key not in TABLE_METADATA_COLUMNS or key == "제목"
+        }
+        mismatches += actual != expected
+    return mismatches + abs(len(documents) - len(rows))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="표 행 파일(.txt vs .arrow) 적재 벤치마크")
+    arg_parser.add_argument("--rows", type=int, default=50_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--comma-ratio", type=float, default=0.1)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    rows = make_table_rows(args.rows, args.seed)
+    rng = random.Random(args.seed)
+    for row in rows:
+        if rng.random() < args.comma_ratio:
+            row["비고"] = rng.choice(["온라인, 격주 운영", "영어강의, 팀티칭", "실습, 재료비 별도"])
+
+    with tempfile.TemporaryDirectory(prefix="unihelp-table-bench-") as workdir:
+        txt_path = Path(workdir) / "rows.txt"
+        arrow_path = Path(workdir) / "rows.arrow"
+        write_legacy_txt(txt_path, rows)
+        write_table_artifact(str(arrow_path), rows)
+
+        print(f"표 행 {len(rows)}개 (쉼표가 든 값이 있는 행 {sum('비고' in row for row in rows)}개)")
+        for label, load, path in (("txt", load_txt, txt_path), ("arrow", load_arrow, arrow_path)):
+            elapsed, peak, documents = measure(load, path, args.repeat)
+            print(
+                f"{label:>6}: load {elapsed * 1000:8.1f}ms ({len(rows) / elapsed:,.0f} rows/s) | "
+                f"peak {peak / 2**20:7.1f}MiB | file {path.stat().st_size / 2**20:6.2f}MiB | "
+                f"metadata 불일치 {metadata_mismatches(documents, rows)}개"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# benchmarks/bench_vector_backend.py
+"""
+벡터 검색 백엔드 벤치마크 (Chroma HNSW vs mmap float16 vs mmap int8, 각각 블록 단위 변환 / float32 사본)
+
+실행 (프로젝트 루트에서):
+    # 기존 chroma_db/ 의 컬렉션(저장된 임베딩)을 그대로 옮겨 비교
+    python -m benchmarks.bench_vector_backend --db-path ./chroma_db --collection 2025-2 --queries 200
+
+    # 합성 데이터 (임시 디렉토리에 Chroma/mmap 색인을 만들어 비교)
+    python -m benchmarks.bench_vector_backend --rows 20000 --queries 200
+
+질의는 저장된 벡터에 잡음을 더해 만들고, 정답은 float32 전수 탐색 top-k로 계산합니다.
+- latency   : 질의당 평균/p95 지연 (필터 없음 / 메타데이터 필터 있음)
+- recall@k  : 정답 top-k 중 찾은 비율 (HNSW 근사, float16/int8 양자화 오차 확인)
+- disk      : 색인 디렉토리 크기
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import chromadb
+import numpy as np
+from langchain_core.documents import Document
+
+from services.mmap_vector_index import MmapVectorIndexService
+
+GRADES = ["1", "2", "3", "4"]
+COURSE_TYPES = ["전공필수", "전공선택", "교양필수", "교양선택", "기초전공"]
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def load_from_chroma(db_path: str, collection_name: str):
+    collection = chromadb.PersistentClient(path=db_path).get_collection(collection_name)
+    data = collection.get(include=["documents", "metadatas", "embeddings"])
+    documents = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(data["documents"], data["metadatas"])
+    ]
+    return documents, np.asarray(data["embeddings"], dtype=np.float32)
+
+
+def make_synthetic(rng: np.random.Generator, rows: int, dim: int):
+    centers = rng.normal(size=(64, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 64, size=rows)] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    documents = [
+        Document(
+            page_content=f"과목{i} 설명",
+            metadata={"학년": str(rng.choice(GRADES)), "이수구분": str(rng.choice(COURSE_TYPES))}
+        )
+        for i in range(rows)
+    ]
+    return documents, vectors
+
+
+def build_chroma(path: Path, documents: List[Document], vectors: np.ndarray):
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    batch = 4096
+    for start in range(0, len(documents), batch):
+        end = min(start + batch, len(documents))
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            documents=[doc.page_content for doc in documents[start:end]],
+            metadatas=[doc.metadata or None for doc in documents[start:end]],
+            embeddings=vectors[start:end],
+        )
+    return collection
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> List[set]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    positions = np.arange(len(vectors)) if mask is None else np.flatnonzero(mask)
+    results = []
+    for query in queries:
+        scores = normalized[positions] @ (query / np.linalg.norm(query))
+        top = positions[np.argsort(-scores)[:k]]
+        results.append(set(top.tolist()))
+    return results
+
+
+def measure(name: str, search: Callable[[np.ndarray], List[int]], queries: np.ndarray, truth: List[set], disk: int) -> None:
+    search(queries[0])  # 첫 호출(파일 열기, 페이지 로딩)은 제외
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = search(query)
+        latencies.append(time.perf_counter() - started)
+        hits += len(expected & set(found))
+    samples = np.array(latencies) * 1000
+    recall = hits / max(sum(len(expected) for expected in truth), 1)
+    print(
+        f"{name:>22}: 평균 {samples.mean():7.3f}ms | p95 {np.percentile(samples, 95):7.3f}ms | "
+        f"recall {recall:.3f} | disk {disk / 1024 / 1024:7.1f}MB"
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="벡터 검색 백엔드 벤치마크")
+    arg_parser.add_argument("--db-path", default=None, help="기존 Chroma DB 경로 (생략하면 합성 데이터)")
+    arg_parser.add_argument("--collection", default="2025-2")
+    arg_parser.add_argument("--rows", type=int, default=20000)
+    arg_parser.add_argument("--dim", type=int, default=1536)  # text-embedding-3-small
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=20)
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix="unihelp-vector-bench-"))
+    try:
+        if args.db_path:
+            documents, vectors = load_from_chroma(args.db_path, args.collection)
+            chroma_collection = chromadb.PersistentClient(path=args.db_path).get_collection(args.collection)
+            chroma_disk = directory_size(Path(args.db_path))
+        else:
+            documents, vectors = make_synthetic(rng, args.rows, args.dim)
+            chroma_collection = build_chroma(workdir / "chroma", documents, vectors)
+            chroma_disk = directory_size(workdir / "chroma")
+        print(f"문서 {len(documents)}개, 차원 {vectors.shape[1]}, 질의 {args.queries}개, top-{args.k}")
+
+        ids = chroma_collection.get(include=[])["ids"]
+        id_to_position = {doc_id: i for i, doc_id in enumerate(ids)} if args.db_path else None
+        queries = vectors[rng.integers(0, len(vectors), size=args.queries)]
+        queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32) * np.abs(queries).mean()
+
+        # 같은 색인 디렉토리를 float32 사본 없이(블록 단위 변환) / 사본으로 각각 검색합니다.
+        indexes: Dict[str, MmapVectorIndexService] = {}
+        for dtype in ("float16", "int8"):
+            MmapVectorIndexService(str(workdir / dtype), dtype).add_documents("bench", documents, vectors)
+            indexes[dtype] = MmapVectorIndexService(str(workdir / dtype), dtype)
+            indexes[f"{dtype}+f32"] = MmapVectorIndexService(
+                str(workdir / dtype), dtype, float32_cache_bytes=vectors.nbytes
+            )
+
+        # 필터 조건: 문서에 있는 첫 메타데이터 열의 가장 흔한 값 (합성 데이터는 '학년' = 가장 흔한 학년)
+        metadata_filter = None
+        filter_mask = None
+        first_keys = [key for doc in documents for key in doc.metadata][:1]
+        if first_keys:
+            key = first_keys[0]
+            values = [str(doc.metadata.get(key)) for doc in documents]
+            value = max(set(values), key=values.count)
+            metadata_filter = {key: {"$eq": value}}
+            filter_mask = np.array([v == value for v in values])
+
+        def chroma_search(where):
+            def search(query):
+                result = chroma_collection.query(query_embeddings=[query], n_results=args.k, where=where, include=[])
+                found = result["ids"][0]
+                return [id_to_position[i] for i in found] if id_to_position else [int(i) for i in found]
+            return search
+
+        def mmap_search(dtype, where):
+            def search(query):
+                docs, _ = indexes[dtype].search("bench", query, args.k, metadata_filter=where)
+                return [positions[doc.page_content] for doc in docs]
+            return search
+
+        # mmap 결과(Document)를 원래 행 위치로 되돌리기 위한 표 (본문이 같은 행은 첫 위치로 간주)
+        positions: Dict[str, int] = {}
+        for i, doc in enumerate(documents):
+            positions.setdefault(doc.page_content, i)
+
+        scenarios = [("필터 없음", None, None)]
+        if metadata_filter:
+            scenarios.append((f"필터 {metadata_filter}", metadata_filter, filter_mask))
+        for title, where, mask in scenarios:
+            print(f"\n[{title}]")
+            truth = exact_top_k(vectors, queries, args.k, mask)
+            measure("chroma (HNSW+SQLite)", chroma_search(where), queries, truth, chroma_disk)
+            for dtype, index in indexes.items():
+                measure(f"mmap {dtype}", mmap_search(dtype, where), queries, truth, directory_size(index.index_dir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
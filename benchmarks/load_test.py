@@ -0,0 +1,226 @@
+# benchmarks/load_test.py
+"""
+오프라인 부하 테스트 (OpenAI/LlamaParse 대신 로컬 대역 모델 사용)
+
+실행 (프로젝트 루트에서):
+    # 서버 없이 프로세스 안에서 chat/processing 라우터를 띄워 측정 (DEFAULT_MODEL=FAKE 강제)
+    python -m benchmarks.load_test --endpoint chat --endpoint collections --concurrency 20 --requests 300
+
+    # 설정 바꿔 비교 (예: 답변 캐시 끄기, LLM 지연 2초)
+    python -m benchmarks.load_test --set ANSWER_CACHE_ENABLED=false --set FAKE_LLM_LATENCY_SECONDS=2
+
+    # PDF 처리 API (pdf2docx는 실제로 실행되고 LlamaParse만 대역)
+    python -m benchmarks.load_test --endpoint process-pdf --pdf ./uploads/sample.pdf --requests 5
+
+    # 이미 실행 중인 서버(DEFAULT_MODEL=FAKE 로 띄운 uvicorn 등)에 부하
+    python -m benchmarks.load_test --base-url http://localhost:8000 --endpoint chat
+
+프로세스 내 모드에서는 임시 디렉토리에 합성 강의 시간표 행(--seed-rows)으로 벡터 DB를 먼저 구축합니다.
+엔드포인트별 처리량(req/s), 오류 수, p50/p95/p99 지연 시간을 출력합니다.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+import numpy as np
+
+QUESTION_CORPUS = [
+    "전공필수 과목 알려줘",
+    "3학년 월요일 수업 뭐 있어?",
+    "졸업하려면 몇 학점 들어야 해?",
+    "'이수구분':'전공필수' 과목 알려줘",
+    "'이수구분':'교양선택' '학년':'1' 들을만한 과목 추천해줘",
+    "'학년':'3' '강의시간':'월' 수업 목록",
+    "'요일':'금' 수업 있는 과목",
+    "복수전공 신청 기간이 언제야?",
+    "휴학 신청은 어떻게 해?",
+    "수강신청 기간 알려줘",
+]
+
+DEPARTMENTS = ["경영학과", "컴퓨터과학과", "체육학과", "경찰행정학과", "문화콘텐츠학과"]
+COURSE_TYPES = ["전공필수", "전공선택", "교양필수", "교양선택", "기초전공"]
+DAYS = ["월", "화", "수", "목", "금"]
+
+
+def make_table_rows(rows: int, seed: int) -> List[Dict[str, object]]:
+    """합성 표 행(강의시간표)을 만듭니다. (파이프라인이 만드는 표 행 딕셔너리와 같은 형태)"""
+    rng = random.Random(seed)
+    table_rows = []
+    for i in range(rows):
+        day = rng.choice(DAYS)
+        table_rows.append({
+            "source": "loadtest.pdf",
+            "page": i // 40 + 1,
+            "type": "table_kv",
+            "제목": rng.choice(DEPARTMENTS),
+            "이수구분": rng.choice(COURSE_TYPES),
+            "학년": str(rng.randint(1, 4)),
+            "학수번호": str(10000 + i),
+            "교과목명": f"과목{i}",
+            "학점 (인원)": f"{rng.choice([2, 3])} ({rng.randint(20, 60)})",
+            "강의시간": f"{day}{rng.randint(1, 7)},{day}{rng.randint(1, 7)}",
+            "담당교수": f"교수{i % 37}",
+            "강의실": f"{rng.choice('ABC')}{rng.randint(100, 400)}",
+        })
+    return table_rows
+
+
+def make_seed_files(directory: Path, rows: int, seed: int) -> Tuple[str, str]:
+    """합성 표 행 파일(.arrow)과 Markdown 본문을 만들어 경로를 반환합니다."""
+    from models.fake_models import DEFAULT_FAKE_PAGES
+    from services.table_artifact import write_table_artifact
+
+    table_path = directory / "loadtest_rag.arrow"
+    md_path = directory / "loadtest.md"
+    write_table_artifact(str(table_path), make_table_rows(rows, seed))
+    md_path.write_text("\n\n—\n\n".join(DEFAULT_FAKE_PAGES), encoding="utf-8")
+    return str(md_path), str(table_path)
+
+
+async def build_in_process_client(args) -> httpx.AsyncClient:
+    """DEFAULT_MODEL=FAKE 로 chat/processing 라우터만 올린 앱에 ASGI로 직접 요청하는 클라이언트를 만듭니다."""
+    workdir = Path(tempfile.mkdtemp(prefix="unihelp-loadtest-"))
+    os.environ["DEFAULT_MODEL"] = "FAKE"
+    os.environ.setdefault("DB_PATH", str(workdir / "chroma_db"))
+    os.environ.setdefault("INDEX_PATH", str(workdir / "chroma_db_index"))
+    os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+    # 대역 임베딩/작업 기록이 저장소의 ./cache에 섞이지 않도록 임시 디렉터리를 사용합니다.
+    os.environ.setdefault("DOCUMENT_EMBEDDING_CACHE_PATH", str(workdir / "document_embeddings.sqlite3"))
+    os.environ.setdefault("INGESTION_JOB_DB_PATH", str(workdir / "ingestion_jobs.sqlite3"))
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")  # Chroma 사용 통계 전송 끄기 (오프라인)
+    for item in args.set:
+        key, value = item.split("=", 1)
+        os.environ[key] = value
+
+    # 설정은 import 시점에 읽히므로, 환경 변수를 정한 뒤에 앱 모듈을 불러옵니다.
+    from fastapi import FastAPI
+    from core.config import settings
+    from routers import chat_router, processing_router
+    from services.vector_store_service import vector_store_service
+
+    if args.seed_rows > 0:
+        md_path, table_path = make_seed_files(workdir, args.seed_rows, args.seed)
+        await vector_store_service.abuild_from_files(md_path, table_path, settings.DEFAULT_DB_COLLECTION_NAME)
+
+    app = FastAPI()
+    # main.py 와 같은 prefix (스케줄러/크롤링/OCR 라우터는 제외)
+    app.include_router(processing_router.router, prefix="/api/v1/processing")
+    app.include_router(chat_router.router, prefix="/api/v1/chat")
+    print(f"🧪 프로세스 내 FAKE 앱 준비 완료 (작업 디렉토리: {workdir})")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=args.timeout)
+
+
+def make_scenarios(args, rng: random.Random) -> Dict[str, Callable[[httpx.AsyncClient], "asyncio.Future"]]:
+    pdf_bytes = Path(args.pdf).read_bytes() if args.pdf else None
+
+    async def chat(client: httpx.AsyncClient) -> httpx.Response:
+        return await client.post("/api/v1/chat/chat", json={"question": rng.choice(QUESTION_CORPUS)})
+
+    async def chat_stream(client: httpx.AsyncClient) -> httpx.Response:
+        async with client.stream("POST", "/api/v1/chat/chat/stream", json={"question": rng.choice(QUESTION_CORPUS)}) as response:
+            await response.aread()
+            return response
+
+    async def collections(client: httpx.AsyncClient) -> httpx.Response:
+        return await client.get("/api/v1/processing/collections")
+
+    async def process_pdf(client: httpx.AsyncClient) -> httpx.Response:
+        if pdf_bytes is None:
+            raise ValueError("process-pdf 시나리오는 --pdf 경로가 필요합니다.")
+        files = {"file": (Path(args.pdf).name, pdf_bytes, "application/pdf")}
+        return await client.post("/api/v1/processing/process-pdf-only", files=files)
+
+    return {
+        "chat": chat,
+        "chat-stream": chat_stream,
+        "collections": collections,
+        "process-pdf": process_pdf,
+    }
+
+
+async def run_load(client: httpx.AsyncClient, scenarios, endpoints: List[str], total: int, concurrency: int):
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    status_counts: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            endpoint = endpoints[i % len(endpoints)]
+            started = time.perf_counter()
+            try:
+                response = await scenarios[endpoint](client)
+                status_counts[endpoint][response.status_code] += 1
+                if response.status_code >= 400:
+                    errors[endpoint] += 1
+            except Exception as e:
+                errors[endpoint] += 1
+                status_counts[endpoint][-1] += 1
+                if errors[endpoint] == 1:
+                    print(f"⚠️ {endpoint} 요청 실패: {e}")
+            latencies[endpoint].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, status_counts, time.perf_counter() - started
+
+
+def report(latencies, errors, status_counts, elapsed: float) -> None:
+    print(f"\n{'endpoint':>12} | {'requests':>8} | {'errors':>6} | {'req/s':>7} | {'p50':>8} | {'p95':>8} | {'p99':>8} | status")
+    for endpoint, values in latencies.items():
+        samples = np.array(values) * 1000
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        statuses = ", ".join(f"{code}×{count}" for code, count in sorted(status_counts[endpoint].items()))
+        print(
+            f"{endpoint:>12} | {len(values):>8} | {errors[endpoint]:>6} | {len(values) / elapsed:>7.1f} | "
+            f"{p50:>6.0f}ms | {p95:>6.0f}ms | {p99:>6.0f}ms | {statuses}"
+        )
+    print(f"\n총 {sum(len(v) for v in latencies.values())}건, {elapsed:.2f}s")
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        client = await build_in_process_client(args)
+    scenarios = make_scenarios(args, rng)
+    endpoints = args.endpoint or ["chat"]
+    unknown = [endpoint for endpoint in endpoints if endpoint not in scenarios]
+    if unknown:
+        raise SystemExit(f"알 수 없는 엔드포인트: {unknown} (가능한 값: {list(scenarios)})")
+
+    async with client:
+        if args.warmup:
+            await run_load(client, scenarios, endpoints, args.warmup, min(args.concurrency, args.warmup))
+        print(f"🚀 부하 시작: {endpoints}, 동시 {args.concurrency}, 총 {args.requests}건")
+        results = await run_load(client, scenarios, endpoints, args.requests, args.concurrency)
+    report(*results)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="오프라인 부하 테스트 (FAKE 모델)")
+    arg_parser.add_argument("--base-url", default=None, help="생략하면 프로세스 내 FAKE 앱에 요청")
+    arg_parser.add_argument("--endpoint", action="append", help="chat | chat-stream | collections | process-pdf (여러 번 지정 가능)")
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--concurrency", type=int, default=20)
+    arg_parser.add_argument("--warmup", type=int, default=0)
+    arg_parser.add_argument("--timeout", type=float, default=120.0)
+    arg_parser.add_argument("--seed-rows", type=int, default=300, help="프로세스 내 모드에서 미리 구축할 합성 표 행 수")
+    arg_parser.add_argument("--pdf", default=None, help="process-pdf 시나리오에 업로드할 PDF")
+    arg_parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="프로세스 내 모드 설정 덮어쓰기")
+    arg_parser.add_argument("--seed", type=int, default=42)
+    args = arg_parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 # core/config.py
 
 from dotenv import load_dotenv
+import json
 import os
 
 load_dotenv()
 
 class Settings:
-    # AI 모델 설정
+    # AI 모델 설정 ("OPENAI" | "FAKE": API 키 없이 로컬 대역 모델로 실행하는 부하 테스트/벤치마크 모드)
     DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "OPENAI").upper()
+    # FAKE 모드 대역 모델 설정 (LLM 첫 토큰 지연 / 토큰 간 지연 / LlamaParse 지연(초) / LlamaParse가 돌려줄 Markdown 파일)
+    FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", "1.0"))
+    FAKE_LLM_TOKEN_DELAY_SECONDS = float(os.getenv("FAKE_LLM_TOKEN_DELAY_SECONDS", "0.02"))
+    FAKE_LLAMA_PARSE_LATENCY_SECONDS = float(os.getenv("FAKE_LLAMA_PARSE_LATENCY_SECONDS", "0.5"))
+    FAKE_LLAMA_PARSE_PAGES_PATH = os.getenv("FAKE_LLAMA_PARSE_PAGES_PATH", "")
 
     # API 키
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -20,14 +26,94 @@ class Settings:
     # Spring (application.properties)과 동일한 키 값
     CRAWLER_SECRET_KEY = os.getenv("CRAWLER_SECRET_KEY")
 
-    # ChromaDB 경로
-    DB_PATH = "./chroma_db"
+    # ChromaDB 경로 (FAKE 모드는 대역 임베딩이 실제 DB에 섞이지 않도록 별도 경로 사용)
+    DB_PATH = os.getenv("DB_PATH", "./chroma_db_fake" if DEFAULT_MODEL == "FAKE" else "./chroma_db")
     DEFAULT_DB_COLLECTION_NAME = "2025-2"
+    # 컬렉션 별칭 (JSON, 예: {"compare": ["2025-1", "2025-2"], "rules": "학칙"}) → 요청의 collections에 별칭 사용 가능
+    COLLECTION_ALIASES = json.loads(os.getenv("COLLECTION_ALIASES", "{}"))
+    # 여러 컬렉션 동시 검색 (한 요청당 최대 컬렉션 수 / 합친 결과 수 / 컬렉션당 최대 문서 수, 0이면 균등 분배)
+    FEDERATED_MAX_COLLECTIONS = int(os.getenv("FEDERATED_MAX_COLLECTIONS", "5"))
+    FEDERATED_TOP_K = int(os.getenv("FEDERATED_TOP_K", "20"))
+    FEDERATED_COLLECTION_QUOTA = int(os.getenv("FEDERATED_COLLECTION_QUOTA", "0"))
+    # 벡터 DB 옆에 저장되는 보조 색인 경로 (BM25 키워드 색인 등)
+    INDEX_PATH = os.getenv("INDEX_PATH", "./chroma_db_fake_index" if DEFAULT_MODEL == "FAKE" else "./chroma_db_index")
+    # 벡터 검색 백엔드 ("chroma" | "mmap": float16/int8 memory-mapped 행렬 + NumPy 정확 검색)
+    # 컬렉션별 지정은 JSON (예: {"2025-2": "mmap"}), mmap 행렬 저장 형식 ("float16" | "int8")
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    VECTOR_BACKENDS = json.loads(os.getenv("VECTOR_BACKENDS", "{}"))
+    MMAP_VECTOR_DTYPE = os.getenv("MMAP_VECTOR_DTYPE", "float16").lower()
+    # 역양자화한 float32 사본을 메모리에 두고 검색할 mmap 컬렉션 크기 한도 (MB, float32 기준 / 0이면 사용 안 함)
+    # (float16 → float32 변환이 검색 시간의 대부분이므로, 한도 이하 컬렉션은 첫 검색 때 한 번만 변환)
+    MMAP_FLOAT32_CACHE_MAX_MB = int(os.getenv("MMAP_FLOAT32_CACHE_MAX_MB", "256"))
+    # 메타데이터 역색인 사전 필터: 후보 문서가 이 수 이하이면 후보 ID의 임베딩만으로 유사도 계산
+    # (후보가 검색 결과 수 이하이면 벡터 검색 없이 바로 반환, 이 수를 넘으면 Chroma where 필터 사용)
+    METADATA_PREFILTER_MAX_IDS = int(os.getenv("METADATA_PREFILTER_MAX_IDS", "2000"))
+    # 벡터 DB 구축 임베딩 (동시 배치 수 / 배치당 최대 토큰 수, 텍스트 수 / 재시도 횟수 / Chroma upsert 묶음 크기)
+    EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "512"))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+    VECTOR_UPSERT_BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "5000"))
+    # 백그라운드 PDF 처리/구축 작업 (작업 테이블 SQLite 경로 / 동시에 실행할 작업 수 — 파싱과 구축이 한 스트림이므로 하나의 슬롯)
+    INGESTION_JOB_DB_PATH = os.getenv("INGESTION_JOB_DB_PATH", "./cache/ingestion_jobs.sqlite3")
+    INGESTION_CONCURRENCY = int(os.getenv("INGESTION_CONCURRENCY", "1"))
+    # 스트리밍 구축 (파싱된 청크를 몇 개씩 모아 임베딩/저장할지 / .md, .html, .arrow 결과 파일도 쓸지)
+    INGESTION_STREAM_BATCH_SIZE = int(os.getenv("INGESTION_STREAM_BATCH_SIZE", "256"))
+    INGESTION_WRITE_FILES = os.getenv("INGESTION_WRITE_FILES", "true").lower() == "true"
+    # blue/green 구축 (새 세대 컬렉션에 구축 → 검증 → 별칭 전환, false면 컬렉션에 바로 적재)
+    # 검증: 행 수가 현재 세대의 이 비율 이상 / 검증 질문(JSON 목록)마다 검색 결과 1개 이상, 남겨 둘 이전 세대 수
+    BLUE_GREEN_BUILDS = os.getenv("BLUE_GREEN_BUILDS", "true").lower() == "true"
+    BLUE_GREEN_MIN_ROW_RATIO = float(os.getenv("BLUE_GREEN_MIN_ROW_RATIO", "0.5"))
+    BLUE_GREEN_VALIDATION_QUERIES = json.loads(os.getenv("BLUE_GREEN_VALIDATION_QUERIES", '["졸업 요건", "수강신청 기간"]'))
+    BLUE_GREEN_KEEP_GENERATIONS = int(os.getenv("BLUE_GREEN_KEEP_GENERATIONS", "1"))
+    # 'key':'value' 질문을 열 기반 표 색인으로 답할 때 LLM에 넘길 최대 행 수
+    COURSE_TABLE_MAX_ROWS = int(os.getenv("COURSE_TABLE_MAX_ROWS", "50"))
+    # 프롬프트 문맥 조립 (#Context: 토큰 예산 / 유사 중복으로 볼 shingle Jaccard 유사도)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+    CONTEXT_DEDUP_SIMILARITY = float(os.getenv("CONTEXT_DEDUP_SIMILARITY", "0.95"))
+    # 검색 결과 재순위 (기본 방식 "none" | "mmr", 요청별로 변경 가능 / MMR 후보 수, 최종 문서 수, 관련도 가중치)
+    RERANK_MODE = os.getenv("RERANK_MODE", "none").lower()
+    RERANK_FETCH_K = int(os.getenv("RERANK_FETCH_K", "20"))
+    RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "10"))
+    MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+
+    # 질문 필터 파서 (추가 키 매핑 JSON 경로 / 파싱 결과 LRU 크기)
+    QUESTION_KEY_MAPPING_PATH = os.getenv("QUESTION_KEY_MAPPING_PATH", "")
+    QUESTION_PARSER_CACHE_SIZE = int(os.getenv("QUESTION_PARSER_CACHE_SIZE", "1024"))
+
+    # 일괄 질문(/chat/batch) 설정 (동시 검색/LLM 호출 수, 한 번에 받을 최대 질문 수)
+    CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "4"))
+    CHAT_BATCH_MAX_QUESTIONS = int(os.getenv("CHAT_BATCH_MAX_QUESTIONS", "100"))
+    # 진행 중인 동일 질문(정규화 후 같은 질문 + 같은 컬렉션) 요청을 하나로 병합할지 여부
+    CHAT_COALESCING_ENABLED = os.getenv("CHAT_COALESCING_ENABLED", "true").lower() == "true"
+
+    # LLM 입장 제어 (최대/최소 동시 호출 수, 대기열 크기, 대기 제한 시간(초))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "32"))
+    LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    # 검색어 임베딩 캐시 (메모리 LRU 크기 / SQLite 경로, 빈 값이면 디스크 저장 안 함)
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./cache/query_embeddings.sqlite3")
+    # 문서 청크 임베딩 저장소 (본문 해시 → 벡터, 컬렉션/재구축 간 공유 / 최대 크기(MB), 0이면 제한 없음)
+    DOCUMENT_EMBEDDING_CACHE_PATH = os.getenv("DOCUMENT_EMBEDDING_CACHE_PATH", "./cache/document_embeddings.sqlite3")
+    DOCUMENT_EMBEDDING_CACHE_MAX_MB = int(os.getenv("DOCUMENT_EMBEDDING_CACHE_MAX_MB", "1024"))
+
+    # 의미 기반 답변 캐시 (코사인 유사도 임계값 / 유효 시간(초) / 컬렉션당 최대 항목 수)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+    ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "600"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
 
     # 토크나이저 병렬 처리 비활성화
     os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
     def __init__(self):
+        if self.DEFAULT_MODEL == "FAKE":
+            # 로컬 대역 모델만 사용하므로 외부 서비스 키를 확인하지 않습니다.
+            print("⚠️ DEFAULT_MODEL=FAKE: OpenAI/LlamaParse 대신 로컬 대역 모델을 사용합니다. (부하 테스트 전용)")
+            return
         if self.DEFAULT_MODEL == "OPENAI" and not self.OPENAI_API_KEY:
             raise ValueError("❌ OPENAI_API_KEY가 .env 파일에 설정되지 않았습니다.")
         if not self.LLAMA_CLOUD_API_KEY:
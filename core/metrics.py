@@ -0,0 +1,100 @@
+# core/metrics.py
+"""
+Prometheus 지표 정의 (main.py의 /metrics 에서 노출)
+
+- unihelp_stage_duration_seconds{pipeline, stage}: 파이프라인 단계별 소요 시간
+- unihelp_stage_errors_total{pipeline, stage}: 단계별 오류 수
+- unihelp_cache_events_total{cache, result}: 답변/임베딩 캐시 적중/미스/삭제 (캐시 적중률 계산용)
+- unihelp_events_total{component, event}: 캐시가 아닌 이벤트 (요청 병합, LLM 입장 거절, 작업 접수, 컬렉션 전환 등)
+- unihelp_tokens_total{kind}: 프롬프트/답변 토큰 수, 임베딩한 텍스트 수
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+# LLM 호출/PDF 처리처럼 수 초~수 분 걸리는 단계까지 담을 수 있는 구간
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+STAGE_DURATION = Histogram(
+    "unihelp_stage_duration_seconds",
+    "파이프라인 단계별 소요 시간 (초)",
+    ["pipeline", "stage"],
+    buckets=_STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "unihelp_stage_errors_total",
+    "파이프라인 단계별 오류 수",
+    ["pipeline", "stage"],
+)
+CACHE_EVENTS = Counter(
+    "unihelp_cache_events_total",
+    "답변/임베딩 캐시 적중/미스/삭제 수",
+    ["cache", "result"],
+)
+EVENTS = Counter(
+    "unihelp_events_total",
+    "캐시가 아닌 구성 요소 이벤트 수 (요청 병합, 입장 제어, 사전 필터, 구축 작업, 컬렉션 전환 등)",
+    ["component", "event"],
+)
+TOKENS = Counter(
+    "unihelp_tokens_total",
+    "토큰 및 임베딩 텍스트 수",
+    ["kind"],
+)
+
+
+@contextmanager
+def track_stage(pipeline: str, stage: str):
+    """
+    with 블록의 소요 시간을 단계 히스토그램에 기록합니다. (예외가 나면 오류 카운터도 증가)
+    동기/비동기 함수 어디서든, executor 스레드 안에서도 사용할 수 있습니다.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(pipeline, stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(pipeline, stage).observe(time.perf_counter() - started)
+
+
+def timed_stage(pipeline: str, stage: str = "total"):
+    """함수 전체를 하나의 단계로 기록하는 데코레이터입니다. (async 함수도 지원)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track_stage(pipeline, stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(pipeline, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_error(pipeline: str, stage: str) -> None:
+    """예외를 직접 처리(로그 후 요약 반환 등)하는 곳에서 오류 수만 기록합니다."""
+    STAGE_ERRORS.labels(pipeline, stage).inc()
+
+
+def record_cache_event(cache: str, result: str, count: int = 1) -> None:
+    CACHE_EVENTS.labels(cache, result).inc(count)
+
+
+def record_event(component: str, event: str, count: int = 1) -> None:
+    """캐시 적중률에 섞이면 안 되는 이벤트를 기록합니다. (캐시 이벤트는 record_cache_event)"""
+    EVENTS.labels(component, event).inc(count)
+
+
+def record_tokens(kind: str, count: int) -> None:
+    if count > 0:
+        TOKENS.labels(kind).inc(count)
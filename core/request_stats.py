@@ -0,0 +1,57 @@
+# core/request_stats.py
+
+import contextvars
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RequestStats:
+    """하나의 요청 안에서 발생한 검색/임베딩 호출 횟수를 집계합니다."""
+    retrievals: int = 0
+    embedding_calls: int = 0
+    embedded_texts: int = 0
+    prompt_tokens: int = 0
+
+    def summary(self) -> str:
+        summary = f"검색 {self.retrievals}회, 임베딩 호출 {self.embedding_calls}회 (텍스트 {self.embedded_texts}개)"
+        if self.prompt_tokens:
+            summary += f", 프롬프트 {self.prompt_tokens} 토큰"
+        return summary
+
+
+# asyncio Task / run_in_executor 모두 컨텍스트를 복사하므로,
+# 같은 RequestStats 객체가 요청 처리 경로 전체에서 공유됩니다.
+_current_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def start_request_stats() -> RequestStats:
+    """현재 컨텍스트에 새 집계 객체를 등록하고 반환합니다."""
+    stats = RequestStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_request_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def record_retrieval(count: int = 1) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.retrievals += count
+
+
+def record_embedding_call(num_texts: int = 1) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.embedding_calls += 1
+        stats.embedded_texts += num_texts
+
+
+def record_prompt_tokens(num_tokens: int) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.prompt_tokens += num_tokens
@@ -0,0 +1,47 @@
+# core/single_flight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 비동기 작업을 하나로 합칩니다. (single-flight)
+    - 첫 요청(leader)만 작업을 실행하고, 실행 중에 들어온 같은 키의 요청은 그 결과를 함께 기다립니다.
+    - 작업은 별도 Task로 실행되므로, leader 요청이 취소(클라이언트 연결 종료)되어도 다른 요청은 결과를 받습니다.
+    - 작업이 끝나면 키를 바로 지우므로 결과를 보관하지는 않습니다. (보관은 답변 캐시의 역할)
+    """
+    def __init__(self):
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """반환값: (작업 결과, 다른 요청의 작업에 병합되었는지 여부)"""
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        # 기다리던 요청 하나가 취소되어도 공유 작업 자체는 취소되지 않도록 shield 합니다.
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # 기다리는 요청이 모두 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록 확인합니다.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
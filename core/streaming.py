@@ -0,0 +1,50 @@
+# core/streaming.py
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def iterate_in_thread(make_iterator: Callable[[], Iterator[T]], maxsize: int = 256) -> AsyncIterator[T]:
+    """
+    동기 제너레이터를 executor 스레드에서 실행하면서 만들어지는 항목을 비동기로 하나씩 내보냅니다.
+    - 크기가 제한된 큐로 연결되므로 소비자가 느리면 생산자 스레드가 기다립니다. (메모리 사용량 일정)
+    - 소비자가 중간에 멈추면(예외, 취소) 생산자도 다음 항목에서 멈춥니다.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item, error=None) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put((item, error)), loop).result()
+
+    def produce() -> None:
+        try:
+            for item in make_iterator():
+                if stop.is_set():
+                    return
+                put(item)
+        except Exception as e:
+            put(_DONE, e)
+            return
+        put(_DONE)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        # 큐를 비워 put에서 기다리는 생산자를 깨운 뒤, 스레드가 끝날 때까지 기다립니다.
+        while not queue.empty():
+            queue.get_nowait()
+        await producer
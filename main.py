@@ -2,7 +2,8 @@
 
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import uvicorn
@@ -47,10 +48,13 @@ async def lifespan(app: FastAPI):
     # 앱 시작 시
     logger.info("FastAPI 앱 시작... 스케줄러를 시작합니다.")
     scheduler.start()
+    # 재시작 전에 끝나지 않은 PDF 처리/구축 작업 이어서 실행
+    await processing_router.ingestion_jobs.resume()
     yield
     # 앱 종료 시
     logger.info("FastAPI 앱 종료... 스케줄러를 종료합니다.")
     scheduler.shutdown()
+    await processing_router.ingestion_jobs.shutdown()
 
 # [중요] 5. FastAPI 앱 생성 시 'lifespan' 적용
 app = FastAPI(
@@ -73,6 +77,13 @@ async def read_root():
     """
     return {"message": "RAG Chatbot API (with Crawling Scheduler) is running."}
 
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+async def metrics():
+    """
+    Prometheus 수집용 지표 (단계별 소요 시간 히스토그램, 캐시 적중/오류/토큰 카운터)
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Uvicorn으로 앱 실행 (터미널에서 직접 실행 시)
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,407 @@
+# models/embedding_cache.py
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from core.metrics import record_cache_event
+
+
+class SqliteEmbeddingStore:
+    """
+    임베딩 벡터를 SQLite 파일에 저장하는 간단한 Key-Value 저장소입니다.
+    서버를 재시작해도 이전에 계산한 임베딩을 재사용할 수 있습니다.
+    """
+    _BATCH = 500  # SQLite 바인딩 변수 개수 제한 안에서 한 번에 조회할 키 수
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # executor 스레드에서도 호출되므로 연결 하나를 락으로 보호해 공유합니다.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        values = array("f")
+        values.frombytes(blob)
+        return values.tolist()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """저장된 키만 골라 {키: 벡터}로 반환합니다."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), self._BATCH):
+                batch = keys[start:start + self._BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = self._decode(blob)
+        return found
+
+    def put(self, key: str, vector: List[float]) -> None:
+        self.put_many({key: vector})
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        """여러 벡터를 한 트랜잭션(커밋 1회)으로 저장합니다."""
+        if not vectors:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, self._encode(vector)) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class DocumentEmbeddingStore:
+    """
+    문서 청크 임베딩을 본문 해시로 저장하는 내용 주소(content-addressed) SQLite 저장소입니다.
+    - 키: 모델 이름 + 청크 본문(원문 그대로)의 SHA-256 → 컬렉션/재구축과 상관없이 같은 본문이면 재사용
+    - 저장된 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다. (0이면 제한 없음)
+    - export_to/import_from으로 다른 노드에 미리 채워 둘 수 있습니다.
+    """
+    _BATCH = 500  # SQLite 바인딩 변수 개수 제한 안에서 한 번에 조회할 키 수
+
+    def __init__(self, path: str, max_bytes: int = 0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS document_embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS document_embeddings_last_used ON document_embeddings (last_used)"
+            )
+            self._conn.commit()
+            self._total_bytes = self._sum_bytes()
+
+    def _sum_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM document_embeddings").fetchone()[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """저장된 키만 골라 {키: 벡터}로 반환하고, 사용 시각을 갱신합니다."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), self._BATCH):
+                batch = keys[start:start + self._BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM document_embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = SqliteEmbeddingStore._decode(blob)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE document_embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        """여러 벡터를 (크기 제한에 따른 삭제까지) 한 트랜잭션(커밋 1회)으로 저장합니다."""
+        if not vectors:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            blob = SqliteEmbeddingStore._encode(vector)
+            rows.append((key, blob, len(key) + len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO document_embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._total_bytes = self._sum_bytes()
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> int:
+        """(락 안에서, 커밋은 호출한 쪽에서) 최대 크기의 90%가 될 때까지 오래 사용하지 않은 항목을 지웁니다."""
+        if not self.max_bytes or self._total_bytes <= self.max_bytes:
+            return 0
+        target = self._total_bytes - int(self.max_bytes * 0.9)
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM document_embeddings ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM document_embeddings WHERE key = ?", victims)
+        self._total_bytes -= freed
+        record_cache_event("document_embedding", "evicted", len(victims))
+        return len(victims)
+
+    def export_to(self, path: str) -> int:
+        """저장소 전체를 다른 SQLite 파일로 복사합니다. (반환: 항목 수)"""
+        Path(path).unlink(missing_ok=True)
+        dest = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._conn.backup(dest)
+        finally:
+            dest.close()
+        return len(self)
+
+    def import_from(self, path: str) -> int:
+        """
+        export_to로 만든 파일의 항목 중 없는 키만 가져옵니다. (반환: 새로 추가된 항목 수)
+        가져온 뒤 크기 제한을 넘으면 오래된 항목부터 지웁니다.
+        """
+        with self._lock:
+            before = self._conn.execute("SELECT COUNT(*) FROM document_embeddings").fetchone()[0]
+            self._conn.execute("ATTACH DATABASE ? AS source", (path,))
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO document_embeddings (key, vector, size, last_used) "
+                    "SELECT key, vector, size, last_used FROM source.document_embeddings"
+                )
+                self._conn.commit()
+            finally:
+                self._conn.execute("DETACH DATABASE source")
+            added = self._conn.execute("SELECT COUNT(*) FROM document_embeddings").fetchone()[0] - before
+            self._total_bytes = self._sum_bytes()
+            self._evict()
+            self._conn.commit()
+        return added
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "bytes": self._total_bytes, "max_bytes": self.max_bytes}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM document_embeddings").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    검색어(query) 임베딩 캐시 래퍼입니다.
+    - 정규화된 질문 텍스트를 키로 사용 (공백/대소문자/유니코드 정규화)
+    - 1차: 크기가 제한된 메모리 LRU, 2차: (선택) SQLite 디스크 저장소
+    - 문서 임베딩(embed_documents)은 (선택) 본문 해시 저장소에 없는 청크만 내부 모델로 계산합니다.
+    """
+    def __init__(
+        self,
+        inner: Embeddings,
+        model_name: str,
+        max_size: int = 2048,
+        disk_store: Optional[SqliteEmbeddingStore] = None,
+        document_store: Optional[DocumentEmbeddingStore] = None
+    ):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_size = max_size
+        self.disk_store = disk_store
+        self.document_store = document_store
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.document_hits = 0
+        self.document_misses = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """'전공필수  과목 ' 과 '전공필수 과목' 이 같은 키가 되도록 정규화합니다."""
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def _cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, List[float]]:
+        """메모리 LRU에서 찾은 {키: 벡터}"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.hits += len(found)
+        if found:
+            record_cache_event("embedding", "memory_hit", len(found))
+        return found
+
+    def _lookup_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        메모리에 없던 키를 디스크 저장소에서 찾아 메모리 LRU에도 올립니다. (찾지 못한 키는 미스로 집계)
+        SQLite 조회가 있으므로 비동기 경로에서는 스레드에서 호출합니다.
+        """
+        found = self.disk_store.get_many(keys) if self.disk_store is not None and keys else {}
+        for key, vector in found.items():
+            self._remember(key, vector)
+        with self._lock:
+            self.disk_hits += len(found)
+            self.misses += len(keys) - len(found)
+        if found:
+            record_cache_event("embedding", "disk_hit", len(found))
+        if len(keys) > len(found):
+            record_cache_event("embedding", "miss", len(keys) - len(found))
+        return found
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """메모리 LRU → 디스크 저장소 순서로 찾은 {키: 벡터}"""
+        found = self._lookup_memory(keys)
+        found.update(self._lookup_disk([key for key in dict.fromkeys(keys) if key not in found]))
+        return found
+
+    async def _alookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """_lookup과 같지만 디스크 조회(SQLite)는 이벤트 루프를 막지 않도록 스레드에서 실행합니다."""
+        found = self._lookup_memory(keys)
+        rest = [key for key in dict.fromkeys(keys) if key not in found]
+        if rest and self.disk_store is not None:
+            found.update(await asyncio.to_thread(self._lookup_disk, rest))
+        else:
+            found.update(self._lookup_disk(rest))
+        return found
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+        if self.disk_store is not None:
+            self.disk_store.put_many(vectors)
+
+    async def _astore(self, vectors: Dict[str, List[float]]) -> None:
+        """_store와 같지만 디스크 저장(SQLite 커밋 1회)은 스레드에서 실행합니다."""
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+        if self.disk_store is not None and vectors:
+            await asyncio.to_thread(self.disk_store.put_many, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._cache_key(text)
+        vector = self._lookup([key]).get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._cache_key(text)
+        vector = (await self._alookup([key])).get(key)
+        if vector is None:
+            vector = await self.inner.aembed_query(text)
+            await self._astore({key: vector})
+        return vector
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 검색어를 한 번에 임베딩합니다.
+        캐시에 없는 검색어만 모아 내부 모델의 embed_documents를 한 번 호출합니다.
+        """
+        keys = [self._cache_key(text) for text in texts]
+        found = await self._alookup(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            embedded = dict(zip(missing.keys(), await self.inner.aembed_documents(list(missing.values()))))
+            # 새로 계산한 검색어 벡터는 한 트랜잭션으로 저장합니다.
+            await self._astore(embedded)
+            found.update(embedded)
+        return [found[key] for key in keys]
+
+    def _document_key(self, text: str) -> str:
+        # 문서 임베딩은 본문이 바이트 단위로 같을 때만 재사용합니다. (정규화하지 않음)
+        return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _lookup_documents(self, texts: List[str]):
+        """
+        (키 목록, 저장소에서 찾은 벡터, 새로 임베딩할 {키: 본문})
+        SQLite 조회가 있으므로 비동기 경로에서는 스레드에서 호출합니다.
+        """
+        keys = [self._document_key(text) for text in texts]
+        found = self.document_store.get_many(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        hits = len(texts) - sum(1 for key in keys if key in missing)
+        with self._lock:
+            self.document_hits += hits
+            self.document_misses += len(texts) - hits
+        record_cache_event("document_embedding", "hit", hits)
+        record_cache_event("document_embedding", "miss", len(texts) - hits)
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_store is None:
+            return self.inner.embed_documents(texts)
+        keys, found, missing = self._lookup_documents(texts)
+        if missing:
+            embedded = dict(zip(missing.keys(), self.inner.embed_documents(list(missing.values()))))
+            self.document_store.put_many(embedded)
+            found.update(embedded)
+        return [found[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_store is None:
+            return await self.inner.aembed_documents(texts)
+        # 구축 묶음 전체의 본문 해시 조회/저장이 요청 처리를 막지 않도록 스레드에서 실행합니다. (묶음당 커밋 1회)
+        keys, found, missing = await asyncio.to_thread(self._lookup_documents, texts)
+        if missing:
+            embedded = dict(zip(missing.keys(), await self.inner.aembed_documents(list(missing.values()))))
+            await asyncio.to_thread(self.document_store.put_many, embedded)
+            found.update(embedded)
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/미스 카운터를 반환합니다."""
+        with self._lock:
+            return {
+                "memory_hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_size": len(self._memory),
+                "max_size": self.max_size,
+                "document_hits": self.document_hits,
+                "document_misses": self.document_misses,
+            }
@@ -0,0 +1,173 @@
+# models/fake_models.py
+"""
+DEFAULT_MODEL=FAKE 일 때 사용하는 결정적(deterministic) 로컬 대역 모델들입니다.
+API 비용 없이 RAG 경로/처리 API의 부하 테스트와 벤치마크를 하기 위한 용도이며,
+운영 환경에서는 사용하지 않습니다.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class HashEmbeddings(Embeddings):
+    """
+    문자 n-gram 해싱 기반의 결정적 임베딩입니다.
+    같은 텍스트는 항상 같은 벡터가 되고, 글자가 많이 겹치는 텍스트일수록 코사인 유사도가 높아
+    검색/캐시 경로를 실제와 비슷하게 동작시킬 수 있습니다.
+    """
+    def __init__(self, dimensions: int = 1536, ngram_size: int = 2):
+        self.dimensions = dimensions
+        self.ngram_size = ngram_size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        text = re.sub(r"\s+", " ", text).strip().lower()
+        n = self.ngram_size
+        grams = [text[i:i + n] for i in range(max(len(text) - n + 1, 1))]
+        for gram in grams:
+            digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    설정한 지연 시간 후 결정적인 답변을 돌려주는 채팅 모델입니다.
+    - latency: 첫 토큰까지의 지연 (초)
+    - token_delay: 스트리밍 시 토큰 사이 지연 (초)
+    답변은 질문과 문맥 길이를 요약한 문장이라, 같은 입력에는 항상 같은 답변이 나옵니다.
+    """
+    latency: float = 1.0
+    token_delay: float = 0.02
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @staticmethod
+    def _answer(messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        question = re.search(r"#Question:\s*(.*?)\s*#Context:", prompt, re.S)
+        context = re.search(r"#Context:\s*(.*?)\s*#Answer:", prompt, re.S)
+        question_text = question.group(1).strip() if question else prompt[:50]
+        context_text = context.group(1) if context else ""
+        return f"[FAKE] '{question_text}'에 대한 답변입니다. (문맥 {len(context_text)}자, 문서 {context_text.count(chr(10) * 2) + 1 if context_text else 0}개 참고)"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self._answer(messages)):
+            time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self._answer(messages)):
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+DEFAULT_FAKE_PAGES = [
+    "# 2025학년도 2학기 교육과정 안내\n\n"
+    "본 문서는 2025학년도 2학기 학부 교육과정 및 수강신청 안내 자료입니다.\n\n"
+    "## 수강신청 기간\n\n수강신청은 8월 18일부터 8월 22일까지 진행됩니다.",
+    "# 졸업 요건\n\n"
+    "졸업을 위해서는 총 130학점 이상을 취득해야 하며, 교양필수 및 전공필수 과목을 모두 이수해야 합니다.\n\n"
+    "<table><tr><th>이수구분</th><th>학점</th></tr><tr><td>교양필수</td><td>17</td></tr></table>",
+    "# 휴학 및 복학\n\n"
+    "휴학 신청은 학기 개시일 전까지 포털에서 신청할 수 있습니다.",
+]
+
+
+@dataclass
+class FakeParsedPage:
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class FakeParseResult:
+    def __init__(self, pages: List[str]):
+        self.pages = pages
+
+    def get_markdown_documents(self, split_by_page: bool = True) -> List[FakeParsedPage]:
+        documents = [
+            FakeParsedPage(text=page, metadata={"page_number": number})
+            for number, page in enumerate(self.pages, 1)
+        ]
+        if split_by_page:
+            return documents
+        return [FakeParsedPage(text="\n\n".join(self.pages), metadata={"page_number": 1})]
+
+
+class FakeLlamaParse:
+    """
+    LlamaParse.aparse 대신 미리 준비한 페이지 Markdown을 돌려줍니다.
+    pages_path가 주어지면 해당 파일을 '—' 구분선(LlamaParse page_separator) 기준으로 나눠 사용합니다.
+    """
+    def __init__(self, pages_path: Optional[str] = None, latency: float = 0.5):
+        self.latency = latency
+        self.pages = DEFAULT_FAKE_PAGES
+        if pages_path and Path(pages_path).exists():
+            content = Path(pages_path).read_text(encoding="utf-8")
+            self.pages = [page.strip() for page in content.split("\n—\n") if page.strip()]
+
+    async def aparse(self, file_path: str) -> FakeParseResult:
+        await asyncio.sleep(self.latency)
+        return FakeParseResult(self.pages)
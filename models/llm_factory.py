@@ -1,22 +1,101 @@
 # models/llm_factory.py
 
+from typing import List
+
 from core.config import settings
+from core.metrics import record_tokens
+from core.request_stats import record_embedding_call
+from langchain_core.embeddings import Embeddings
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from models.embedding_cache import CachedEmbeddings, DocumentEmbeddingStore, SqliteEmbeddingStore
+from models.fake_models import FakeChatModel, HashEmbeddings
+from models.llm_gateway import AdaptiveConcurrencyLimiter, LLMGateway
+
+EMBEDDING_MODEL_NAME = "text-embedding-3-small"
+# FAKE 모드 임베딩은 캐시 키가 실제 모델과 섞이지 않도록 이름을 따로 씁니다.
+FAKE_EMBEDDING_MODEL_NAME = "fake-hash-embedding"
+
+
+class CountingEmbeddings(Embeddings):
+    """
+    실제 임베딩 모델 호출 횟수를 요청 단위로 집계하는 래퍼입니다.
+    (core/request_stats.py의 RequestStats에 기록)
+    """
+    def __init__(self, inner: Embeddings):
+        self.inner = inner
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        record_embedding_call(len(texts))
+        record_tokens("embedded_texts", len(texts))
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        record_embedding_call()
+        record_tokens("embedded_texts", 1)
+        return self.inner.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        record_embedding_call(len(texts))
+        record_tokens("embedded_texts", len(texts))
+        return await self.inner.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        record_embedding_call()
+        record_tokens("embedded_texts", 1)
+        return await self.inner.aembed_query(text)
+
 
 def get_llm():
     """설정에 맞는 LLM 클라이언트를 반환합니다."""
     if settings.DEFAULT_MODEL == "OPENAI":
         return ChatOpenAI(temperature=0.1, model="gpt-4.1")
+    elif settings.DEFAULT_MODEL == "FAKE":
+        return FakeChatModel(
+            latency=settings.FAKE_LLM_LATENCY_SECONDS,
+            token_delay=settings.FAKE_LLM_TOKEN_DELAY_SECONDS
+        )
     else:
         raise ValueError(f"Unsupported LLM model: {settings.DEFAULT_MODEL}")
 
 def get_embedding_model():
     """설정에 맞는 임베딩 모델 클라이언트를 반환합니다."""
     if settings.DEFAULT_MODEL == "OPENAI":
-        return OpenAIEmbeddings(model="text-embedding-3-small")
+        return CountingEmbeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL_NAME))
+    elif settings.DEFAULT_MODEL == "FAKE":
+        return CountingEmbeddings(HashEmbeddings())
     else:
         raise ValueError(f"Unsupported Embedding model: {settings.DEFAULT_MODEL}")
 
+def get_cached_embedding_model():
+    """검색어 임베딩 캐시(LRU + 선택적 SQLite)와 문서 임베딩 저장소로 감싼 임베딩 모델을 반환합니다."""
+    disk_store = None
+    if settings.EMBEDDING_CACHE_PATH:
+        disk_store = SqliteEmbeddingStore(settings.EMBEDDING_CACHE_PATH)
+    document_store = None
+    if settings.DOCUMENT_EMBEDDING_CACHE_PATH:
+        document_store = DocumentEmbeddingStore(
+            settings.DOCUMENT_EMBEDDING_CACHE_PATH,
+            max_bytes=settings.DOCUMENT_EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+        )
+    return CachedEmbeddings(
+        get_embedding_model(),
+        model_name=FAKE_EMBEDDING_MODEL_NAME if settings.DEFAULT_MODEL == "FAKE" else EMBEDDING_MODEL_NAME,
+        max_size=settings.EMBEDDING_CACHE_SIZE,
+        disk_store=disk_store,
+        document_store=document_store
+    )
+
+def get_llm_gateway(llm):
+    """동시 호출 제한/대기열/적응형 rate limit 대응을 적용한 LLM 게이트웨이를 반환합니다."""
+    limiter = AdaptiveConcurrencyLimiter(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        min_concurrency=settings.LLM_MIN_CONCURRENCY,
+        queue_size=settings.LLM_QUEUE_SIZE,
+        queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS
+    )
+    return LLMGateway(llm, limiter)
+
 # 전역적으로 사용할 모델 인스턴스 생성
 llm = get_llm()
-embedding_model = get_embedding_model()
\ No newline at end of file
+llm_gateway = get_llm_gateway(llm)
+embedding_model = get_cached_embedding_model()
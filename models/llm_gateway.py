@@ -0,0 +1,177 @@
+# models/llm_gateway.py
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+import openai
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from core.metrics import record_event
+
+
+class LLMOverloadedError(Exception):
+    """
+    LLM 대기열이 가득 찼거나, 대기 시간이 초과되었거나, 제공자가 rate limit을 반환한 경우 발생합니다.
+    라우터에서 429 Too Many Requests + Retry-After 헤더로 변환합니다.
+    """
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    LLM 동시 호출 수를 제한하는 적응형 리미터입니다.
+    - 동시에 limit개까지만 실행하고, 나머지는 최대 queue_size개까지 FIFO로 대기합니다.
+    - 대기열이 가득 차면 기다리지 않고 즉시 LLMOverloadedError (빠른 429)
+    - 대기 시간이 queue_timeout을 넘으면 LLMOverloadedError
+    - 제공자 rate limit 발생 시 limit을 절반으로 줄이고(multiplicative decrease),
+      성공이 limit번 누적될 때마다 1씩 늘려(additive increase) max_concurrency까지 회복합니다.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        queue_size: int = 32,
+        queue_timeout: float = 10.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.limit = max_concurrency
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._successes_since_change = 0
+        # 평균 LLM 응답 시간 (Retry-After 추정용, 지수 이동 평균)
+        self._avg_latency = 2.0
+        self.accepted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.rate_limited = 0
+
+    def retry_after(self) -> int:
+        """대기열이 비워질 때까지 걸릴 대략적인 시간(초)"""
+        return max(1, math.ceil(self._avg_latency * (len(self._waiters) + 1) / max(self.limit, 1)))
+
+    def _wake(self) -> None:
+        while self._waiters and self._active < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self.accepted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            record_event("llm_gateway", "rejected")
+            raise LLMOverloadedError("LLM 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            record_event("llm_gateway", "timed_out")
+            raise LLMOverloadedError("LLM 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.", self.retry_after())
+        except asyncio.CancelledError:
+            # 자리를 배정받은 직후에 취소되었다면 자리를 돌려줍니다.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.accepted += 1
+
+    def release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    def on_success(self, latency: float) -> None:
+        self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+        self._successes_since_change += 1
+        if self.limit < self.max_concurrency and self._successes_since_change >= self.limit:
+            self.limit += 1
+            self._successes_since_change = 0
+            self._wake()
+
+    def on_rate_limited(self) -> None:
+        self.rate_limited += 1
+        record_event("llm_gateway", "rate_limited")
+        new_limit = max(self.min_concurrency, self.limit // 2)
+        if new_limit != self.limit:
+            print(f"⚠️ LLM rate limit 감지: 동시 호출 수 {self.limit} → {new_limit}")
+        self.limit = new_limit
+        self._successes_since_change = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "queue_size": self.queue_size,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rate_limited": self.rate_limited,
+            "avg_latency_seconds": round(self._avg_latency, 3),
+        }
+
+
+class LLMGateway(Runnable):
+    """
+    llm_factory의 LLM을 감싸 입장 제어(admission control)를 적용하는 Runnable입니다.
+    `prompt | llm_gateway | StrOutputParser()` 처럼 기존 LLM 자리에 그대로 연결합니다.
+    (비동기 경로 ainvoke/astream/abatch에만 적용, 동기 invoke는 그대로 위임)
+    """
+    def __init__(self, llm: Runnable, limiter: AdaptiveConcurrencyLimiter):
+        self.llm = llm
+        self.limiter = limiter
+
+    def _overloaded(self, error: Exception) -> LLMOverloadedError:
+        self.limiter.on_rate_limited()
+        return LLMOverloadedError(f"LLM 제공자 요청 한도를 초과했습니다: {error}", self.limiter.retry_after())
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.llm.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        async with self.limiter.slot():
+            started = time.perf_counter()
+            try:
+                result = await self.llm.ainvoke(input, config, **kwargs)
+            except openai.RateLimitError as e:
+                raise self._overloaded(e) from e
+            self.limiter.on_success(time.perf_counter() - started)
+            return result
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        # 스트리밍 중에는 마지막 토큰까지 자리를 점유합니다.
+        async with self.limiter.slot():
+            started = time.perf_counter()
+            try:
+                async for chunk in self.llm.astream(input, config, **kwargs):
+                    yield chunk
+            except openai.RateLimitError as e:
+                raise self._overloaded(e) from e
+            self.limiter.on_success(time.perf_counter() - started)
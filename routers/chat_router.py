@@ -1,9 +1,15 @@
 # routers/chat_router.py
 
+import json
 import logging
+import time
 from fastapi import APIRouter, HTTPException
-from schemas.chat_schema import ChatRequest, ChatResponse
-from services.chat_service import chat_service
+from fastapi.responses import StreamingResponse
+from core.config import settings
+from schemas.chat_schema import ChatRequest, ChatResponse, ChatBatchRequest, ChatBatchResponse, ChatBatchItem
+from services.chat_service import InvalidChatRequestError, chat_service
+from models.llm_factory import embedding_model, llm_gateway
+from models.llm_gateway import LLMOverloadedError
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -11,10 +17,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+
+def _overloaded_exception(e: LLMOverloadedError) -> HTTPException:
+    """LLM 대기열 초과/대기 시간 초과/제공자 rate limit을 429 + Retry-After 응답으로 변환합니다."""
+    logger.warning(f"LLM 과부하로 요청 거절 (Retry-After: {e.retry_after}s): {e}")
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def get_chat_response(request: ChatRequest):
     """
-    사용자 질문에 대해 기본 설정된 컬렉션을 기반으로 답변을 반환합니다.
+    사용자 질문에 대해 기본 설정된 컬렉션(또는 요청한 collections)을 기반으로 답변을 반환합니다.
     """
     if not request.question:
         raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
@@ -27,8 +40,119 @@ async def get_chat_response(request: ChatRequest):
         # ✨ [수정됨] 비동기 서비스 호출
         # chat_service.get_answer() -> await chat_service.get_answer()
         # 서비스가 작업을 완료할 때까지 기다리되, 서버(Event Loop)는 차단하지 않음
-        answer = await chat_service.get_answer(request.question)
+        answer = await chat_service.get_answer(request.question, rerank=request.rerank, collections=request.collections)
         return ChatResponse(answer=answer)
+    except LLMOverloadedError as e:
+        raise _overloaded_exception(e)
+    except InvalidChatRequestError as e:
+        # 존재하지 않는 컬렉션/별칭 등 잘못된 요청 (그 밖의 ValueError는 내부 오류로 500)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"답변 생성 중 오류 발생: {e}")
-        raise HTTPException(status_code=500, detail=f"답변 생성 중 오류 발생: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"답변 생성 중 오류 발생: {e}")
+
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def get_batch_chat_response(request: ChatBatchRequest):
+    """
+    여러 질문에 대한 답변을 한 번에 반환합니다. (새 학기 컬렉션 오픈 시 FAQ 사전 생성 등)
+    결과는 입력 순서와 같으며, 개별 질문의 실패는 해당 항목의 `error`로 반환됩니다.
+    """
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="질문 목록을 입력해주세요.")
+    if len(request.questions) > settings.CHAT_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {settings.CHAT_BATCH_MAX_QUESTIONS}개의 질문만 처리할 수 있습니다."
+        )
+
+    logger.info(f"수신된 일괄 질문 수: {len(request.questions)}개")
+
+    try:
+        results = await chat_service.get_answers_batch(
+            request.questions, request.max_concurrency, rerank=request.rerank, collections=request.collections
+        )
+    except InvalidChatRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"일괄 답변 생성 중 오류 발생: {e}")
+        raise HTTPException(status_code=500, detail=f"일괄 답변 생성 중 오류 발생: {e}")
+
+    return ChatBatchResponse(results=[
+        ChatBatchItem(question=question, answer=answer, error=error)
+        for question, (answer, error) in zip(request.questions, results)
+    ])
+
+
+def _sse_event(data: dict, event: str = "message") -> str:
+    """Server-Sent Events 형식의 이벤트 문자열을 만듭니다. (줄바꿈은 JSON 인코딩으로 보존)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def stream_chat_response(request: ChatRequest):
+    """
+    /chat 과 같은 답변을 Server-Sent Events(text/event-stream)로 스트리밍합니다.
+    - `message` 이벤트: {"token": "..."} 형태의 답변 조각
+    - `end` 이벤트: 스트림 종료
+    - `error` 이벤트: 생성 도중 오류 발생 시
+    첫 토큰이 나오기 전에 LLM 대기열이 가득 차면 스트림을 열지 않고 429로 응답합니다.
+    (Spring 클라이언트용 JSON 응답은 기존 /chat 엔드포인트를 그대로 사용합니다.)
+    """
+    if not request.question:
+        raise HTTPException(status_code=400, detail="질문을 입력해주세요.")
+
+    question_size = len(request.question.encode('utf-8'))
+    logger.info(f"수신된 스트리밍 질문 크기: {question_size / 1024:.2f}k")
+
+    started_at = time.perf_counter()
+    tokens = chat_service.stream_answer(request.question, rerank=request.rerank, collections=request.collections)
+    # 입장 제어 결과(429)를 상태 코드로 전달하려면 응답 헤더를 보내기 전에 첫 토큰까지 받아야 합니다.
+    try:
+        first_token = await tokens.__anext__()
+        logger.info(f"⏱️ 첫 토큰까지 걸린 시간(TTFT): {(time.perf_counter() - started_at) * 1000:.0f}ms")
+    except StopAsyncIteration:
+        first_token = None
+    except LLMOverloadedError as e:
+        raise _overloaded_exception(e)
+    except InvalidChatRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"스트리밍 답변 생성 중 오류 발생: {e}")
+        raise HTTPException(status_code=500, detail=f"답변 생성 중 오류 발생: {e}")
+
+    async def event_generator():
+        try:
+            if first_token is not None:
+                yield _sse_event({"token": first_token})
+                async for token in tokens:
+                    yield _sse_event({"token": token})
+            yield _sse_event({}, event="end")
+        except Exception as e:
+            logger.error(f"스트리밍 답변 생성 중 오류 발생: {e}")
+            yield _sse_event({"detail": f"답변 생성 중 오류 발생: {e}"}, event="error")
+        finally:
+            # 클라이언트가 연결을 끊은 경우에도 LLM 스트림(입장 제어 자리)을 바로 반납합니다.
+            await tokens.aclose()
+            logger.info(f"⏱️ 스트리밍 응답 전체 시간: {(time.perf_counter() - started_at) * 1000:.0f}ms")
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 응답을 버퍼링하지 않도록 설정
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    챗봇 경로에서 사용하는 캐시들의 적중/미스 카운터, 동일 질문 병합 횟수, LLM 입장 제어 상태를 반환합니다.
+    """
+    return {
+        "embedding_cache": embedding_model.stats(),
+        "document_embedding_store": embedding_model.document_store.stats() if embedding_model.document_store else None,
+        "answer_cache": chat_service.answer_cache.stats() if chat_service.answer_cache else None,
+        "coalescing": chat_service.single_flight.stats() if chat_service.single_flight else None,
+        "llm_gateway": llm_gateway.limiter.stats(),
+    }
@@ -8,6 +8,7 @@ import json
 from typing import List, Tuple, Optional, Dict
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from core.config import settings # 👈 settings 임포트 확인
+from core.metrics import record_error, timed_stage, track_stage
 from services.crawling_service import crawling_service
 from schemas.chat_schema import CrawlSendSummaryResponse, SpringSendResult
 from datetime import datetime
@@ -17,6 +18,7 @@ logger = logging.getLogger(__name__)
 
 
 # ▼▼▼ [수정 1] 핵심 로직을 별도 async 함수로 분리 ▼▼▼
+@timed_stage("crawl")
 async def run_crawl_and_send_logic() -> CrawlSendSummaryResponse:
     """
     용인대 공지사항을 크롤링하고 Spring 서버로 전송하는 핵심 로직.
@@ -31,7 +33,8 @@ async def run_crawl_and_send_logic() -> CrawlSendSummaryResponse:
 
     try:
         # 1. 크롤링 실행
-        crawled_data, temp_dir = await crawling_service.crawl_yongin_notices_with_files()
+        with track_stage("crawl", "crawl"):
+            crawled_data, temp_dir = await crawling_service.crawl_yongin_notices_with_files()
 
         if not crawled_data:
             logger.warning("크롤링된 데이터가 없어 Spring 서버로 전송할 수 없습니다.")
@@ -98,13 +101,13 @@ async def run_crawl_and_send_logic() -> CrawlSendSummaryResponse:
 
                 # Spring 서버에 POST 요청
                 try:
-                    response = await client.post(
-                        settings.SPRING_SERVER_UPLOAD_URL,
-                        files=files_to_send,
-                        headers=headers
-                    )
-                    
-                    response.raise_for_status()
+                    with track_stage("crawl", "spring_upload"):
+                        response = await client.post(
+                            settings.SPRING_SERVER_UPLOAD_URL,
+                            files=files_to_send,
+                            headers=headers
+                        )
+                        response.raise_for_status()
                     
                     send_results.append(SpringSendResult(
                         notice_title=notice_title,
@@ -158,6 +161,7 @@ async def run_crawl_and_send_logic() -> CrawlSendSummaryResponse:
 
     except Exception as e:
         logger.error(f"크롤링 또는 전송 프로세스 중 예기치 않은 오류 발생: {e}", exc_info=True)
+        record_error("crawl", "total")
         # 스케줄러에서 실행될 때를 대비해 오류가 포함된 응답 반환
         return CrawlSendSummaryResponse(
             message=f"크롤링/전송 실패: {str(e)}",
@@ -1,11 +1,21 @@
+import os
 import shutil
+import asyncio
 import logging
+import tempfile
 from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from schemas.chat_schema import FullProcessingResponse, CollectionListResponse
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from models.llm_factory import embedding_model
+from schemas.chat_schema import (
+    FullProcessingResponse, CollectionListResponse, IngestionJobResponse, IngestionJobListResponse,
+    CollectionAliasResponse, CollectionAliasListResponse
+)
 from services.file_processing_service import FileProcessorService
+from services.ingestion_job_service import IngestionJobService
 from services.vector_store_service import vector_store_service
 
 # 로깅 설정
@@ -15,6 +25,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 file_processor = FileProcessorService()
+ingestion_jobs = IngestionJobService(file_processor, vector_store_service)
 
 # --- 파일 처리부터 벡터 DB 구축까지 한 번에 실행하는 최종 API ---
 @router.post("/process-pdf-full-and-build-db", response_model=FullProcessingResponse)
@@ -23,7 +34,7 @@ async def process_pdf_full_and_build_db(
     collection_name: str = Form(...)
 ):
     """
-    PDF 파일을 업로드하여 모든 형식(DOCX, MD, HTML, TXT)으로 변환하고,
+    PDF 파일을 업로드하여 모든 형식(DOCX, MD, HTML, 표 행 .arrow)으로 변환하고,
     최종 결과물로 벡터 DB까지 구축합니다.
     """
     if not collection_name.strip():
@@ -41,40 +52,80 @@ async def process_pdf_full_and_build_db(
         shutil.copyfileobj(file.file, buffer)
 
     try:
-        # 1. 4단계 파일 처리 파이프라인 실행 (DOCX, MD, HTML, TXT 생성)
-        docx_path, markdown_path, html_path, rag_text_path = await file_processor.process_full_pipeline(
-            pdf_path=str(file_path)
-        )
-        
-        # 2. 생성된 파일들로 벡터 DB 구축
-        logger.info(f"🔧 벡터 DB 구축 시작: 컬렉션='{collection_name}'")
-        num_documents = vector_store_service.build_from_files(
-            md_path=markdown_path,
-            txt_path=rag_text_path,
-            collection_name=collection_name
+        # 1~2. 파일 처리 파이프라인에서 나오는 청크를 바로 임베딩해 벡터 DB 구축 (DOCX, MD, HTML, 표 행 .arrow 파일도 함께 저장)
+        logger.info(f"🔧 스트리밍 처리 및 벡터 DB 구축 시작: 컬렉션='{collection_name}'")
+        ingestion = await vector_store_service.abuild_and_publish(
+            file_processor.stream_pipeline(str(file_path), write_files=True),
+            collection_name=collection_name,
+            source=file_path.name
         )
-        logger.info(f"✅ 벡터 DB 구축 완료. 추가된 문서 수: {num_documents}개")
+        logger.info(f"✅ 벡터 DB 구축 완료. 청크 변경 내역: {ingestion}")
 
         # 3. 모든 작업 완료 후 최종 결과 반환
         return FullProcessingResponse(
             message=f"PDF 파일 처리 및 '{collection_name}' 벡터 DB 구축이 모두 완료되었습니다.",
             source_file=file.filename,
-            docx_file=docx_path,
-            markdown_file=markdown_path,
-            html_file=html_path,
-            rag_text_file=rag_text_path
+            **file_processor.artifact_paths(str(file_path)),
+            ingestion=ingestion
         )
     except Exception as e:
         logger.error(f"PDF 처리 또는 DB 구축 중 오류 발생: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- 파일 처리 + 벡터 DB 구축을 백그라운드 작업으로 실행하는 API ---
+@router.post("/jobs", response_model=IngestionJobResponse, status_code=202)
+async def submit_ingestion_job(
+    file: UploadFile = File(...),
+    collection_name: str = Form(...)
+):
+    """
+    PDF를 업로드하면 바로 작업 ID를 돌려주고, 변환과 벡터 DB 구축은 백그라운드에서 실행합니다.
+    진행 상황은 GET /jobs/{job_id} 로 확인합니다.
+    """
+    if not collection_name.strip():
+        raise HTTPException(status_code=400, detail="collection_name을 반드시 입력해야 합니다.")
+
+    active = ingestion_jobs.find_active(file.filename)
+    if active is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"같은 파일을 처리 중인 작업이 있습니다: {active['job_id']} ({active['status']}/{active['stage']})"
+        )
+
+    file_path = file_processor.upload_dir / file.filename
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    job = ingestion_jobs.submit(str(file_path), file.filename, collection_name)
+    logger.info(f"PDF 처리 및 DB 구축 작업 접수: {job['job_id']} ({file.filename} → '{collection_name}')")
+    return IngestionJobResponse(**job)
+
+
+@router.get("/jobs", response_model=IngestionJobListResponse)
+async def list_ingestion_jobs(limit: int = 20):
+    """
+    최근 작업 목록을 조회합니다.
+    """
+    return IngestionJobListResponse(jobs=[IngestionJobResponse(**job) for job in ingestion_jobs.list(limit)])
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(job_id: str):
+    """
+    작업 상태, 단계, 진행 상황(파싱한 페이지 수, 임베딩한 청크 수), 단계별 소요 시간, 오류를 조회합니다.
+    """
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return IngestionJobResponse(**job)
+
 # 👇 [신규 추가] PDF 파일 처리만 실행하는 API
 @router.post("/process-pdf-only", response_model=FullProcessingResponse)
 async def process_pdf_only(
     file: UploadFile = File(...)
 ):
     """
-    PDF 파일을 업로드하여 4가지 보조 파일(DOCX, MD, HTML, TXT)로 변환합니다.
+    PDF 파일을 업로드하여 4가지 보조 파일(DOCX, MD, HTML, 표 행 .arrow)로 변환합니다.
     (벡터 DB 구축은 실행하지 않습니다.)
     """
     # 1. 파일 정보 로깅
@@ -92,10 +143,10 @@ async def process_pdf_only(
     try:
         # 3. 4단계 파일 처리 파이프라인 실행
         logger.info(f"🔧 4단계 파일 처리 파이프라인 시작: {file_path}")
-        docx_path, markdown_path, html_path, rag_text_path = await file_processor.process_full_pipeline(
+        docx_path, markdown_path, html_path, rag_table_path = await file_processor.process_full_pipeline(
             pdf_path=str(file_path)
         )
-        logger.info(f"✅ 4단계 파일 처리 완료. 최종 TXT: {rag_text_path}")
+        logger.info(f"✅ 4단계 파일 처리 완료. 최종 표 행 파일: {rag_table_path}")
 
         # 4. 처리 결과 반환 (벡터 DB 구축 X)
         return FullProcessingResponse(
@@ -104,7 +155,7 @@ async def process_pdf_only(
             docx_file=docx_path,
             markdown_file=markdown_path,
             html_file=html_path,
-            rag_text_file=rag_text_path
+            rag_table_file=rag_table_path
         )
     except Exception as e:
         logger.error(f"PDF 처리 중 오류 발생: {e}")
@@ -123,4 +174,80 @@ async def list_all_collections():
         return CollectionListResponse(collections=collection_names)
     except Exception as e:
         logger.error(f"컬렉션 조회 중 오류 발생: {e}")
-        raise HTTPException(status_code=500, detail=f"컬렉션 조회 중 오류 발생: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"컬렉션 조회 중 오류 발생: {e}")
+
+
+
+# --- blue/green 구축 컬렉션 별칭 조회/되돌리기 ---
+@router.get("/aliases", response_model=CollectionAliasListResponse)
+async def list_collection_aliases():
+    """
+    논리 컬렉션 이름(별칭)별로 현재 세대 컬렉션과 되돌릴 수 있는 이전 세대를 조회합니다.
+    """
+    return CollectionAliasListResponse(
+        aliases=[CollectionAliasResponse(**entry) for entry in vector_store_service.aliases.all()]
+    )
+
+
+@router.post("/aliases/{alias}/rollback", response_model=CollectionAliasResponse)
+async def rollback_collection_alias(alias: str):
+    """
+    별칭을 바로 이전 세대 컬렉션으로 되돌립니다. (다시 호출하면 되돌리기 전 세대로 돌아감)
+    """
+    try:
+        target = vector_store_service.rollback_collection(alias)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    logger.info(f"컬렉션 별칭 되돌리기: '{alias}' → '{target}'")
+    return CollectionAliasResponse(**vector_store_service.aliases.get(alias))
+
+# --- 문서 임베딩 저장소 내보내기/가져오기 (새 노드를 미리 채워 두는 용도) ---
+def _document_store():
+    if embedding_model.document_store is None:
+        raise HTTPException(status_code=400, detail="DOCUMENT_EMBEDDING_CACHE_PATH가 설정되지 않았습니다.")
+    return embedding_model.document_store
+
+
+@router.get("/embedding-cache/export")
+async def export_embedding_cache():
+    """
+    문서 임베딩 저장소(본문 해시 → 벡터) 전체를 SQLite 파일로 내려받습니다.
+    """
+    store = _document_store()
+    fd, name = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(fd)
+    export_path = Path(name)
+    # SQLite 백업은 저장소 잠금을 잡고 전체를 복사하므로 이벤트 루프 밖(스레드)에서 실행합니다.
+    try:
+        count = await asyncio.to_thread(store.export_to, str(export_path))
+    except Exception:
+        export_path.unlink(missing_ok=True)
+        raise
+    logger.info(f"문서 임베딩 저장소 내보내기: {count}개 항목")
+    return FileResponse(
+        export_path,
+        media_type="application/vnd.sqlite3",
+        filename="document_embeddings.sqlite3",
+        background=BackgroundTask(export_path.unlink, missing_ok=True)
+    )
+
+
+@router.post("/embedding-cache/import")
+async def import_embedding_cache(file: UploadFile = File(...)):
+    """
+    /embedding-cache/export 로 받은 파일을 업로드해 없는 항목만 문서 임베딩 저장소에 추가합니다.
+    """
+    store = _document_store()
+    with tempfile.NamedTemporaryFile(suffix=".sqlite3", delete=False) as buffer:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, buffer)
+        import_path = Path(buffer.name)
+    try:
+        # ATTACH + INSERT … SELECT 도 저장소 잠금을 잡으므로 스레드에서 실행합니다.
+        imported = await asyncio.to_thread(store.import_from, str(import_path))
+    except Exception as e:
+        logger.error(f"문서 임베딩 저장소 가져오기 중 오류 발생: {e}")
+        raise HTTPException(status_code=400, detail=f"임베딩 저장소 파일을 읽을 수 없습니다: {e}")
+    finally:
+        import_path.unlink(missing_ok=True)
+    logger.info(f"문서 임베딩 저장소 가져오기: {imported}개 항목 추가")
+    return {"imported": imported, **(await asyncio.to_thread(store.stats))}
@@ -1,25 +1,77 @@
 # /schemas/chat_schema.py
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Literal
 
 class ChatRequest(BaseModel):
     question: str
+    # 검색 결과 재순위 방식 (생략 시 서버 설정 RERANK_MODE 사용)
+    rerank: Optional[Literal["none", "mmr"]] = None
+    # 검색할 컬렉션 이름 또는 별칭(COLLECTION_ALIASES) 목록 (생략 시 기본 컬렉션, 여러 개면 동시 검색 후 병합)
+    collections: Optional[List[str]] = None
 
 class ChatResponse(BaseModel):
     answer: str
 
+class ChatBatchRequest(BaseModel):
+    questions: List[str]
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+    rerank: Optional[Literal["none", "mmr"]] = None
+    collections: Optional[List[str]] = None
+
+class ChatBatchItem(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+
 class FullProcessingResponse(BaseModel):
     message: str
     source_file: str
     docx_file: str
     markdown_file: str
     html_file: str
-    rag_text_file: str
+    # 표 행 파일 (열 기반 Arrow IPC, .arrow)
+    rag_table_file: str
+    # 벡터 DB 구축 시 청크 변경 내역 (added / updated / unchanged / deleted)
+    ingestion: Optional[Dict[str, int]] = None
+
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    collection_name: str
+    source_file: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    # streaming(파싱 + 임베딩) → done
+    stage: str
+    # pages_parsed, added/updated/unchanged/deleted, chunks_embedded/chunks_to_embed 등
+    progress: Dict[str, Any]
+    # 단계별 대기/실행 시간(초)
+    timings: Dict[str, float]
+    # 변환 결과 파일 경로 (docx_file, markdown_file, html_file, rag_table_file)
+    artifacts: Dict[str, str]
+    ingestion: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+class IngestionJobListResponse(BaseModel):
+    jobs: List[IngestionJobResponse]
 
 class CollectionListResponse(BaseModel):
     collections: List[str]
 
+class CollectionAliasResponse(BaseModel):
+    # 논리 컬렉션 이름 → 현재 세대 컬렉션 (history: 되돌릴 수 있는 이전 세대, 최근 것부터)
+    alias: str
+    target: str
+    history: List[str]
+    switched_at: float
+
+class CollectionAliasListResponse(BaseModel):
+    aliases: List[CollectionAliasResponse]
+
 # 👇 [신규 추가] OCR 분석 결과를 위한 데이터 모델
 # 이 부분이 파일에 누락되어 오류가 발생했습니다.
 class CreditInfo(BaseModel):
@@ -0,0 +1,128 @@
+# services/answer_cache.py
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def make_filter_key(
+    metadata_filter: Optional[dict],
+    document_filter: Optional[dict],
+    conditions: Iterable[Tuple[str, str, str]] = ()
+) -> str:
+    """
+    _parse_question_to_filter 결과와 열 조건을 비교 가능한 문자열 키로 만듭니다.
+    (contains 조건은 문서 본문 필터에 열 이름이 남지 않으므로 열 조건을 함께 넣어야 '학년':'3'과 '학점':'3'이 구분됨)
+    """
+    return json.dumps(
+        [metadata_filter, document_filter, sorted(list(condition) for condition in conditions)],
+        sort_keys=True, ensure_ascii=False
+    )
+
+
+@dataclass
+class _CollectionAnswers:
+    """한 컬렉션(특정 버전)에 대해 저장된 답변들"""
+    version: int
+    embeddings: List[np.ndarray] = field(default_factory=list)
+    filter_keys: List[str] = field(default_factory=list)
+    answers: List[str] = field(default_factory=list)
+    expires_at: List[float] = field(default_factory=list)
+    _matrix: Optional[np.ndarray] = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.vstack(self.embeddings)
+        return self._matrix
+
+    def remove(self, indexes: List[int]) -> None:
+        for i in sorted(indexes, reverse=True):
+            del self.embeddings[i], self.filter_keys[i], self.answers[i], self.expires_at[i]
+        self._matrix = None
+
+
+class SemanticAnswerCache:
+    """
+    의미 기반 답변 캐시입니다.
+    - 새 질문의 임베딩이 저장된 질문과 코사인 유사도 `threshold` 이상이고,
+      파싱된 필터(where / where_document, 열 조건)가 완전히 같을 때 저장된 답변을 반환합니다.
+    - 항목은 TTL이 지나면 만료되고, 컬렉션 버전이 바뀌면(= abuild_from_stream / abuild_from_files 실행) 통째로 폐기됩니다.
+    """
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._collections: Dict[str, _CollectionAnswers] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _entries_for(self, collection_name: str, version: int) -> _CollectionAnswers:
+        entries = self._collections.get(collection_name)
+        if entries is None or entries.version != version:
+            entries = _CollectionAnswers(version=version)
+            self._collections[collection_name] = entries
+        return entries
+
+    def lookup(self, collection_name: str, version: int, filter_key: str, embedding: List[float]) -> Optional[str]:
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._entries_for(collection_name, version)
+
+            expired = [i for i, t in enumerate(entries.expires_at) if t <= now]
+            if expired:
+                entries.remove(expired)
+
+            if entries.answers:
+                scores = entries.matrix() @ query
+                # 필터가 다른 항목은 후보에서 제외
+                mask = np.fromiter((k == filter_key for k in entries.filter_keys), dtype=bool, count=len(scores))
+                scores = np.where(mask, scores, -1.0)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return entries.answers[best]
+
+            self.misses += 1
+            return None
+
+    def store(self, collection_name: str, version: int, filter_key: str, embedding: List[float], answer: str) -> None:
+        with self._lock:
+            current = self._collections.get(collection_name)
+            if current is not None and current.version > version:
+                # 답변을 생성하는 동안 컬렉션이 다시 구축된 경우: 오래된 답변은 저장하지 않음
+                return
+            entries = self._entries_for(collection_name, version)
+            if len(entries.answers) >= self.max_entries:
+                # 가장 오래된 항목부터 제거
+                entries.remove([0])
+            entries.embeddings.append(self._normalize(embedding))
+            entries.filter_keys.append(filter_key)
+            entries.answers.append(answer)
+            entries.expires_at.append(time.time() + self.ttl_seconds)
+            entries._matrix = None
+
+    def invalidate(self, collection_name: str) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": {name: len(e.answers) for name, e in self._collections.items()},
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -1,17 +1,49 @@
 # services/chat_service.py
-import re
+import asyncio
+from logging import getLogger
+from typing import AsyncIterator, List, Optional, Tuple
+from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_teddynote import logging
 from services.vector_store_service import vector_store_service
-from models.llm_factory import llm
+from services.answer_cache import SemanticAnswerCache, make_filter_key
+from services.context_builder import BuiltContext, ContextBuilder
+from services.federated_search import cosine_scores, label_documents, merge_by_score
+from services.question_parser import ParsedQuestion, QuestionFilterParser, load_key_mapping
+from services.reranker import RERANK_MODES
+from models.llm_factory import llm_gateway, embedding_model
 from core.config import settings
+from core.request_stats import get_request_stats, record_prompt_tokens, start_request_stats
+from core.single_flight import SingleFlight
+from core.metrics import record_cache_event, record_event, record_tokens, track_stage
+from models.embedding_cache import CachedEmbeddings
+
+logger = getLogger(__name__)
+
+NO_RESULT_MESSAGE = "요청하신 조건에 맞는 과목을 찾을 수 없습니다. 조건을 다시 확인해주세요."
+
+
+class InvalidChatRequestError(ValueError):
+    """
+    요청 자체가 잘못된 경우(존재하지 않는 컬렉션, 컬렉션 수 초과, 지원하지 않는 재순위 방식 등) 발생합니다.
+    라우터에서 이 예외만 400 Bad Request로 변환합니다. (내부 처리 중 발생한 ValueError는 500)
+    """
 
 class ChatService:
     def __init__(self):
-        logging.langsmith("RAG", set_enable=True)
-        self.llm = llm
+        # FAKE(부하 테스트) 모드에서는 LangSmith 추적을 보내지 않습니다.
+        logging.langsmith("RAG", set_enable=settings.DEFAULT_MODEL != "FAKE")
+        # LLM 호출은 동시 호출 수 제한/대기열을 거칩니다. (초과 시 LLMOverloadedError → 429)
+        self.llm = llm_gateway
+        self.embedding_model = embedding_model
+        self.answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                threshold=settings.ANSWER_CACHE_SIMILARITY,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                max_entries=settings.ANSWER_CACHE_MAX_ENTRIES
+            )
         self.template = """당신은 사용자의 질문에 답하는 AI 어시스턴트인 '용용이'입니다.
 
         다음 규칙을 엄격하게 준수하세요:
@@ -28,6 +60,69 @@ class ChatService:
 
         #Answer:"""
         self.prompt = ChatPromptTemplate.from_template(self.template)
+        self.question_parser = QuestionFilterParser(
+            key_mapping=load_key_mapping(settings.QUESTION_KEY_MAPPING_PATH),
+            cache_size=settings.QUESTION_PARSER_CACHE_SIZE
+        )
+        # 진행 중인 동일 질문 요청 병합 (single-flight)
+        self.single_flight = SingleFlight() if settings.CHAT_COALESCING_ENABLED else None
+        # 검색 결과는 중복을 제거하고 토큰 예산 안에서만 #Context: 로 조립합니다.
+        self.context_builder = ContextBuilder(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            similarity_threshold=settings.CONTEXT_DEDUP_SIMILARITY
+        )
+        # 검색은 get_answer에서 한 번만 수행하고, 체인은 프롬프트 → LLM 단계만 담당합니다.
+        self.answer_chain = self.prompt | self.llm | StrOutputParser()
+
+    @staticmethod
+    def _table_rows_note(matched: int, used: int) -> str:
+        """열 기반 표 색인 조회 결과가 조건에 맞는 전체 행 중 몇 행인지 알려 주는 문맥 첫 줄"""
+        if used >= matched:
+            return f"[표 조회 결과] 조건에 맞는 행은 모두 {matched}개이며, 아래에 모두 포함되어 있습니다."
+        return (
+            f"[표 조회 결과] 조건에 맞는 행은 모두 {matched}개이지만 아래에는 그중 {used}개만 포함되어 있습니다. "
+            f"답변에 전체 {matched}개 중 일부만 안내한다는 사실을 함께 알려 주세요."
+        )
+
+    def _format_docs(
+        self,
+        docs: List[Document],
+        exact_rows: Optional[List[Document]] = None,
+        matched_rows: Optional[int] = None
+    ) -> BuiltContext:
+        """
+        검색된 문서들을 (중복 제거 + 토큰 예산 적용 후) 프롬프트의 #Context: 문맥으로 만듭니다.
+        exact_rows(표 색인에서 조건과 정확히 일치한 행)는 맨 앞에 넣고, matched_rows(조건에 맞는 전체 행 수)가
+        주어지면 실제로 넣은 행 수와 함께 문맥 첫 줄에 적어 LLM이 목록이 일부인지 알 수 있게 합니다.
+        """
+        exact_rows = exact_rows or []
+        with track_stage("chat", "context_build"):
+            if matched_rows is None:
+                built = self.context_builder.build(docs, exact_rows=exact_rows)
+            else:
+                # 안내 문장 자리를 토큰 예산에서 미리 빼 둡니다. (잘린 경우의 긴 문장 기준)
+                reserved = self.context_builder.count_tokens(
+                    self._table_rows_note(matched_rows, 0) + self.context_builder.separator
+                )
+                built = self.context_builder.build(
+                    docs, max_tokens=max(self.context_builder.max_tokens - reserved, 0), exact_rows=exact_rows
+                )
+                note = self._table_rows_note(matched_rows, built.exact_rows)
+                built.text = self.context_builder.separator.join(part for part in (note, built.text) if part)
+                built.tokens += reserved
+        logger.info(f"🧩 문맥 조립: 검색 {len(exact_rows) + len(docs)}개 → {built.summary()}")
+        if matched_rows is not None and built.exact_rows < matched_rows:
+            logger.info(f"⚠️ 조건에 맞는 표 행 {matched_rows}개 중 {built.exact_rows}개만 문맥에 포함했습니다.")
+        return built
+
+    def _build_chain_input(self, question: str, context: BuiltContext) -> dict:
+        """체인 입력을 만들고, 실제 프롬프트 토큰 수를 요청 통계에 기록합니다."""
+        prompt_tokens = self.context_builder.count_tokens(
+            self.template.format(context=context.text, question=question)
+        )
+        record_prompt_tokens(prompt_tokens)
+        record_tokens("prompt", prompt_tokens)
+        return {"context": context.text, "question": question}
 
     # ⬇️ [CPU 연산 로직] 
     # 이 함수는 I/O(네트워크/디스크) 작업이 없는 순수 문자열 연산이므로 
@@ -35,143 +130,413 @@ class ChatService:
     def _parse_question_to_filter(self, question: str) -> (dict, dict, str):
         """
         질문을 (메타데이터 필터, 문서내용 필터, 순수 검색어) 튜플로 분리합니다.
-        - 1. 'key':'value' 패턴이 없으면: 질문을 단어 단위로 쪼개 $or 필터 생성
-        - 2. 'key':'value' 패턴이 있으면: 해당 $eq, $contains 필터 생성
+        (실제 파싱은 정규식/키 매핑을 미리 준비하고 결과를 캐시하는 QuestionFilterParser가 담당)
         """
-        
-        # 1. 'key':'value' 정규식
-        pattern = re.compile(r"('|\"|`)([^'\"]+)\1\s*:\s*('|\"|`)([^'\"]+)\3")
-        matches = pattern.findall(question)
-        
-        # 2. DB 키 매핑 및 필터 전략 (공통)
-        key_mapping = {
-            "이수구분": "이수구분",
-            "학점": "학점 (인원)",
-            "강의시간": "강의시간",
-            "제목": "제목",
-            "학년": "학년",
-        }
-        metadata_keys = ["이수구분"] # $eq (메타데이터) 필터
-        document_keys = ["학점", "강의시간", "제목", "학년"] # $contains (문서 본문) 필터
-        
-        # 3. 'key':'value' 패턴(matches) 유무로 분기
-        if not matches:
-            # Case 1: 'key':'value' 패턴이 없는 일반 질문
-            
-            # 1-1. 질문을 공백 기준으로 단어로 분리
-            keywords = question.split()
-            if not keywords:
-                return None, None, question # 빈 질문
-
-            # 1-2. 각 단어를 $contains 조건으로 리스트 생성
-            document_conditions = []
-            for keyword in keywords:
-                if len(keyword) > 1: # 1글자 단어 무시
-                    document_conditions.append({"$contains": keyword})
-            
-            # 1-3. 이 조건들을 $or 로 묶음
-            final_document_filter = None
-            if len(document_conditions) == 1:
-                final_document_filter = document_conditions[0]
-            elif len(document_conditions) >= 2:
-                final_document_filter = {"$or": document_conditions}
-            
-            if final_document_filter:
-                print(f"✅ (키워드 $or 검색) 생성된 'where_document' 필터: {final_document_filter}")
-            
-            return None, final_document_filter, question
-            
-        else:
-            # Case 2: 'key':'value' 패턴이 있는 필터 질문
-            
-            metadata_conditions = []
-            document_conditions = []
-            
-            for match in matches:
-                key = match[1].strip()
-                value = match[3].strip()
-                
-                mapped_key = key_mapping.get(key)
-                if not mapped_key:
-                    print(f"⚠️ 매핑되지 않은 키 (무시): {key}")
-                    continue
-                    
-                if key in metadata_keys:
-                    metadata_conditions.append({mapped_key: {"$eq": value}})
-                elif key in document_keys:
-                    document_conditions.append({"$contains": value})
-            
-            # 4. 메타데이터 필터($eq) 생성
-            final_metadata_filter = None
-            if len(metadata_conditions) == 1:
-                final_metadata_filter = metadata_conditions[0]
-            elif len(metadata_conditions) >= 2:
-                final_metadata_filter = {"$and": metadata_conditions}
-                
-            # 5. 문서 본문 필터($contains) 생성
-            final_document_filter = None
-            if len(document_conditions) == 1:
-                final_document_filter = document_conditions[0]
-            elif len(document_conditions) >= 2:
-                final_document_filter = {"$and": document_conditions}
-                
-            # 6. 순수 검색어 추출
-            search_query = pattern.sub('', question).strip()
-            if len(search_query) < 5:
-                search_query = "과목 추천"
-            
-            print(f"✅ (Key:Value 필터 검색) 생성된 'where' 필터: {final_metadata_filter}")
-            print(f"✅ (Key:Value 필터 검색) 생성된 'where_document' 필터: {final_document_filter}")
-            print(f"✅ (Key:Value 필터 검색) 순수 검색어: {search_query}")
-            
-            if not final_metadata_filter and not final_document_filter:
-                 return None, None, search_query
-                 
-            return final_metadata_filter, final_document_filter, search_query
-    
-    # ⬇️ [비동기 적용 핵심 부분]
-    # async def로 변경하고 내부의 모든 I/O 호출을 await ... ainvoke로 변경
-    async def get_answer(self, question: str) -> str:
-        """질문에 대해 필터링된 컬렉션을 기반으로 답변을 생성합니다."""
-        
+        parsed = self.question_parser.parse(question)
+        return parsed.metadata_filter, parsed.document_filter, parsed.search_query
+
+    def _get_collection_name(self) -> str:
         collection_name = settings.DEFAULT_DB_COLLECTION_NAME
         if not collection_name:
             raise ValueError("core/config.py에 DEFAULT_DB_COLLECTION_NAME이 설정되지 않았습니다.")
+        # blue/green 구축으로 별칭이 생긴 컬렉션은 현재 세대 컬렉션을 검색합니다.
+        return vector_store_service.resolve_collection(collection_name)
 
-        # 1. 3개의 값을 반환받음
-        metadata_filter, document_filter, search_query = self._parse_question_to_filter(question)
+    def _resolve_collections(self, collections: Optional[List[str]] = None) -> List[str]:
+        """
+        요청한 컬렉션 이름/별칭(COLLECTION_ALIASES)을 실제 컬렉션 이름 목록으로 바꿉니다.
+        (blue/green 구축으로 세대가 나뉜 컬렉션은 현재 세대 이름으로 바꿈)
+        (지정하지 않으면 기본 컬렉션 하나, 존재하지 않는 컬렉션이 있으면 InvalidChatRequestError)
+        """
+        if not collections:
+            return [self._get_collection_name()]
+
+        names: List[str] = []
+        for name in collections:
+            alias = settings.COLLECTION_ALIASES.get(name)
+            if alias is None:
+                names.append(name)
+            else:
+                names.extend([alias] if isinstance(alias, str) else alias)
+        names = list(dict.fromkeys(
+            vector_store_service.resolve_collection(name.strip()) for name in names if name and name.strip()
+        ))
+        if not names:
+            return [self._get_collection_name()]
+        if len(names) > settings.FEDERATED_MAX_COLLECTIONS:
+            raise InvalidChatRequestError(f"한 번에 최대 {settings.FEDERATED_MAX_COLLECTIONS}개의 컬렉션만 검색할 수 있습니다. (요청: {names})")
+
+        existing = set(vector_store_service.list_collections())
+        missing = [name for name in names if name not in existing]
+        if missing:
+            raise InvalidChatRequestError(f"존재하지 않는 컬렉션입니다: {', '.join(missing)}")
+        return names
+
+    @staticmethod
+    def _resolve_rerank(rerank: Optional[str]) -> str:
+        """요청별 재순위 방식을 확인합니다. (지정하지 않으면 RERANK_MODE 설정값)"""
+        mode = (rerank or settings.RERANK_MODE).lower()
+        if mode not in RERANK_MODES:
+            raise InvalidChatRequestError(f"지원하지 않는 재순위 방식입니다: {rerank} (가능한 값: {', '.join(RERANK_MODES)})")
+        return mode
+
+    async def _lookup_cached_answer(
+        self,
+        collection_names: List[str],
+        question: str,
+        parsed: ParsedQuestion,
+        embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> Tuple[Optional[tuple], Optional[str]]:
+        """
+        의미 기반 답변 캐시를 조회합니다. (embedding이 주어지면 질문을 다시 임베딩하지 않음)
+        반환값: (저장 시 사용할 캐시 키, 캐시된 답변 또는 None)
+        """
+        if self.answer_cache is None:
+            return None, None
+
+        with track_stage("chat", "answer_cache"):
+            # 질문 임베딩은 검색어 임베딩 캐시를 거치므로, 일반 질문은 검색 단계에서 다시 계산되지 않습니다.
+            if embedding is None:
+                embedding = await self.embedding_model.aembed_query(question)
+            cache_key = (
+                # 여러 컬렉션을 함께 검색한 답변은 조합 단위로 저장합니다. (버전 합은 어느 한쪽이 갱신되어도 증가)
+                "+".join(collection_names),
+                sum(vector_store_service.get_collection_version(name) for name in collection_names),
+                # 재순위 방식에 따라 문맥이 달라지므로 필터 키에 함께 포함합니다.
+                make_filter_key(parsed.metadata_filter, parsed.document_filter, parsed.conditions) + f"|rerank={rerank}",
+                embedding
+            )
+            answer = self.answer_cache.lookup(*cache_key)
+        record_cache_event("answer", "miss" if answer is None else "hit")
+        return cache_key, answer
+
+    def _store_cached_answer(self, cache_key: Optional[tuple], answer: str) -> None:
+        if self.answer_cache is not None and cache_key is not None and answer:
+            self.answer_cache.store(*cache_key, answer)
 
-        # 2. 두 개의 필터를 모두 전달 (Retriever 생성 자체는 빠르므로 동기 실행)
-        retriever = vector_store_service.get_retriever(
-            collection_name, 
-            metadata_filter=metadata_filter,
-            document_filter=document_filter 
+    async def _retrieve_documents(
+        self,
+        collection_name: str,
+        parsed: ParsedQuestion,
+        query_embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> Tuple[List[Document], Optional[int]]:
+        """
+        컬렉션 하나에서 문서를 한 번만 조회합니다. (query_embedding이 주어지면 검색어를 다시 임베딩하지 않음)
+        반환값: (문서 목록, 열 기반 표 색인에서 찾은 경우 조건에 맞는 전체 행 수 / 벡터 검색이면 None)
+        """
+        # 'key':'value' 질문은 열 기반 표 색인에서 조건에 맞는 행을 직접 찾습니다.
+        # (벡터 검색 top-k에 의존하지 않으므로 조건에 맞는 행을 놓치지 않음, LLM은 답변 문장만 구성)
+        if parsed.conditions:
+            with track_stage("chat", "course_table"):
+                # 표 색인 로딩(pickle)과 pandas/NumPy 조건 평가는 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+                rows = await asyncio.to_thread(
+                    vector_store_service.course_table.query,
+                    collection_name, list(parsed.conditions), limit=settings.COURSE_TABLE_MAX_ROWS
+                )
+            if rows is not None:
+                rows, matched = rows
+                logger.info(
+                    f"🔎 열 기반 표 색인 조회 ({collection_name}): 조건 {parsed.conditions} → {matched}행 중 {len(rows)}행"
+                )
+                return rows, matched
+
+        # 이전에는 빈 결과 확인용 조회 + 체인 내부 조회로 검색/임베딩이 2번씩 발생했습니다.
+        if parsed.has_filters:
+            with track_stage("chat", "vector_search"):
+                docs = await vector_store_service.asearch(
+                    collection_name,
+                    parsed.search_query,
+                    metadata_filter=parsed.metadata_filter,
+                    document_filter=parsed.document_filter,
+                    query_embedding=query_embedding,
+                    rerank=rerank
+                )
+        else:
+            # 일반 질문: 벡터 검색 + BM25 키워드 검색을 RRF로 결합
+            with track_stage("chat", "hybrid_search"):
+                docs = await vector_store_service.ahybrid_search(
+                    collection_name, parsed.search_query, query_embedding=query_embedding, rerank=rerank
+                )
+        return docs, None
+
+    async def _federated_search(
+        self,
+        collection_names: List[str],
+        parsed: ParsedQuestion,
+        query_embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> Tuple[List[Document], List[Document], Optional[int]]:
+        """
+        여러 컬렉션(학기 비교, 강의 시간표 + 학칙 등)을 asyncio.gather로 동시에 검색합니다.
+        전체 지연 시간은 컬렉션별 검색 시간의 합이 아니라 가장 느린 검색 하나에 가깝습니다.
+        - 표 색인에서 정확히 일치한 행은 모두 포함하고,
+        - 나머지 검색 결과는 컬렉션별 할당량(FEDERATED_COLLECTION_QUOTA)을 지키며 점수 순으로 합칩니다.
+        반환값: (정확히 일치한 표 행, 점수 순으로 합친 검색 결과, 조건에 맞는 전체 표 행 수 / 표 조회가 없으면 None)
+        """
+        # 검색어 임베딩은 한 번만 계산해 모든 컬렉션 검색에 재사용합니다.
+        if query_embedding is None:
+            query_embedding = await self.embedding_model.aembed_query(parsed.search_query)
+
+        with track_stage("chat", "federated_search"):
+            results = await asyncio.gather(*(
+                self._retrieve_documents(name, parsed, query_embedding=query_embedding, rerank=rerank)
+                for name in collection_names
+            ))
+
+        exact_rows: List[Document] = []
+        matched_rows: Optional[int] = None
+        searched: List[Tuple[str, List[Document]]] = []
+        for name, (docs, matched) in zip(collection_names, results):
+            if matched is not None:
+                exact_rows.extend(label_documents(name, docs))
+                matched_rows = (matched_rows or 0) + matched
+            else:
+                searched.append((name, docs))
+        # 컬렉션마다 검색 방식(하이브리드/필터/MMR)이 달라도 비교할 수 있도록 검색어와의 코사인 유사도로 합칩니다.
+        scores = await asyncio.gather(*(
+            self._relevance_scores(name, docs, query_embedding) for name, docs in searched
+        ))
+        ranked = [
+            (name, label_documents(name, docs), doc_scores)
+            for (name, docs), doc_scores in zip(searched, scores)
+        ]
+        merged = merge_by_score(
+            ranked,
+            top_k=settings.FEDERATED_TOP_K,
+            per_collection_quota=settings.FEDERATED_COLLECTION_QUOTA or None
         )
-        
-        # 3. ✨ [수정됨] 순수 검색어로 문서 조회 (비동기 처리)
-        #    retriever.invoke() -> await retriever.ainvoke()
-        #    벡터 DB 검색 시간 동안 서버가 멈추지 않게 함
-        docs = await retriever.ainvoke(search_query) 
-        
+        counts = ", ".join(f"{name} {len(docs)}개" for name, (docs, _) in zip(collection_names, results))
+        logger.info(f"🌐 컬렉션 {len(collection_names)}개 동시 검색: {counts} → {len(exact_rows) + len(merged)}개")
+        return exact_rows, merged, matched_rows
+
+    async def _relevance_scores(
+        self,
+        collection_name: str,
+        docs: List[Document],
+        query_embedding: List[float]
+    ) -> List[float]:
+        """
+        검색 결과 문서와 검색어 임베딩의 코사인 유사도입니다.
+        벡터 저장소에 저장된 임베딩을 ID로 가져오고, 없으면 본문을 임베딩합니다. (문서 임베딩 캐시 사용)
+        """
         if not docs:
-            return "요청하신 조건에 맞는 과목을 찾을 수 없습니다. 조건을 다시 확인해주세요."
-        
-        # 4. Chain 정의
-        #    (여기서 retriever는 나중에 chain.ainvoke() 될 때 내부적으로 비동기 실행됨)
-        chain = (
-            {
-                "context": (lambda x: search_query) | retriever, 
-                "question": RunnablePassthrough() 
-            }
-            | self.prompt
-            | self.llm
-            | StrOutputParser()
+            return []
+        stored = await asyncio.to_thread(
+            vector_store_service.stored_embeddings, collection_name, [doc.id for doc in docs if doc.id]
         )
-        
-        # 5. ✨ [수정됨] Chain 실행 (비동기 처리)
-        #    chain.invoke() -> await chain.ainvoke()
+        missing = list(dict.fromkeys(doc.page_content for doc in docs if doc.id not in stored))
+        computed = dict(zip(missing, await self.embedding_model.aembed_documents(missing))) if missing else {}
+        embeddings = [stored[doc.id] if doc.id in stored else computed[doc.page_content] for doc in docs]
+        return cosine_scores(query_embedding, embeddings).tolist()
+
+    async def _retrieve_context(
+        self,
+        collection_names: List[str],
+        parsed: ParsedQuestion,
+        query_embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> Optional[BuiltContext]:
+        """
+        컬렉션(들)에서 문서를 조회하고, 프롬프트에 넣을 #Context: 문맥을 반환합니다. (결과가 없으면 None)
+        """
+        if len(collection_names) == 1:
+            docs, matched_rows = await self._retrieve_documents(
+                collection_names[0], parsed, query_embedding=query_embedding, rerank=rerank
+            )
+            exact_rows, docs = (docs, []) if matched_rows is not None else ([], docs)
+        else:
+            exact_rows, docs, matched_rows = await self._federated_search(
+                collection_names, parsed, query_embedding=query_embedding, rerank=rerank
+            )
+        if not exact_rows and not docs:
+            return None
+        context = self._format_docs(docs, exact_rows=exact_rows, matched_rows=matched_rows)
+        return context if context.documents else None
+
+    # ⬇️ [비동기 적용 핵심 부분]
+    # async def로 변경하고 내부의 모든 I/O 호출을 await ... ainvoke로 변경
+    async def get_answer(
+        self,
+        question: str,
+        rerank: Optional[str] = None,
+        collections: Optional[List[str]] = None
+    ) -> str:
+        """
+        질문에 대해 필터링된 컬렉션을 기반으로 답변을 생성합니다. (rerank: "none" | "mmr")
+        collections에 컬렉션 이름/별칭을 여러 개 주면 모두 동시에 검색해 합친 문맥으로 답변합니다.
+        """
+        stats = start_request_stats()
+        collection_names = self._resolve_collections(collections)
+        rerank = self._resolve_rerank(rerank)
+        if self.single_flight is None:
+            with track_stage("chat", "total"):
+                return await self._generate_answer(question, collection_names, rerank)
+
+        # 공지 직후처럼 같은 질문이 동시에 몰리면, 검색/LLM 호출은 한 번만 하고 결과를 함께 받습니다.
+        key = (tuple(collection_names), CachedEmbeddings.normalize(question), rerank)
+        with track_stage("chat", "total"):
+            answer, shared = await self.single_flight.do(
+                key, lambda: self._generate_answer(question, collection_names, rerank)
+            )
+        record_event("coalescing", "coalesced" if shared else "leader")
+        if shared:
+            logger.info(f"📊 요청 통계: {stats.summary()} (진행 중인 동일 질문 요청에 병합됨)")
+        return answer
+
+    async def _generate_answer(self, question: str, collection_names: List[str], rerank: str) -> str:
+        """get_answer의 실제 처리 경로입니다. (동일 질문 병합 시 한 번만 실행)"""
+        stats = get_request_stats()
+
+        # 1. 질문을 필터/검색어/열 조건으로 파싱 (캐시됨)
+        with track_stage("chat", "parse"):
+            parsed = self.question_parser.parse(question)
+
+        # 2. 비슷한 질문 + 같은 필터로 이미 생성된 답변이 있으면 바로 반환
+        cache_key, cached_answer = await self._lookup_cached_answer(
+            collection_names, question, parsed, rerank=rerank
+        )
+        if cached_answer is not None:
+            logger.info(f"📊 요청 통계: {stats.summary()} (답변 캐시 적중)")
+            return cached_answer
+
+        # 3. 순수 검색어로 문서를 한 번만 조회 (비동기 처리)
+        context = await self._retrieve_context(collection_names, parsed, rerank=rerank)
+        if context is None:
+            logger.info(f"📊 요청 통계: {stats.summary()} (검색 결과 없음)")
+            return NO_RESULT_MESSAGE
+
+        # 4. 조회한 문서를 그대로 포맷해 프롬프트 → LLM 단계로 전달
         #    LLM 답변 생성 시간(수 초) 동안 다른 요청 처리가 가능해짐
-        response = await chain.ainvoke(question)
+        chain_input = self._build_chain_input(question, context)
+        with track_stage("chat", "llm"):
+            response = await self.answer_chain.ainvoke(chain_input)
+        record_tokens("completion", self.context_builder.count_tokens(response))
+        self._store_cached_answer(cache_key, response)
+        logger.info(f"📊 요청 통계: {stats.summary()}")
         return response
 
+    async def stream_answer(
+        self,
+        question: str,
+        rerank: Optional[str] = None,
+        collections: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        get_answer와 같은 검색 경로를 사용하되, LLM이 토큰을 내보내는 즉시
+        답변 조각(chunk)을 하나씩 yield 합니다. (chain.astream 기반)
+        """
+        stats = start_request_stats()
+        collection_names = self._resolve_collections(collections)
+        rerank = self._resolve_rerank(rerank)
+        with track_stage("chat_stream", "parse"):
+            parsed = self.question_parser.parse(question)
+
+        cache_key, cached_answer = await self._lookup_cached_answer(
+            collection_names, question, parsed, rerank=rerank
+        )
+        if cached_answer is not None:
+            logger.info(f"📊 요청 통계: {stats.summary()} (답변 캐시 적중)")
+            yield cached_answer
+            return
+
+        context = await self._retrieve_context(collection_names, parsed, rerank=rerank)
+        if context is None:
+            logger.info(f"📊 요청 통계: {stats.summary()} (검색 결과 없음)")
+            yield NO_RESULT_MESSAGE
+            return
+
+        chunks = []
+        # 스트리밍 LLM 단계는 첫 토큰부터 마지막 토큰까지의 시간을 기록합니다.
+        with track_stage("chat_stream", "llm"):
+            async for chunk in self.answer_chain.astream(self._build_chain_input(question, context)):
+                if chunk:
+                    chunks.append(chunk)
+                    yield chunk
+        answer = "".join(chunks)
+        record_tokens("completion", self.context_builder.count_tokens(answer))
+        self._store_cached_answer(cache_key, answer)
+        logger.info(f"📊 요청 통계: {stats.summary()}")
+
+    async def get_answers_batch(
+        self,
+        questions: List[str],
+        max_concurrency: Optional[int] = None,
+        rerank: Optional[str] = None,
+        collections: Optional[List[str]] = None
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        여러 질문에 대한 답변을 한 번에 생성합니다. (FAQ 사전 생성 등)
+        1. 모든 질문/검색어를 embed_documents 한 번으로 임베딩 (캐시된 검색어 제외)
+        2. 검색은 동시에 실행
+        3. LLM 호출은 chain.abatch로 max_concurrency 만큼만 동시에 실행
+        반환값: 입력 순서대로 (답변, 오류 메시지) 튜플 리스트
+        """
+        stats = start_request_stats()
+        collection_names = self._resolve_collections(collections)
+        max_concurrency = max_concurrency or settings.CHAT_BATCH_MAX_CONCURRENCY
+        rerank = self._resolve_rerank(rerank)
+
+        results: List[Tuple[Optional[str], Optional[str]]] = [(None, None)] * len(questions)
+        parsed_list = [self.question_parser.parse(question) for question in questions]
+
+        # 1. 질문(답변 캐시용) + 순수 검색어(검색용)를 중복 없이 한 번에 임베딩
+        texts = list(dict.fromkeys(
+            [question for question in questions] + [parsed.search_query for parsed in parsed_list]
+        ))
+        vectors = dict(zip(texts, await self.embedding_model.aembed_queries(texts)))
+
+        # 2. 답변 캐시 확인 후, 남은 질문들의 검색을 동시에 실행
+        cache_keys: List[Optional[tuple]] = [None] * len(questions)
+        pending: List[int] = []
+        for i, (question, parsed) in enumerate(zip(questions, parsed_list)):
+            cache_key, cached_answer = await self._lookup_cached_answer(
+                collection_names, question, parsed, embedding=vectors[question], rerank=rerank
+            )
+            cache_keys[i] = cache_key
+            if cached_answer is not None:
+                results[i] = (cached_answer, None)
+            else:
+                pending.append(i)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def retrieve(i: int) -> Optional[BuiltContext]:
+            async with semaphore:
+                parsed = parsed_list[i]
+                return await self._retrieve_context(
+                    collection_names, parsed, query_embedding=vectors[parsed.search_query], rerank=rerank
+                )
+
+        contexts = await asyncio.gather(*(retrieve(i) for i in pending), return_exceptions=True)
+
+        # 3. 문맥이 있는 질문만 모아 LLM 일괄 호출
+        llm_indexes: List[int] = []
+        llm_inputs: List[dict] = []
+        for i, context in zip(pending, contexts):
+            if isinstance(context, Exception):
+                results[i] = (None, f"검색 중 오류 발생: {context}")
+            elif context is None:
+                results[i] = (NO_RESULT_MESSAGE, None)
+            else:
+                llm_indexes.append(i)
+                llm_inputs.append(self._build_chain_input(questions[i], context))
+
+        if llm_inputs:
+            answers = await self.answer_chain.abatch(
+                llm_inputs,
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            )
+            for i, answer in zip(llm_indexes, answers):
+                if isinstance(answer, Exception):
+                    results[i] = (None, f"답변 생성 중 오류 발생: {answer}")
+                else:
+                    results[i] = (answer, None)
+                    self._store_cached_answer(cache_keys[i], answer)
+
+        logger.info(f"📊 일괄 요청 통계 ({len(questions)}건): {stats.summary()}")
+        return results
+
 chat_service = ChatService()
\ No newline at end of file
@@ -0,0 +1,56 @@
+# services/chroma_registry.py
+
+import threading
+from typing import Dict, List, Optional
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+
+class ChromaRegistry:
+    """
+    프로세스 전체에서 공유하는 Chroma 클라이언트/컬렉션 핸들 레지스트리입니다.
+    - PersistentClient는 처음 필요할 때 한 번만 생성합니다.
+    - 컬렉션 이름별 langchain_chroma.Chroma 객체를 캐시해 요청마다 다시 만들지 않습니다.
+    - 벡터 DB 구축(executor 스레드)과 채팅 요청이 동시에 접근하므로 락으로 보호합니다.
+    """
+    def __init__(self, db_path: str, embedding_function: Embeddings):
+        self.db_path = db_path
+        self.embedding_function = embedding_function
+        self._client: Optional[chromadb.api.ClientAPI] = None
+        self._stores: Dict[str, Chroma] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def client(self) -> "chromadb.api.ClientAPI":
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = chromadb.PersistentClient(path=self.db_path)
+        return self._client
+
+    def get(self, collection_name: str) -> Chroma:
+        """컬렉션 핸들을 반환합니다. (없으면 생성 후 캐시)"""
+        store = self._stores.get(collection_name)
+        if store is not None:
+            return store
+        with self._lock:
+            store = self._stores.get(collection_name)
+            if store is None:
+                store = Chroma(
+                    client=self.client,
+                    collection_name=collection_name,
+                    embedding_function=self.embedding_function
+                )
+                self._stores[collection_name] = store
+            return store
+
+    def refresh(self, collection_name: str) -> None:
+        """컬렉션이 다시 구축/삭제된 경우 캐시된 핸들을 버려 다음 요청에서 새로 엽니다."""
+        with self._lock:
+            self._stores.pop(collection_name, None)
+
+    def list_collection_names(self) -> List[str]:
+        collections = self.client.list_collections()
+        return [col.name for col in collections] if collections else []
@@ -0,0 +1,103 @@
+# services/collection_alias_service.py
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# blue/green 구축으로 만든 컬렉션 세대 이름: "{별칭}--g{YYYYmmddHHMMSS}" (같은 초에 겹치면 "-2", "-3" …)
+_GENERATION_SUFFIX = re.compile(r"--g\d{14}(-\d+)?$")
+
+
+def generation_base(collection_name: str) -> str:
+    """세대 컬렉션 이름에서 별칭(논리 컬렉션 이름)을 돌려줍니다. (세대 이름이 아니면 그대로)"""
+    return _GENERATION_SUFFIX.sub("", collection_name)
+
+
+class CollectionAliasService:
+    """
+    논리 컬렉션 이름(별칭, 예: "2025-2") → 실제로 검색할 컬렉션 세대를 가리키는 별칭 표입니다.
+    `{INDEX_PATH}/aliases.json` 에 `{별칭: {"target", "history", "switched_at"}}` 형태로 저장됩니다.
+    - 검색 요청은 메모리에 올려 둔 표만 읽고, 전환은 새 표를 파일에 쓴 뒤 통째로 바꿔 끼우므로
+      요청은 항상 전환 전이나 전환 후 세대 중 하나만 봅니다.
+    - history에는 이전 세대가 최근 것부터 남아 있어 바로 되돌릴 수 있습니다.
+    """
+    def __init__(self, index_dir: str):
+        self.path = Path(index_dir) / "aliases.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._aliases: Dict[str, Dict[str, Any]] = (
+            json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        )
+
+    def resolve(self, name: str) -> str:
+        """별칭이면 현재 세대 컬렉션 이름, 아니면 이름 그대로 돌려줍니다."""
+        entry = self._aliases.get(name)
+        return entry["target"] if entry else name
+
+    def get(self, alias: str) -> Optional[Dict[str, Any]]:
+        entry = self._aliases.get(alias)
+        return {"alias": alias, **entry} if entry else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        return [{"alias": alias, **entry} for alias, entry in sorted(self._aliases.items())]
+
+    def new_generation(self, alias: str, existing: List[str]) -> str:
+        """새 세대 컬렉션 이름을 만듭니다. (existing에 있는 이름과 겹치지 않게)"""
+        name = f"{alias}--g{time.strftime('%Y%m%d%H%M%S')}"
+        candidate, n = name, 1
+        while candidate in existing:
+            n += 1
+            candidate = f"{name}-{n}"
+        return candidate
+
+    def _save(self, aliases: Dict[str, Dict[str, Any]]) -> None:
+        """self._lock 안에서 새 표를 파일에 쓴 뒤 메모리의 표를 교체합니다."""
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(aliases, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp_path.replace(self.path)
+        self._aliases = aliases
+
+    def switch(self, alias: str, target: str, keep_previous: bool = True) -> Optional[str]:
+        """
+        별칭이 target을 가리키게 바꾸고 이전 대상을 돌려줍니다.
+        이전 대상은 history 맨 앞에 기록합니다. (처음 전환할 때는 별칭과 같은 이름의 기존 컬렉션,
+        keep_previous=False면 기록하지 않음 — 이전 대상 컬렉션이 실제로 없을 때)
+        """
+        with self._lock:
+            entry = self._aliases.get(alias)
+            previous = entry["target"] if entry else alias
+            history = [name for name in (entry["history"] if entry else []) if name != target]
+            if keep_previous and previous != target:
+                history.insert(0, previous)
+            aliases = dict(self._aliases)
+            aliases[alias] = {"target": target, "history": history, "switched_at": time.time()}
+            self._save(aliases)
+        return previous if previous != target else None
+
+    def rollback(self, alias: str) -> str:
+        """별칭을 바로 이전 세대로 되돌리고 그 이름을 돌려줍니다. (되돌린 세대는 다시 history 맨 앞으로)"""
+        entry = self._aliases.get(alias)
+        if not entry or not entry["history"]:
+            raise ValueError(f"'{alias}' 별칭에 되돌릴 이전 세대가 없습니다.")
+        target = entry["history"][0]
+        self.switch(alias, target)
+        return target
+
+    def retire(self, alias: str, keep: int) -> List[str]:
+        """
+        history에서 최근 keep개만 남기고 나머지 세대를 빼서 돌려줍니다. (호출한 쪽에서 컬렉션 삭제)
+        다른 별칭이 가리키고 있는 컬렉션은 돌려주지 않습니다.
+        """
+        with self._lock:
+            entry = self._aliases.get(alias)
+            if not entry or len(entry["history"]) <= keep:
+                return []
+            retired = entry["history"][keep:]
+            aliases = dict(self._aliases)
+            aliases[alias] = {**entry, "history": entry["history"][:keep]}
+            self._save(aliases)
+            in_use = {other["target"] for other in aliases.values()}
+        return [name for name in retired if name not in in_use]
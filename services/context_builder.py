@@ -0,0 +1,155 @@
+# services/context_builder.py
+
+import hashlib
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import FrozenSet, List, Optional, Sequence
+
+import tiktoken
+from langchain_core.documents import Document
+
+
+@dataclass
+class BuiltContext:
+    """프롬프트의 #Context: 에 들어갈 문자열과 조립 과정의 집계 결과입니다."""
+    text: str
+    documents: List[Document] = field(default_factory=list)
+    tokens: int = 0
+    dropped_duplicates: int = 0
+    dropped_over_budget: int = 0
+    # documents 중 맨 앞에 넣은 exact_rows(조건과 정확히 일치한 표 행) 수
+    exact_rows: int = 0
+
+    def summary(self) -> str:
+        exact = f", 정확히 일치한 표 행 {self.exact_rows}개 포함" if self.exact_rows else ""
+        return (
+            f"문서 {len(self.documents)}개{exact}, 문맥 {self.tokens} 토큰 "
+            f"(중복 제거 {self.dropped_duplicates}개, 예산 초과 제외 {self.dropped_over_budget}개)"
+        )
+
+
+class ContextBuilder:
+    """
+    검색 결과(순위순)를 토큰 예산 안에서 프롬프트 문맥으로 조립합니다.
+    1. 완전 중복 제거: 정규화한 본문의 해시가 같은 문서
+    2. 유사 중복 제거: 문자 n-gram(shingle) 집합의 Jaccard 유사도가 임계값 이상인 문서
+    3. 남은 문서를 순위가 높은 것부터 토큰 예산(max_tokens)이 허락하는 만큼 채움
+    토큰 수는 LLM과 같은 tiktoken 인코딩으로 계산합니다.
+    """
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        similarity_threshold: float = 0.9,
+        shingle_size: int = 4,
+        encoding_name: str = "o200k_base",
+        separator: str = "\n\n"
+    ):
+        self.max_tokens = max_tokens
+        self.similarity_threshold = similarity_threshold
+        self.shingle_size = shingle_size
+        self.encoding_name = encoding_name
+        self.separator = separator
+        self._encoding: Optional[tiktoken.Encoding] = None
+        self._encoding_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self) -> Optional[tiktoken.Encoding]:
+        # 인코딩 파일은 처음 사용할 때 한 번만 불러옵니다. (오프라인 등으로 실패하면 근사치 사용)
+        if self._encoding is None and not self._encoding_failed:
+            with self._lock:
+                if self._encoding is None and not self._encoding_failed:
+                    try:
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        self._encoding_failed = True
+                        print(f"⚠️ tiktoken 인코딩 '{self.encoding_name}' 로딩 실패, 글자 수 기반 근사치를 사용합니다: {e}")
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        encoding = self.encoding
+        if encoding is None:
+            # 한국어는 대략 글자 2개당 1토큰
+            return (len(text) + 1) // 2
+        return len(encoding.encode(text, disallowed_special=()))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def _shingles(self, text: str) -> FrozenSet[int]:
+        n = self.shingle_size
+        if len(text) <= n:
+            return frozenset((hash(text),))
+        return frozenset(hash(text[i:i + n]) for i in range(len(text) - n + 1))
+
+    @staticmethod
+    def _jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def deduplicate(self, docs: List[Document], exact_rows: Sequence[Document] = ()) -> List[Document]:
+        """
+        순위를 유지한 채 완전 중복/유사 중복 문서를 제거합니다. (앞선 문서를 남김)
+        exact_rows는 docs보다 앞에 두고 본문이 완전히 같은 행만 제거합니다.
+        (조건과 정확히 일치한 표 행은 분반/강의시간만 달라 비슷해 보여도 서로 다른 행)
+        """
+        seen_hashes = set()
+        kept: List[Document] = []
+        kept_shingles: List[FrozenSet[int]] = []
+        exact_ids = {id(doc) for doc in exact_rows}
+        for doc in chain(exact_rows, docs):
+            normalized = self._normalize(doc.page_content)
+            if not normalized:
+                continue
+            digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+            if digest in seen_hashes:
+                continue
+            shingles = self._shingles(normalized)
+            if id(doc) not in exact_ids and any(
+                self._jaccard(shingles, other) >= self.similarity_threshold for other in kept_shingles
+            ):
+                continue
+            seen_hashes.add(digest)
+            kept.append(doc)
+            kept_shingles.append(shingles)
+        return kept
+
+    def build(
+        self,
+        docs: List[Document],
+        max_tokens: Optional[int] = None,
+        exact_rows: Sequence[Document] = ()
+    ) -> BuiltContext:
+        """
+        문서들을 중복 제거 후 토큰 예산 안에서 이어 붙입니다.
+        exact_rows는 맨 앞에서 먼저 예산을 채우고, 실제로 들어간 수를 BuiltContext.exact_rows로 돌려줍니다.
+        """
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        unique_docs = self.deduplicate(docs, exact_rows)
+        exact_ids = {id(doc) for doc in exact_rows}
+        separator_tokens = self.count_tokens(self.separator)
+
+        selected: List[Document] = []
+        used = 0
+        for doc in unique_docs:
+            cost = self.count_tokens(doc.page_content) + (separator_tokens if selected else 0)
+            if used + cost > budget:
+                # 긴 문서 하나 때문에 뒤의 짧은 문서까지 버리지 않도록 건너뛰고 계속 채웁니다.
+                continue
+            selected.append(doc)
+            used += cost
+
+        return BuiltContext(
+            text=self.separator.join(doc.page_content for doc in selected),
+            documents=selected,
+            tokens=used,
+            dropped_duplicates=len(docs) + len(exact_rows) - len(unique_docs),
+            dropped_over_budget=len(unique_docs) - len(selected),
+            exact_rows=sum(id(doc) in exact_ids for doc in selected),
+        )
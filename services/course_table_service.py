@@ -0,0 +1,224 @@
+# services/course_table_service.py
+
+import json
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+from services.table_artifact import TABLE_ROW_TYPE
+
+# 열 조건: (열 이름, 연산자("eq" | "contains"), 값)
+ColumnCondition = Tuple[str, str, str]
+
+_CONTENT_COLUMN = "__page_content__"
+_ID_COLUMN = "__id__"
+_RESERVED_COLUMNS = (_CONTENT_COLUMN, _ID_COLUMN)
+_json_decoder = json.JSONDecoder()
+
+
+def parse_table_row(line: str) -> Tuple[Dict, Dict[str, str]]:
+    """
+    [이전 형식] RAG-TXT 한 줄(`{json-metadata} 제목: ..., 열: 값, ...`)을
+    (JSON 메타데이터, 열 → 값 딕셔너리) 로 분리합니다.
+    """
+    line = line.strip()
+    meta: Dict = {}
+    body = line
+    if line.startswith("{"):
+        try:
+            meta, end = _json_decoder.raw_decode(line)
+            body = line[end:].strip()
+        except ValueError:
+            meta = {}
+    row: Dict[str, str] = {}
+    for part in body.split(", "):
+        if ": " in part:
+            key, value = part.split(": ", 1)
+            row[key.strip()] = value.strip()
+    return meta, row
+
+
+class _CourseTable:
+    """
+    컬렉션 하나의 표 행들을 열 단위로 보관합니다.
+    모든 열은 사전 인코딩(pandas Categorical)되어 있어, 조건은 고유값(categories)에만 평가한 뒤
+    코드 배열(codes)에 대한 NumPy 연산으로 행 위치를 구합니다.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._codes: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, pd.Index] = {}
+        for column in df.columns:
+            if column in _RESERVED_COLUMNS:
+                continue
+            self._codes[column] = df[column].cat.codes.to_numpy()
+            self._categories[column] = df[column].cat.categories.astype(str)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def has_columns(self, columns: Iterable[str]) -> bool:
+        return all(column in self._codes for column in columns)
+
+    def match(self, conditions: List[ColumnCondition]) -> np.ndarray:
+        """모든 조건을 만족하는 행 위치 배열을 반환합니다. (조건 간 AND)"""
+        mask = np.ones(len(self.df), dtype=bool)
+        for column, op, value in conditions:
+            if column not in self._codes:
+                return np.array([], dtype=np.int64)
+            categories = self._categories[column]
+            if op == "eq":
+                hit_codes = np.flatnonzero(categories == value)
+            else:
+                hit_codes = np.flatnonzero(categories.str.contains(value, regex=False))
+            mask &= np.isin(self._codes[column], hit_codes)
+        return np.flatnonzero(mask)
+
+    def documents(self, positions: np.ndarray) -> List[Document]:
+        rows = self.df.iloc[positions]
+        ids = rows[_ID_COLUMN] if _ID_COLUMN in rows.columns else [None] * len(rows)
+        metadata_rows = rows.drop(columns=[c for c in _RESERVED_COLUMNS if c in rows.columns])
+        documents = []
+        for content, doc_id, (_, row) in zip(rows[_CONTENT_COLUMN], ids, metadata_rows.iterrows()):
+            metadata = {k: str(v) for k, v in row.items() if pd.notna(v)}
+            documents.append(Document(page_content=content, metadata=metadata, id=doc_id if pd.notna(doc_id) else None))
+        return documents
+
+
+class CourseTableService:
+    """
+    표 행(이수구분, 학년, 학점 (인원), 강의시간, 제목 ...)을 위한 열 기반 정형 조회 엔진입니다.
+    벡터 DB 구축 시 함께 만들어지고 `{INDEX_PATH}/tables/{컬렉션}.pkl` 로 저장됩니다.
+    'key':'value' 질문은 유사도 검색(top-k) 대신 이 색인으로 조건에 맞는 행을 빠짐없이 찾습니다.
+    """
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir) / "tables"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._tables: Dict[str, _CourseTable] = {}
+        self._lock = threading.Lock()
+
+    def _table_path(self, collection_name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", collection_name)
+        return self.index_dir / f"{safe_name}.pkl"
+
+    def has_table(self, collection_name: str) -> bool:
+        return collection_name in self._tables or self._table_path(collection_name).exists()
+
+    def _load(self, collection_name: str) -> Optional[_CourseTable]:
+        table = self._tables.get(collection_name)
+        if table is not None:
+            return table
+        path = self._table_path(collection_name)
+        if not path.exists():
+            return None
+        table = _CourseTable(pd.read_pickle(path))
+        self._tables[collection_name] = table
+        return table
+
+    @staticmethod
+    def _to_frame(documents: List[Document]) -> pd.DataFrame:
+        records = []
+        for doc in documents:
+            line = doc.page_content
+            if doc.metadata.get("type") == TABLE_ROW_TYPE:
+                # .arrow 표 파일에서 온 행은 열이 메타데이터에 그대로 있으므로 문장을 다시 파싱하지 않습니다.
+                row = {key: value for key, value in doc.metadata.items() if key != "type"}
+            else:
+                meta, row = parse_table_row(line)
+                if meta.get("type", TABLE_ROW_TYPE) != TABLE_ROW_TYPE or not row:
+                    continue
+                row = {"source": meta.get("source"), "page": meta.get("page"), **row}
+            record = dict(row)
+            record[_CONTENT_COLUMN] = line.strip()
+            record[_ID_COLUMN] = doc.id
+            records.append(record)
+        df = pd.DataFrame.from_records(records)
+        for column in df.columns:
+            if column in _RESERVED_COLUMNS:
+                continue
+            df[column] = df[column].map(lambda v: None if pd.isna(v) else str(v).strip()).astype("category")
+        return df
+
+    def add_documents(self, collection_name: str, documents: Iterable[Document], replace: bool = False) -> int:
+        """
+        표 행 문서(표 행 하나 = Document 하나)를 컬렉션 테이블에 추가하고 저장합니다.
+        """
+        documents = list(documents)
+        with self._lock:
+            existing = None if replace else self._load(collection_name)
+            new_df = self._to_frame(documents)
+            if existing is not None and not new_df.empty:
+                # 열 집합이 다른 표들도 하나의 테이블로 합칩니다. (없는 열은 NaN)
+                df = pd.concat([existing.df.astype("object"), new_df.astype("object")], ignore_index=True)
+                df = df.apply(lambda col: col if col.name in _RESERVED_COLUMNS else col.astype("category"))
+            else:
+                df = new_df if existing is None else existing.df
+            df.to_pickle(self._table_path(collection_name))
+            table = _CourseTable(df)
+            self._tables[collection_name] = table
+        print(f"✅ 컬렉션 '{collection_name}' 열 기반 표 색인 갱신 완료 (총 {len(table)}행, 열 {len(table._codes)}개)")
+        return len(table)
+
+    def remove_documents(self, collection_name: str, ids: Iterable[str]) -> int:
+        """해당 ID(Document.id)의 표 행을 지우고 저장합니다. (ID 없이 구축된 이전 행은 그대로 둠)"""
+        removed = set(ids)
+        with self._lock:
+            existing = self._load(collection_name)
+            if existing is None or not removed or _ID_COLUMN not in existing.df.columns:
+                return 0
+            df = existing.df[~existing.df[_ID_COLUMN].isin(removed)].reset_index(drop=True)
+            if len(df) == len(existing.df):
+                return 0
+            df = df.apply(lambda col: col if col.name in _RESERVED_COLUMNS else col.cat.remove_unused_categories())
+            df.to_pickle(self._table_path(collection_name))
+            self._tables[collection_name] = _CourseTable(df)
+        return len(existing.df) - len(df)
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._tables.pop(collection_name, None)
+            self._table_path(collection_name).unlink(missing_ok=True)
+
+    def copy(self, source_collection: str, target_collection: str) -> bool:
+        """열 기반 표 색인을 다른 컬렉션 이름으로 복사합니다. (blue/green 구축용, 원본이 없으면 False)"""
+        source_path = self._table_path(source_collection)
+        if not source_path.exists():
+            return False
+        with self._lock:
+            target_path = self._table_path(target_collection)
+            tmp_path = target_path.with_suffix(".tmp")
+            shutil.copyfile(source_path, tmp_path)
+            tmp_path.replace(target_path)
+            self._tables.pop(target_collection, None)
+        return True
+
+    def query(
+        self, collection_name: str, conditions: List[ColumnCondition], limit: Optional[int] = None
+    ) -> Optional[Tuple[List[Document], int]]:
+        """
+        조건에 맞는 행을 (문서 순서대로 최대 limit개) Document로 반환합니다.
+        반환값: (Document 목록, 조건에 맞는 전체 행 수) — limit로 잘렸는지는 두 값을 비교해 알 수 있습니다.
+        해당 컬렉션의 표 색인이 없거나 표에 없는 열이 조건에 있으면 None (호출 측에서 벡터 검색으로 대체)
+        """
+        table = self._tables.get(collection_name)
+        if table is None:
+            # 여러 요청 스레드가 동시에 같은 pickle을 읽거나, 저장 중인 파일을 읽지 않도록 잠금 안에서 불러옵니다.
+            with self._lock:
+                table = self._load(collection_name)
+        if table is None or len(table) == 0:
+            return None
+        if not table.has_columns(column for column, _, _ in conditions):
+            # 표에 없는 열에 대한 조건은 색인으로 판단할 수 없으므로 벡터 검색에 맡깁니다.
+            return None
+        positions = table.match(conditions)
+        matched = len(positions)
+        if limit is not None and matched > limit:
+            print(f"⚠️ 조건에 맞는 행 {matched}개 중 앞의 {limit}개만 사용합니다.")
+            positions = positions[:limit]
+        return table.documents(positions), matched
@@ -0,0 +1,197 @@
+# services/embedding_pipeline.py
+
+import asyncio
+import random
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+
+import openai
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+from core.metrics import record_event
+
+# 재시도할 제공자 오류 (요청 한도, 일시적 네트워크/서버 오류)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """OpenAI x-ratelimit-reset-* 헤더 값("6m0s", "1.5s", "20ms")을 초 단위로 바꿉니다."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class EmbeddingPipeline:
+    """
+    벡터 DB 구축용 비동기 임베딩 파이프라인입니다.
+    - 청크를 토큰 예산(batch_max_tokens)과 최대 개수(batch_max_size) 안에서 배치로 묶어
+      최대 max_concurrency개의 배치를 동시에 임베딩합니다. (이벤트 루프를 막지 않음)
+    - 제공자가 429를 돌려주면 응답 헤더(retry-after, x-ratelimit-reset-tokens/requests)가 알려준 시간만큼
+      모든 배치를 멈추고 배치 토큰 예산을 절반으로 줄입니다. 성공이 이어지면 예산을 다시 늘립니다.
+    - 일시적 오류는 지수 백오프(+지터)로 max_retries번까지 재시도합니다.
+    """
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_concurrency: int = 4,
+        batch_max_tokens: int = 100_000,
+        batch_max_size: int = 512,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        encoding_name: str = "cl100k_base"
+    ):
+        self.embeddings = embeddings
+        self.max_concurrency = max_concurrency
+        self.batch_max_tokens = batch_max_tokens
+        self.batch_max_size = batch_max_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.encoding_name = encoding_name
+        # rate limit에 따라 바뀌는 현재 배치 토큰 예산과 전체 재개 시각 (event loop 시간)
+        self.batch_tokens = batch_max_tokens
+        self._resume_at = 0.0
+        self._encoding: Optional[tiktoken.Encoding] = None
+        self._encoding_failed = False
+        self._lock = threading.Lock()
+        self.rate_limited = 0
+        self.retries = 0
+
+    @property
+    def encoding(self) -> Optional[tiktoken.Encoding]:
+        # 인코딩 파일 로딩은 처음 필요할 때 한 번만 합니다. (오프라인이면 글자 수 근사치 사용)
+        if self._encoding is None and not self._encoding_failed:
+            with self._lock:
+                if self._encoding is None and not self._encoding_failed:
+                    try:
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        self._encoding_failed = True
+                        print(f"⚠️ tiktoken 인코딩 '{self.encoding_name}' 로딩 실패, 글자 수 기반 근사치를 사용합니다: {e}")
+        return self._encoding
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        encoding = self.encoding
+        if encoding is None:
+            return [(len(text) + 1) // 2 for text in texts]
+        return [len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=())]
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        backoff = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+        response = getattr(error, "response", None)
+        if response is None:
+            return backoff
+        headers = response.headers
+        hinted = [
+            parse_reset_duration(headers.get("x-ratelimit-reset-tokens")),
+            parse_reset_duration(headers.get("x-ratelimit-reset-requests")),
+        ]
+        if headers.get("retry-after-ms"):
+            hinted.append(float(headers["retry-after-ms"]) / 1000)
+        elif headers.get("retry-after", "").replace(".", "", 1).isdigit():
+            hinted.append(float(headers["retry-after"]))
+        hinted = [delay for delay in hinted if delay is not None]
+        return min(self.backoff_max, max(hinted)) if hinted else backoff
+
+    def _on_rate_limited(self, delay: float) -> None:
+        self.rate_limited += 1
+        record_event("embedding_pipeline", "rate_limited")
+        loop = asyncio.get_running_loop()
+        self._resume_at = max(self._resume_at, loop.time() + delay)
+        new_budget = max(1_000, self.batch_tokens // 2)
+        if new_budget != self.batch_tokens:
+            print(f"⚠️ 임베딩 rate limit 감지: 배치 토큰 예산 {self.batch_tokens} → {new_budget}, {delay:.1f}초 대기")
+        self.batch_tokens = new_budget
+
+    def _on_success(self) -> None:
+        if self.batch_tokens < self.batch_max_tokens:
+            self.batch_tokens = min(self.batch_max_tokens, int(self.batch_tokens * 1.25))
+
+    async def _wait_for_resume(self) -> None:
+        delay = self._resume_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_resume()
+            try:
+                vectors = await self.embeddings.aembed_documents(texts)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                self.retries += 1
+                record_event("embedding_pipeline", "retry")
+                if isinstance(e, openai.RateLimitError):
+                    self._on_rate_limited(delay)
+                else:
+                    print(f"⚠️ 임베딩 요청 실패 ({type(e).__name__}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                    await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return vectors
+
+    async def aembed(
+        self,
+        texts: List[str],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[List[float]]:
+        """입력 순서대로 임베딩을 반환합니다. (on_progress: 배치가 끝날 때마다 (완료 수, 전체 수)로 호출)"""
+        if not texts:
+            return []
+        tokens = await asyncio.to_thread(self.count_tokens, texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        cursor = 0
+        done = 0
+        started = time.perf_counter()
+
+        def next_batch():
+            # 워커들이 번갈아 호출하지만 await가 없으므로 이벤트 루프 안에서 원자적으로 실행됩니다.
+            nonlocal cursor
+            start = cursor
+            used = 0
+            while cursor < len(texts) and cursor - start < self.batch_max_size:
+                if cursor > start and used + tokens[cursor] > self.batch_tokens:
+                    break
+                used += tokens[cursor]
+                cursor += 1
+            return start, cursor
+
+        async def worker():
+            nonlocal done
+            while True:
+                start, end = next_batch()
+                if start == end:
+                    return
+                results[start:end] = await self._embed_batch(texts[start:end])
+                done += end - start
+                print(f"-> {done}/{len(texts)}개 문서 임베딩 완료...")
+                if on_progress is not None:
+                    on_progress(done, len(texts))
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # 한 배치가 끝내 실패하면 나머지 배치도 멈춥니다.
+            for task in workers:
+                task.cancel()
+            raise
+        print(f"✅ 임베딩 {len(texts)}개 완료 ({sum(tokens)} 토큰, {time.perf_counter() - started:.1f}초)")
+        return results
@@ -0,0 +1,75 @@
+# services/federated_search.py
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def label_documents(collection_name: str, docs: List[Document]) -> List[Document]:
+    """
+    여러 컬렉션(학기/문서)의 결과를 한 문맥에 넣을 때 출처를 구분할 수 있도록
+    본문 앞에 컬렉션 이름을 붙이고 metadata["collection"]에 기록한 복사본을 반환합니다.
+    (레지스트리/색인에 캐시된 원본 Document는 수정하지 않음)
+    """
+    return [
+        Document(
+            page_content=f"[{collection_name}] {doc.page_content}",
+            metadata={**doc.metadata, "collection": collection_name}
+        )
+        for doc in docs
+    ]
+
+
+def cosine_scores(query_embedding: Sequence[float], embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    """검색어 임베딩과 문서 임베딩들의 코사인 유사도"""
+    if len(embeddings) == 0:
+        return np.empty(0, dtype=np.float32)
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    return (matrix @ query) / (norms * (query_norm if query_norm > 0 else 1.0))
+
+
+def merge_by_score(
+    results: Sequence[Tuple[str, List[Document], Sequence[float]]],
+    top_k: int = 20,
+    per_collection_quota: Optional[int] = None
+) -> List[Document]:
+    """
+    컬렉션별 검색 결과를 (컬렉션 이름, 문서 목록, 문서별 점수) 로 받아 점수 순으로 합칩니다.
+    - 점수: 검색어 임베딩과의 코사인 유사도처럼 컬렉션 간에 비교할 수 있는 관련도 (순위가 아닌 실제 점수)
+    - 전체를 점수 순으로 정렬한 뒤 컬렉션당 최대 per_collection_quota개까지만 먼저 채우고
+      (생략 시 top_k를 컬렉션 수로 균등 분배), 결과가 적은 컬렉션 때문에 남는 자리는 나머지 후보 중 점수가 높은 순으로 채웁니다.
+    """
+    if not results:
+        return []
+    if per_collection_quota is None:
+        per_collection_quota = math.ceil(top_k / len(results))
+
+    # (점수, 컬렉션 순서, 순위) 기준 정렬 → 점수가 같으면 요청한 컬렉션 순서, 컬렉션 안의 순위대로
+    candidates = sorted(
+        (
+            (float(score), order, rank, doc)
+            for order, (_, docs, scores) in enumerate(results)
+            for rank, (doc, score) in enumerate(zip(docs, scores), 1)
+        ),
+        key=lambda item: (-item[0], item[1], item[2])
+    )
+
+    selected: List[tuple] = []
+    overflow: List[tuple] = []
+    counts: Dict[int, int] = {}
+    for candidate in candidates:
+        order = candidate[1]
+        if counts.get(order, 0) < per_collection_quota and len(selected) < top_k:
+            counts[order] = counts.get(order, 0) + 1
+            selected.append(candidate)
+        else:
+            overflow.append(candidate)
+    selected.extend(overflow[:max(top_k - len(selected), 0)])
+    selected.sort(key=lambda item: (-item[0], item[1], item[2]))
+    return [doc for _, _, _, doc in selected]
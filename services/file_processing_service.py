@@ -1,10 +1,9 @@
 import os
 import re
 import io
-import json
 import asyncio
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple, List, Dict
 
 import pandas as pd
 from bs4 import BeautifulSoup
@@ -16,6 +15,11 @@ from docx.text.paragraph import Paragraph
 from dotenv import load_dotenv
 from llama_cloud_services import LlamaParse
 from pdf2docx import Converter
+from core.config import settings
+from core.metrics import timed_stage, track_stage
+from core.streaming import iterate_in_thread
+from models.fake_models import FakeLlamaParse
+from services.table_artifact import TABLE_METADATA_COLUMNS, TABLE_ROW_TYPE, write_table_artifact
 # import pdfplumber  # LlamaParse를 정답지로 사용하므로 더 이상 필요 없음
 
 # LlamaParse에 전달할 파싱 지시어 (전체 내용)
@@ -35,6 +39,15 @@ class FileProcessorService:
         self.upload_dir = Path(upload_dir)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         
+        if settings.DEFAULT_MODEL == "FAKE":
+            # 부하 테스트 모드: LlamaParse API 대신 준비된 페이지 Markdown을 돌려주는 대역 사용
+            self.llama_parser = FakeLlamaParse(
+                pages_path=settings.FAKE_LLAMA_PARSE_PAGES_PATH,
+                latency=settings.FAKE_LLAMA_PARSE_LATENCY_SECONDS
+            )
+            print("⚠️ FAKE 모드: LlamaParse 대역(FakeLlamaParse)을 사용합니다.")
+            return
+
         load_dotenv()
         api_key = os.environ.get("LLAMA_CLOUD_API_KEY")
         if not api_key:
@@ -57,19 +70,27 @@ class FileProcessorService:
 
     # --- 1. 메인 파이프라인 오케스트레이터 ---
 
-    async def process_full_pipeline(self, pdf_path: str) -> Tuple[str, str, str, str]:
+    @timed_stage("file_processing")
+    async def process_full_pipeline(
+        self,
+        pdf_path: str,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Tuple[str, str, str, str]:
         """
         [최종 하이브리드 파이프라인 (v3: LlamaParse 정답지)]
         1. [Async] LlamaParse: 텍스트(.md) 추출 + 페이지 맵(정답지) 생성
         2. [Executor] pdf2docx: .docx 파일 생성
-        3. [Executor] docx_parser + Matcher: .docx와 LlamaParse 맵을 매칭해 .html, .txt 생성
+        3. [Executor] docx_parser + Matcher: .docx와 LlamaParse 맵을 매칭해 .html, 표 행 .arrow 생성
+        (progress: 진행 상황을 키워드 인자로 받는 콜백 — step, pages_parsed)
         """
+        progress = progress or (lambda **fields: None)
         print(f"🚀 전체 하이브리드 파이프라인 시작: {pdf_path}")
         pdf_path_obj = Path(pdf_path)
         loop = asyncio.get_event_loop()
 
         # 1. LlamaParse로 텍스트(.md)와 페이지 맵 추출 (Async)
         print("🔧 [1/3] LlamaParse로 텍스트(.md) 및 페이지 맵 생성 중...")
+        progress(step="llama_parse+pdf2docx", pages_parsed=0)
         llama_task = self._parse_text_and_create_page_map_with_llama(pdf_path_obj)
         
         # 2. DOCX 변환 (Sync 함수를 Async로 실행)
@@ -85,6 +106,7 @@ class FileProcessorService:
         )
         
         print(f"✅ [1/3] Markdown (텍스트) 및 페이지 맵 생성 완료. 총 {len(page_map)} 페이지.")
+        progress(step="docx_matching", pages_parsed=len(page_map))
         print(f"✅ [2/3] DOCX 저장 완료: {docx_path}")
 
         # 3. DOCX 파싱 및 LlamaParse 맵과 페이지 번호 매칭 (Sync 함수를 Async로 실행)
@@ -92,21 +114,92 @@ class FileProcessorService:
         if not page_map:
              print("⚠️ 페이지 맵이 비어있어 매칭을 건너뜁니다. 페이지 번호가 -1로 표시됩니다.")
              
-        html_path, rag_text_path = await loop.run_in_executor(
+        html_path, rag_table_path = await loop.run_in_executor(
             None, 
-            self._extract_tables_with_docx_and_matching,
+            timed_stage("file_processing", "docx_matching")(self._extract_tables_with_docx_and_matching),
             docx_path,
             page_map,
             pdf_path_obj.name # 메타데이터용
         )
         
-        print(f"✅ [3/3] HTML (테이블) 및 RAG-TXT (K-V) 저장 완료: {html_path}, {rag_text_path}")
+        print(f"✅ [3/3] HTML (테이블) 및 표 행 (열 기반 .arrow) 저장 완료: {html_path}, {rag_table_path}")
         print(f"🎉 전체 파이프라인 완료.")
         
-        return docx_path, markdown_path, html_path, rag_text_path
+        return docx_path, markdown_path, html_path, rag_table_path
+
+    @staticmethod
+    def artifact_paths(pdf_path: str) -> Dict[str, str]:
+        """파이프라인이 PDF 옆에 쓰는 결과 파일 경로"""
+        pdf_path_obj = Path(pdf_path)
+        return {
+            "docx_file": str(pdf_path_obj.with_suffix(".docx")),
+            "markdown_file": str(pdf_path_obj.with_suffix(".md")),
+            "html_file": str(pdf_path_obj.with_suffix(".html")),
+            "rag_table_file": str(pdf_path_obj.with_suffix(".arrow")),
+        }
+
+    async def stream_pipeline(
+        self,
+        pdf_path: str,
+        write_files: bool = False,
+        progress: Optional[Callable[..., None]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        [스트리밍 파이프라인] process_full_pipeline과 같은 단계를 거치지만, 결과를 파일로 모으지 않고
+        ("md", .md 텍스트 조각) → ("table", 표 행 딕셔너리) 순서로 만들어지는 대로 내보냅니다.
+        - Markdown 페이지는 LlamaParse가 끝나는 즉시 내보내므로, pdf2docx 변환 중에도 임베딩을 시작할 수 있습니다.
+        - DOCX 매칭은 executor 스레드에서 테이블 단위로 진행되고, 소비자가 느리면 기다립니다.
+        - write_files=True면 .md / .html / .arrow 파일도 함께 씁니다. (확인/재시작용 부산물)
+        - LlamaParse나 DOCX 파싱이 실패하면 스트림을 정상 종료하지 않고 예외를 던집니다.
+          (중간에 끊긴 스트림을 완료로 보면 abuild_from_stream이 나오지 않은 청크를 모두 삭제하기 때문)
+        """
+        progress = progress or (lambda **fields: None)
+        pdf_path_obj = Path(pdf_path)
+        paths = self.artifact_paths(pdf_path)
+        loop = asyncio.get_running_loop()
+
+        print(f"🚀 스트리밍 파이프라인 시작: {pdf_path}")
+        progress(step="llama_parse+pdf2docx", pages_parsed=0)
+        docx_path_task = loop.run_in_executor(None, self.convert_pdf_to_docx, pdf_path)
+
+        try:
+            markdown_pieces, page_map = await self._parse_pages_with_llama(pdf_path_obj, strict=True)
+            print(f"✅ Markdown 페이지 {len(markdown_pieces)}개 파싱 완료. 총 {len(page_map)} 페이지.")
+            progress(pages_parsed=len(page_map))
+            if write_files:
+                with open(paths["markdown_file"], "w", encoding="utf-8") as f_md:
+                    f_md.write("".join(markdown_pieces))
+            for piece in markdown_pieces:
+                yield "md", piece
+            del markdown_pieces
+        except BaseException:
+            # LlamaParse 실패나 소비자 중단 시 DOCX 변환 결과를 기다리지 않고 버립니다. (미회수 예외 경고 방지)
+            docx_path_task.cancel()
+            raise
+
+        docx_path = await docx_path_task
+        progress(step="docx_matching")
+        if not page_map:
+            print("⚠️ 페이지 맵이 비어있어 매칭을 건너뜁니다. 페이지 번호가 -1로 표시됩니다.")
+
+        html_tables: Optional[List[str]] = [] if write_files else None
+        # .arrow 파일은 표마다 열이 달라 모든 행의 열을 알아야 쓸 수 있으므로 끝에서 한 번에 씁니다. (텍스트만 보관)
+        table_rows: List[Dict[str, Any]] = []
+        async for row in iterate_in_thread(
+            lambda: self._iter_table_rows(docx_path, page_map, pdf_path_obj.name, html_tables, strict=True)
+        ):
+            if write_files:
+                table_rows.append(row)
+            yield "table", row
+        if write_files:
+            await asyncio.to_thread(write_table_artifact, paths["rag_table_file"], table_rows)
+            with open(paths["html_file"], "w", encoding="utf-8") as f_html:
+                f_html.write("\n\n".join(html_tables))
+        print(f"🎉 스트리밍 파이프라인 완료. (표 행 {len(table_rows) if write_files else '-'}개)")
 
     # --- 2. 파이프라인 구성 요소 ---
 
+    @timed_stage("file_processing", "pdf2docx")
     def convert_pdf_to_docx(self, pdf_path: str, start_page: int = 0, end_page: Optional[int] = None) -> str:
         """ [Task 2] PDF를 DOCX로 변환 (기존과 동일) """
         print(f"📄 DOCX 변환 시작: {pdf_path}")
@@ -126,11 +219,26 @@ class FileProcessorService:
         [Task 1] LlamaParse를 사용해 텍스트(.md)와 페이지 맵(정답지)을 동시에 생성합니다.
         """
         output_md_path = pdf_path_obj.with_suffix(".md")
+        markdown_pieces, page_map = await self._parse_pages_with_llama(pdf_path_obj)
+
+        # .md 파일 쓰기
+        with open(output_md_path, "w", encoding="utf-8") as f_md:
+            f_md.write("".join(markdown_pieces))
+
+        return str(output_md_path), page_map
+
+    async def _parse_pages_with_llama(self, pdf_path_obj: Path, strict: bool = False) -> Tuple[List[str], Dict[int, str]]:
+        """
+        LlamaParse 결과를 페이지 순서대로 .md 텍스트 조각(페이지 구분자 포함, 이어 붙이면 .md 파일 내용)과
+        페이지 맵(정답지)으로 돌려줍니다.
+        strict=True면 LlamaParse 실패를 빈 결과로 넘기지 않고 예외를 다시 던집니다.
+        """
         page_map: Dict[int, str] = {}
         processed_pages: List[str] = []
         
         try:
-            result = await self.llama_parser.aparse(str(pdf_path_obj))
+            with track_stage("file_processing", "llama_parse"):
+                result = await self.llama_parser.aparse(str(pdf_path_obj))
             markdown_documents = result.get_markdown_documents(split_by_page=True)
             
             for doc in markdown_documents:
@@ -147,27 +255,50 @@ class FileProcessorService:
                 # processed_pages.append(f"\n{text_only}") # 원본 코드
                 processed_pages.append(f"\n{text_only}") # 사용자님이 수정한 코드
 
-            # .md 파일 쓰기
-            final_markdown = "\n\n—\n\n".join(processed_pages)
-            with open(output_md_path, "w", encoding="utf-8") as f_md:
-                f_md.write(final_markdown)
-                
         except Exception as e:
             print(f"❌ LlamaParse 실패: {e}")
-            
-        return str(output_md_path), page_map
+            if strict:
+                raise
+
+        markdown_pieces = [
+            page if i == 0 else f"\n\n—\n\n{page}" for i, page in enumerate(processed_pages)
+        ]
+        return markdown_pieces, page_map
 
     def _extract_tables_with_docx_and_matching(self, docx_path: str, page_map: Dict[int, str], pdf_name: str) -> Tuple[str, str]:
         """
         [Task 3] 'python-docx'로 테이블을 파싱하고 'LlamaParse 페이지 맵'과 매칭하여
-        페이지 번호가 포함된 .html과 .txt를 생성합니다.
+        페이지 번호가 포함된 .html과 열 기반 표 행 파일(.arrow)을 생성합니다.
         """
         html_path = Path(docx_path).with_suffix(".html")
-        rag_text_path = Path(docx_path).with_suffix(".txt")
+        rag_table_path = Path(docx_path).with_suffix(".arrow")
         
-        all_kv_lines = []
         all_html_tables = []
-        
+        all_rows = list(self._iter_table_rows(docx_path, page_map, pdf_name, all_html_tables))
+
+        # 표 행 파일 (제목, 페이지, 소스 + 표의 열마다 한 열) 저장
+        write_table_artifact(str(rag_table_path), all_rows)
+
+        # HTML 파일 (테이블 시각화용) 저장
+        with open(html_path, 'w', encoding='utf-8') as f_html:
+            f_html.write('\n\n'.join(all_html_tables))
+
+        return str(html_path), str(rag_table_path)
+
+    def _iter_table_rows(
+        self,
+        docx_path: str,
+        page_map: Dict[int, str],
+        pdf_name: str,
+        html_tables: Optional[List[str]] = None,
+        strict: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        DOCX의 테이블을 순서대로 읽고 페이지 번호를 매칭해, 표 행 딕셔너리
+        {"source", "page", "type", "제목", 열: 값, ...}를 한 행씩 내보냅니다. (빈 셀은 빠짐, 열 순서는 표와 같음)
+        html_tables를 넘기면 테이블 제목과 원본 HTML을 함께 모읍니다. (.html 파일용)
+        strict=True면 DOCX 파싱 실패(테이블 하나의 변환 오류 제외)를 삼키지 않고 예외를 다시 던집니다.
+        """
         try:
             doc = Document(docx_path)
             
@@ -184,6 +315,7 @@ class FileProcessorService:
             # 2. HTML을 순회하며 테이블과 제목 추출, K-V 생성, 페이지 매칭
             for table in soup.find_all("table"):
                 table_html = str(table)
+                rows = []
                 
                 # --- A. 제목 추출 ---
                 title = "제목 없음"
@@ -221,44 +353,42 @@ class FileProcessorService:
                              page_map, title, anchor_text_1, anchor_text_2
                          )
                     
-                    # all_html_tables.append(f"\n# {title}\n") # 원본 코드
-                    all_html_tables.append(f"\n# {title}\n") # 사용자님이 수정한 코드
-                    all_html_tables.append(table_html) # 원본 HTML(구조가 올바른) 저장
-
-                    # --- D. K-V 문장 생성 ---
-                    for _, row in df.iterrows():
-                        row_data = ", ".join([
-                            f"{col}: {val}" 
-                            for col, val in row.items() 
+                    if html_tables is not None:
+                        # html_tables.append(f"\n# {title}\n") # 원본 코드
+                        html_tables.append(f"\n# {title}\n") # 사용자님이 수정한 코드
+                        html_tables.append(table_html) # 원본 HTML(구조가 올바른) 저장
+
+                    # --- D. 표 행 생성 (열 이름 → 셀 값, 임베딩 문장은 적재할 때 만듦) ---
+                    # 메타데이터 열과 이름이 겹치는 표 열은 pandas 중복 열 이름처럼 ".1"을 붙입니다.
+                    columns = [
+                        f"{col}.1" if str(col) in TABLE_METADATA_COLUMNS else str(col) for col in df.columns
+                    ]
+                    for values in df.itertuples(index=False, name=None):
+                        cells = {
+                            col: str(val).strip()
+                            for col, val in zip(columns, values)
                             if pd.notna(val) and str(val).strip()
-                        ])
-                        if not row_data: continue
+                        }
+                        if not cells: continue
 
-                        sentence = f"제목: {title}, {row_data}"
-                        
-                        metadata = {
+                        rows.append({
                             "source": pdf_name,
-                            "page": found_page,
-                            "type": "table_kv"
-                        }
-                        meta_json = json.dumps(metadata, ensure_ascii=False)
-                        all_kv_lines.append(f"{meta_json} {sentence}")
+                            "page": int(found_page),
+                            "type": TABLE_ROW_TYPE,
+                            "제목": title,
+                            **cells
+                        })
 
                 except Exception as e:
                     print(f"⚠️ 테이블 K-V 변환/매칭 오류 (건너뜁니다): {e}")
 
-            # RAG-TXT 파일 (K-V + 메타데이터) 저장
-            with open(rag_text_path, 'w', encoding='utf-8') as f_txt:
-                f_txt.write('\n'.join(all_kv_lines))
-                
-            # HTML 파일 (테이블 시각화용) 저장
-            with open(html_path, 'w', encoding='utf-8') as f_html:
-                f_html.write('\n\n'.join(all_html_tables))
+                # 테이블 하나가 끝날 때마다 그 테이블의 행을 내보냅니다.
+                yield from rows
 
         except Exception as e:
             print(f"❌ DOCX 파싱 및 매칭 전체 프로세스 실패: {e}")
-            
-        return str(html_path), str(rag_text_path)
+            if strict:
+                raise
 
     def _normalize_text_for_matching(self, text: str) -> str:
         """매칭을 위해 공백, 줄바꿈 등을 정규화합니다."""
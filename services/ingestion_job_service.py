@@ -0,0 +1,218 @@
+# services/ingestion_job_service.py
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.metrics import record_error, record_event
+
+# 아직 끝나지 않은 작업 상태 (서버 재시작 시 다시 실행)
+ACTIVE_STATUSES = ("queued", "running")
+_JSON_COLUMNS = ("progress", "timings", "artifacts", "ingestion")
+
+
+class IngestionJobStore:
+    """
+    PDF 처리/벡터 DB 구축 작업의 상태를 SQLite 작업 테이블에 저장합니다.
+    서버가 재시작되어도 끝나지 않은 작업을 찾아 이어서 실행할 수 있습니다.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " collection_name TEXT NOT NULL,"
+                " source_file TEXT NOT NULL,"
+                " pdf_path TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " progress TEXT NOT NULL DEFAULT '{}',"
+                " timings TEXT NOT NULL DEFAULT '{}',"
+                " artifacts TEXT NOT NULL DEFAULT '{}',"
+                " ingestion TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ingestion_jobs_status ON ingestion_jobs (status, created_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    def create(self, collection_name: str, source_file: str, pdf_path: str) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ingestion_jobs (job_id, collection_name, source_file, pdf_path, status, stage, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'queued', 'parsing', ?, ?)",
+                (job_id, collection_name, source_file, pdf_path, now, now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list(self, limit: int = 20, statuses: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM ingestion_jobs"
+        params: list = []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def update(self, job_id: str, merge: Optional[Dict[str, Dict]] = None, **fields: Any) -> None:
+        """
+        일반 열은 그대로 덮어쓰고, merge로 넘긴 JSON 열(progress, timings 등)은 기존 값에 키를 합칩니다.
+        """
+        with self._lock:
+            if merge:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(merge)} FROM ingestion_jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()
+                for column, values in merge.items():
+                    fields[column] = {**(json.loads(row[column]) if row and row[column] else {}), **values}
+            for column in _JSON_COLUMNS:
+                if column in fields and fields[column] is not None:
+                    fields[column] = json.dumps(fields[column], ensure_ascii=False)
+            fields["updated_at"] = time.time()
+            assignments = ", ".join(f"{column} = ?" for column in fields)
+            self._conn.execute(
+                f"UPDATE ingestion_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+
+class IngestionJobService:
+    """
+    PDF 변환(LlamaParse, pdf2docx, DOCX 매칭) → 벡터 DB 구축을 백그라운드 작업으로 실행합니다.
+    - 제출 즉시 작업 ID를 돌려주고, 상태/단계/진행 상황(파싱한 페이지 수, 임베딩한 청크 수)/단계별 소요 시간/오류를
+      작업 테이블에 기록합니다.
+    - 파싱과 임베딩은 한 스트림으로 겹쳐 실행되므로, 동시에 실행할 수 있는 작업 수를 하나의 슬롯으로 제한합니다.
+      (INGESTION_CONCURRENCY)
+    - 서버 재시작 후에는 끝나지 않은 작업을 처음부터 다시 실행합니다. (증분 적재로 이미 저장된 청크는 다시 임베딩하지 않음)
+    """
+    def __init__(self, file_processor, vector_store):
+        self.file_processor = file_processor
+        self.vector_store = vector_store
+        self.store = IngestionJobStore(settings.INGESTION_JOB_DB_PATH)
+        self._slots = asyncio.Semaphore(settings.INGESTION_CONCURRENCY)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return self.store.list(limit)
+
+    def find_active(self, source_file: str) -> Optional[Dict[str, Any]]:
+        """같은 업로드 파일을 처리 중인 작업 (업로드 경로와 변환 결과 파일을 공유하므로 동시에 실행할 수 없음)"""
+        for job in self.store.list(limit=1000, statuses=ACTIVE_STATUSES):
+            if job["source_file"] == source_file:
+                return job
+        return None
+
+    def submit(self, pdf_path: str, source_file: str, collection_name: str) -> Dict[str, Any]:
+        job = self.store.create(collection_name, source_file, pdf_path)
+        self._start(job["job_id"])
+        record_event("ingestion_job", "submitted")
+        print(f"📥 작업 {job['job_id']} 접수: '{source_file}' → 컬렉션 '{collection_name}'")
+        return job
+
+    def _start(self, job_id: str) -> None:
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def resume(self) -> int:
+        """서버 시작 시 끝나지 않은 작업(queued/running)을 다시 실행합니다."""
+        jobs = await asyncio.to_thread(self.store.list, 1000, ACTIVE_STATUSES)
+        for job in reversed(jobs):
+            if job["job_id"] not in self._tasks:
+                self.store.update(job["job_id"], status="queued")
+                self._start(job["job_id"])
+        if jobs:
+            record_event("ingestion_job", "resumed", len(jobs))
+            print(f"🔁 끝나지 않은 처리 작업 {len(jobs)}개를 이어서 실행합니다.")
+        return len(jobs)
+
+    async def shutdown(self) -> None:
+        """
+        실행 중인 작업을 멈춥니다. 상태는 queued/running으로 남아 다음 시작 때 이어서 실행됩니다.
+        """
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_stage(self, job_id: str, stage: str, work):
+        """실행 슬롯을 얻을 때까지 기다렸다가 단계를 실행하고, 대기/실행 시간을 기록합니다."""
+        self.store.update(job_id, status="queued", stage=stage)
+        waited = time.perf_counter()
+        async with self._slots:
+            started = time.perf_counter()
+            self.store.update(
+                job_id, status="running", stage=stage,
+                merge={"timings": {f"{stage}_wait_seconds": round(started - waited, 3)}}
+            )
+            result = await work(
+                lambda **fields: self.store.update(job_id, merge={"progress": fields})
+            )
+        self.store.update(job_id, merge={"timings": {f"{stage}_seconds": round(time.perf_counter() - started, 3)}})
+        return result
+
+    async def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        pdf_path = job["pdf_path"]
+        write_files = settings.INGESTION_WRITE_FILES
+        stage = "streaming"
+        try:
+            # PDF 파싱 → 청크 → 임베딩 → 저장을 스트리밍으로 겹쳐 실행합니다.
+            # (증분 적재이므로 중간에 멈췄던 작업도 처음부터 다시 실행하면 이미 저장된 청크는 건너뜀)
+            # blue/green 구축이면 새 세대 컬렉션에 적재·검증한 뒤 별칭을 전환합니다. (progress의 generation)
+            ingestion = await self._run_stage(
+                job_id, stage,
+                lambda progress: self.vector_store.abuild_and_publish(
+                    self.file_processor.stream_pipeline(pdf_path, write_files=write_files, progress=progress),
+                    collection_name=job["collection_name"],
+                    source=Path(pdf_path).name,
+                    progress=progress
+                )
+            )
+            artifacts = self.file_processor.artifact_paths(pdf_path) if write_files else {}
+            self.store.update(job_id, status="succeeded", stage="done", artifacts=artifacts, ingestion=ingestion)
+            record_event("ingestion_job", "succeeded")
+            print(f"✅ 작업 {job_id} 완료: {ingestion}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            record_error("ingestion_job", stage)
+            record_event("ingestion_job", "failed")
+            self.store.update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+            print(f"❌ 작업 {job_id} 실패 ({stage} 단계): {e}")
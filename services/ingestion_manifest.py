@@ -0,0 +1,86 @@
+# services/ingestion_manifest.py
+
+import hashlib
+import json
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+# 소스 파일 하나의 청크 기록: 청크 ID → {"kind": "md" | "table", "fingerprint": 메타데이터 해시}
+SourceManifest = Dict[str, Dict[str, str]]
+
+
+def chunk_ids(source: str, documents: List[Document], seen: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    소스 이름 + 본문으로 결정적인 청크 ID를 만듭니다.
+    같은 소스에 본문이 완전히 같은 청크가 여러 개면 등장 순번으로 구분합니다.
+    (청크를 나눠서 넘길 때는 같은 seen을 계속 넘기면 한 번에 넘긴 것과 같은 ID가 나옵니다.)
+    """
+    seen = {} if seen is None else seen
+    ids = []
+    for doc in documents:
+        occurrence = seen.get(doc.page_content, 0)
+        seen[doc.page_content] = occurrence + 1
+        digest = hashlib.sha256(f"{source}\x1f{occurrence}\x1f{doc.page_content}".encode("utf-8")).hexdigest()
+        ids.append(digest[:32])
+    return ids
+
+
+def metadata_fingerprint(metadata: Dict) -> str:
+    """본문이 같은 청크의 메타데이터(페이지, 헤더 등)가 바뀌었는지 판단하기 위한 해시"""
+    encoded = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class IngestionManifest:
+    """
+    컬렉션별로 소스 파일마다 어떤 청크 ID를 적재했는지 기록합니다.
+    `{INDEX_PATH}/manifests/{컬렉션}.json` 에 저장되며, 같은 소스를 다시 구축할 때
+    추가/변경/유지/삭제할 청크를 계산하는 기준이 됩니다.
+    """
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir) / "manifests"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _manifest_path(self, collection_name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", collection_name)
+        return self.index_dir / f"{safe_name}.json"
+
+    def load(self, collection_name: str) -> Dict[str, SourceManifest]:
+        path = self._manifest_path(collection_name)
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def get(self, collection_name: str, source: str) -> SourceManifest:
+        return self.load(collection_name).get(source, {})
+
+    def put(self, collection_name: str, source: str, chunks: SourceManifest) -> None:
+        with self._lock:
+            manifest = self.load(collection_name)
+            manifest[source] = chunks
+            path = self._manifest_path(collection_name)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._manifest_path(collection_name).unlink(missing_ok=True)
+
+    def copy(self, source_collection: str, target_collection: str) -> bool:
+        """청크 기록을 다른 컬렉션 이름으로 복사합니다. (blue/green 구축용, 원본이 없으면 False)"""
+        source_path = self._manifest_path(source_collection)
+        if not source_path.exists():
+            return False
+        with self._lock:
+            target_path = self._manifest_path(target_collection)
+            tmp_path = target_path.with_suffix(".tmp")
+            shutil.copyfile(source_path, tmp_path)
+            tmp_path.replace(target_path)
+        return True
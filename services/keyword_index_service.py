@@ -0,0 +1,168 @@
+# services/keyword_index_service.py
+
+import pickle
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from kiwipiepy import Kiwi
+from langchain_core.documents import Document
+from rank_bm25 import BM25Okapi
+
+# BM25 색인에 사용할 형태소 품사 (체언, 어근, 용언 어간, 외국어/숫자/한자)
+# 조사(J*), 어미(E*), 접사(X* 일부), 기호(S* 일부)는 제외하여 "과목을" → "과목" 으로 색인됩니다.
+INDEXED_TAG_PREFIXES = ("NN", "NR", "NP", "XR", "VV", "VA", "SL", "SN", "SH", "MAG")
+
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Document]], k: int = 60, top_n: Optional[int] = None) -> List[Document]:
+    """
+    여러 검색 결과 리스트를 Reciprocal Rank Fusion(RRF)으로 합칩니다.
+    score(d) = Σ 1 / (k + rank_i(d))  (같은 page_content는 같은 문서로 간주)
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    if top_n is not None:
+        ranked = ranked[:top_n]
+    return [documents[key] for key in ranked]
+
+
+class _KeywordIndex:
+    """컬렉션 하나에 대한 BM25 색인 (문서 + 형태소 토큰 + BM25 통계)"""
+    def __init__(self, documents: List[Document], tokens: List[List[str]]):
+        self.documents = documents
+        self.tokens = tokens
+        # rank-bm25는 빈 코퍼스를 허용하지 않습니다.
+        self.bm25 = BM25Okapi(tokens) if tokens else None
+
+
+class KeywordIndexService:
+    """
+    kiwipiepy 형태소 분석 + rank-bm25 기반의 컬렉션별 키워드 색인입니다.
+    벡터 DB 구축 시 함께 만들어지고, `{INDEX_PATH}/bm25/{컬렉션}.pkl` 로 저장됩니다.
+    Chroma의 where_document $or/$contains 전체 스캔을 대체합니다.
+    """
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir) / "bm25"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._kiwi: Optional[Kiwi] = None
+        self._indexes: Dict[str, _KeywordIndex] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def kiwi(self) -> Kiwi:
+        # Kiwi 모델 로딩은 무거우므로 처음 필요할 때 한 번만 생성합니다.
+        if self._kiwi is None:
+            with self._lock:
+                if self._kiwi is None:
+                    self._kiwi = Kiwi()
+        return self._kiwi
+
+    def tokenize(self, text: str) -> List[str]:
+        return [
+            token.form.lower()
+            for token in self.kiwi.tokenize(text)
+            if token.tag.startswith(INDEXED_TAG_PREFIXES)
+        ]
+
+    def _index_path(self, collection_name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", collection_name)
+        return self.index_dir / f"{safe_name}.pkl"
+
+    def has_index(self, collection_name: str) -> bool:
+        return collection_name in self._indexes or self._index_path(collection_name).exists()
+
+    def _load(self, collection_name: str) -> Optional[_KeywordIndex]:
+        index = self._indexes.get(collection_name)
+        if index is not None:
+            return index
+        path = self._index_path(collection_name)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        index = _KeywordIndex(data["documents"], data["tokens"])
+        self._indexes[collection_name] = index
+        return index
+
+    def _save(self, collection_name: str, index: _KeywordIndex) -> None:
+        path = self._index_path(collection_name)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"documents": index.documents, "tokens": index.tokens}, f)
+        tmp_path.replace(path)
+
+    def add_documents(self, collection_name: str, documents: Iterable[Document], replace: bool = False) -> int:
+        """
+        컬렉션 색인에 문서를 추가하고 BM25 통계를 다시 계산한 뒤 디스크에 저장합니다.
+        (abuild_from_stream이 Chroma에 문서를 추가하는 것과 같은 의미, replace=True면 색인을 새로 만듦)
+        """
+        new_documents = list(documents)
+        new_tokens = [self.tokenize(doc.page_content) for doc in new_documents]
+        with self._lock:
+            existing = None if replace else self._load(collection_name)
+            all_documents = (existing.documents if existing else []) + new_documents
+            all_tokens = (existing.tokens if existing else []) + new_tokens
+            index = _KeywordIndex(all_documents, all_tokens)
+            self._save(collection_name, index)
+            self._indexes[collection_name] = index
+        print(f"✅ 컬렉션 '{collection_name}' BM25 색인 갱신 완료 (총 {len(all_documents)}개 문서)")
+        return len(all_documents)
+
+    def remove_documents(self, collection_name: str, ids: Iterable[str]) -> int:
+        """
+        Document.id가 주어진 ID인 문서를 색인에서 빼고 BM25 통계를 다시 계산합니다.
+        (남은 문서의 형태소 토큰은 그대로 재사용)
+        """
+        removed = set(ids)
+        with self._lock:
+            existing = self._load(collection_name)
+            if existing is None or not removed:
+                return 0
+            keep = [i for i, doc in enumerate(existing.documents) if doc.id not in removed]
+            if len(keep) == len(existing.documents):
+                return 0
+            index = _KeywordIndex([existing.documents[i] for i in keep], [existing.tokens[i] for i in keep])
+            self._save(collection_name, index)
+            self._indexes[collection_name] = index
+        return len(existing.documents) - len(keep)
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+            self._index_path(collection_name).unlink(missing_ok=True)
+
+    def copy(self, source_collection: str, target_collection: str) -> bool:
+        """BM25 색인을 다른 컬렉션 이름으로 복사합니다. (blue/green 구축용, 원본이 없으면 False)"""
+        source_path = self._index_path(source_collection)
+        if not source_path.exists():
+            return False
+        with self._lock:
+            target_path = self._index_path(target_collection)
+            tmp_path = target_path.with_suffix(".tmp")
+            shutil.copyfile(source_path, tmp_path)
+            tmp_path.replace(target_path)
+            self._indexes.pop(target_collection, None)
+        return True
+
+    def search(self, collection_name: str, query: str, k: int = 20) -> List[Document]:
+        """BM25 점수 상위 k개 문서를 반환합니다. (점수가 0인 문서는 제외)"""
+        index = self._load(collection_name)
+        if index is None or index.bm25 is None:
+            return []
+        query_tokens = self.tokenize(query)
+        if not query_tokens:
+            return []
+        scores = index.bm25.get_scores(query_tokens)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [index.documents[i] for i in top if scores[i] > 0]
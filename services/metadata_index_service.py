@@ -0,0 +1,192 @@
+# services/metadata_index_service.py
+
+import pickle
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+_EMPTY = np.array([], dtype=np.int64)
+
+
+class _MetadataIndex:
+    """
+    컬렉션 하나의 메타데이터 역색인입니다.
+    (메타데이터 키, 값) → 문서 위치(정렬된 int 배열), 위치 → Chroma 문서 ID / 메타데이터
+    본문은 저장하지 않습니다. (본문이 필요하면 벡터 저장소에서 ID로 가져옴)
+    """
+    def __init__(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        self.ids = ids
+        self.metadatas = metadatas
+        postings: Dict[str, Dict[Any, List[int]]] = {}
+        for position, metadata in enumerate(metadatas):
+            for key, value in metadata.items():
+                postings.setdefault(key, {}).setdefault(value, []).append(position)
+        self.postings: Dict[str, Dict[Any, np.ndarray]] = {
+            key: {value: np.asarray(positions, dtype=np.int64) for value, positions in values.items()}
+            for key, values in postings.items()
+        }
+        self._all = np.arange(len(metadatas), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _lookup(self, key: str, values: Sequence[Any]) -> np.ndarray:
+        column = self.postings.get(key, {})
+        hits = [column[value] for value in values if value in column]
+        if not hits:
+            return _EMPTY
+        return hits[0] if len(hits) == 1 else np.unique(np.concatenate(hits))
+
+    def match_where(self, where: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Chroma where 형식({"열": 값}, {"열": {"$eq": 값}}, {"$and"/"$or": [...]})을 위치 집합으로 평가합니다.
+        역색인으로 판단할 수 없는 연산자($gt 등)가 있으면 None
+        """
+        result = self._all
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                parts = [self.match_where(sub) for sub in condition]
+                if any(part is None for part in parts):
+                    return None
+                combined = parts[0]
+                for part in parts[1:]:
+                    combined = np.intersect1d(combined, part) if key == "$and" else np.union1d(combined, part)
+                positions = combined
+            elif isinstance(condition, dict):
+                positions = self._all
+                for op, value in condition.items():
+                    if op in ("$eq", "$ne"):
+                        hits = self._lookup(key, [value])
+                    elif op in ("$in", "$nin"):
+                        hits = self._lookup(key, value)
+                    else:
+                        return None
+                    if op in ("$ne", "$nin"):
+                        # Chroma와 같이 해당 키가 없는 문서는 $ne/$nin에도 일치하지 않습니다.
+                        present = self._lookup(key, list(self.postings.get(key, {})))
+                        hits = np.setdiff1d(present, hits, assume_unique=True)
+                    positions = np.intersect1d(positions, hits, assume_unique=True)
+            else:
+                positions = self._lookup(key, [condition])
+            result = np.intersect1d(result, positions, assume_unique=True)
+        return result
+
+
+class MetadataIndexService:
+    """
+    컬렉션별 메타데이터 역색인 ((키, 값) → Chroma 문서 ID)입니다.
+    벡터 DB 구축 시 문서 ID와 함께 만들어지고 `{INDEX_PATH}/metadata/{컬렉션}.pkl` 로 저장됩니다.
+    'key':'value' 필터 질문의 후보 집합을 벡터 검색 전에 계산해, 후보가 적으면 벡터 검색을 건너뛰고
+    그렇지 않으면 후보 ID로만 유사도를 계산하도록 합니다. (ID와 메타데이터만 저장하며 본문 필터는 벡터 저장소가 평가)
+    """
+    def __init__(self, index_dir: str):
+        self.index_dir = Path(index_dir) / "metadata"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self._indexes: Dict[str, _MetadataIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index_path(self, collection_name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", collection_name)
+        return self.index_dir / f"{safe_name}.pkl"
+
+    def has_index(self, collection_name: str) -> bool:
+        return collection_name in self._indexes or self._index_path(collection_name).exists()
+
+    def _load(self, collection_name: str) -> Optional[_MetadataIndex]:
+        index = self._indexes.get(collection_name)
+        if index is not None:
+            return index
+        path = self._index_path(collection_name)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        # 이전 형식(Document 전체를 저장한 색인)도 메타데이터만 꺼내 읽습니다.
+        metadatas = data["metadatas"] if "metadatas" in data else [doc.metadata for doc in data["documents"]]
+        index = _MetadataIndex(data["ids"], metadatas)
+        self._indexes[collection_name] = index
+        return index
+
+    def _save(self, collection_name: str, index: _MetadataIndex) -> None:
+        path = self._index_path(collection_name)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"ids": index.ids, "metadatas": index.metadatas}, f)
+        tmp_path.replace(path)
+
+    def add_documents(
+        self,
+        collection_name: str,
+        ids: Sequence[str],
+        documents: Iterable[Document],
+        replace: bool = False
+    ) -> int:
+        """
+        Chroma에 추가한 문서와 같은 ID로 역색인에 추가하고 저장합니다. (replace=True면 색인을 새로 만듦)
+        """
+        new_metadatas = [doc.metadata for doc in documents]
+        if len(ids) != len(new_metadatas):
+            raise ValueError("문서 수와 ID 수가 다릅니다.")
+        with self._lock:
+            existing = None if replace else self._load(collection_name)
+            all_ids = (existing.ids if existing else []) + list(ids)
+            all_metadatas = (existing.metadatas if existing else []) + new_metadatas
+            index = _MetadataIndex(all_ids, all_metadatas)
+            self._save(collection_name, index)
+            self._indexes[collection_name] = index
+        print(f"✅ 컬렉션 '{collection_name}' 메타데이터 역색인 갱신 완료 (총 {len(index)}개 문서, 키 {len(index.postings)}개)")
+        return len(index)
+
+    def remove_documents(self, collection_name: str, ids: Iterable[str]) -> int:
+        """해당 ID의 문서를 역색인에서 빼고 저장합니다."""
+        removed = set(ids)
+        with self._lock:
+            existing = self._load(collection_name)
+            if existing is None or not removed:
+                return 0
+            keep = [i for i, doc_id in enumerate(existing.ids) if doc_id not in removed]
+            if len(keep) == len(existing):
+                return 0
+            index = _MetadataIndex([existing.ids[i] for i in keep], [existing.metadatas[i] for i in keep])
+            self._save(collection_name, index)
+            self._indexes[collection_name] = index
+        return len(existing) - len(keep)
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+            self._index_path(collection_name).unlink(missing_ok=True)
+
+    def copy(self, source_collection: str, target_collection: str) -> bool:
+        """메타데이터 역색인을 다른 컬렉션 이름으로 복사합니다. (blue/green 구축용, 원본이 없으면 False)"""
+        source_path = self._index_path(source_collection)
+        if not source_path.exists():
+            return False
+        with self._lock:
+            target_path = self._index_path(target_collection)
+            tmp_path = target_path.with_suffix(".tmp")
+            shutil.copyfile(source_path, tmp_path)
+            tmp_path.replace(target_path)
+            self._indexes.pop(target_collection, None)
+        return True
+
+    def candidates(self, collection_name: str, metadata_filter: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        메타데이터 필터를 만족하는 Chroma 문서 ID 목록 (문서 순서). 색인이 없거나 색인으로 판단할 수 없는 필터면 None
+        (metadata_filter가 없으면 후보를 좁힐 수 없으므로 None)
+        위치 계산과 ID 조회를 같은 색인 스냅샷에서 하므로, 그 사이에 구축이 색인을 교체해도 어긋나지 않습니다.
+        """
+        if not metadata_filter:
+            return None
+        index = self._load(collection_name)
+        if index is None:
+            return None
+        positions = index.match_where(metadata_filter)
+        if positions is None:
+            return None
+        return [index.ids[p] for p in positions.tolist()]
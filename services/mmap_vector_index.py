@@ -0,0 +1,496 @@
+# services/mmap_vector_index.py
+
+import json
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+VECTOR_DTYPES = ("float16", "int8")
+
+_CONTENT_COLUMN = "__page_content__"
+_ID_COLUMN = "__id__"
+_RESERVED_COLUMNS = (_CONTENT_COLUMN, _ID_COLUMN)
+# float16/int8 행을 float32로 바꿔 곱할 때 한 번에 처리할 행 수
+# (변환한 블록이 CPU 캐시에 남아 있는 동안 곱하도록 작게 유지, 1536차원 기준 약 1.5MB)
+_MATMUL_BLOCK_ROWS = 256
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    정규화된 float32 벡터를 저장용 dtype으로 변환합니다.
+    - float16: 그대로 반정밀도로 저장 (scales 없음)
+    - int8: 행별 대칭 양자화 (값 / scale, scale = max|v| / 127)
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class _MmapCollection:
+    """
+    컬렉션 하나의 memory-mapped 벡터 행렬과 열 기반 메타데이터입니다.
+    - vectors.npy: (문서 수, 차원) float16 또는 int8 행렬 (np.load mmap_mode="r"로 열어 필요한 페이지만 읽음)
+    - scales.npy: int8일 때 행별 역양자화 배율
+    - meta.pkl: 본문 + 문서 ID + 메타데이터 열 (pandas Categorical)
+    메타데이터 조건은 (열, 값)마다 packbits 비트마스크로 만들어 캐시하고, AND/OR는 비트 연산으로 합칩니다.
+    float32로 바꾼 행렬이 float32_cache_bytes 이하이면 첫 검색 때 역양자화한 float32 사본을 메모리에 만들어 재사용합니다.
+    (그보다 크면 매 검색마다 작은 블록 단위로 변환하며 곱함)
+    """
+    def __init__(self, path: Path, float32_cache_bytes: int = 0):
+        self.path = path
+        self.vectors: np.ndarray = np.load(path / "vectors.npy", mmap_mode="r")
+        scales_path = path / "scales.npy"
+        self.scales: Optional[np.ndarray] = np.load(scales_path) if scales_path.exists() else None
+        self.df: pd.DataFrame = pd.read_pickle(path / "meta.pkl")
+        self._masks: Dict[Tuple[str, str, Any], np.ndarray] = {}
+        self._positions: Optional[Dict[str, int]] = None
+        self._float32: Optional[np.ndarray] = None
+        self._float32_cacheable = 0 < self.vectors.shape[0] * self.vectors.shape[1] * 4 <= float32_cache_bytes
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    # --- 비트마스크 사전 필터 ---
+
+    def _packed(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
+
+    def _all(self) -> np.ndarray:
+        return self._packed(np.ones(len(self), dtype=bool))
+
+    def _column_mask(self, column: str, op: str, value: Any) -> np.ndarray:
+        key = (column, op, value if not isinstance(value, list) else tuple(value))
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+        if column not in self.df.columns or column in _RESERVED_COLUMNS:
+            hits = np.zeros(len(self), dtype=bool)
+            if op in ("$ne", "$nin"):
+                hits = ~hits
+        else:
+            series = self.df[column]
+            categories = series.cat.categories
+            codes = series.cat.codes.to_numpy()
+            values = value if op in ("$in", "$nin") else [value]
+            hit_codes = np.flatnonzero(categories.isin(values))
+            hits = np.isin(codes, hit_codes)
+            if op in ("$ne", "$nin"):
+                hits = ~hits
+        mask = self._packed(hits)
+        with self._lock:
+            self._masks[key] = mask
+        return mask
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Chroma where 형식({"열": 값}, {"열": {"$eq": 값}}, {"$and"/"$or": [...]})을 비트마스크로 평가합니다."""
+        packed = self._all()
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                masks = [self._where_mask(sub) for sub in condition]
+                combined = masks[0]
+                for mask in masks[1:]:
+                    combined = (combined & mask) if key == "$and" else (combined | mask)
+                packed = packed & combined
+            elif isinstance(condition, dict):
+                for op, value in condition.items():
+                    if op not in ("$eq", "$ne", "$in", "$nin"):
+                        raise ValueError(f"mmap 백엔드에서 지원하지 않는 메타데이터 연산자입니다: {op}")
+                    packed = packed & self._column_mask(key, op, value)
+            else:
+                packed = packed & self._column_mask(key, "$eq", condition)
+        return packed
+
+    def _document_mask(self, where_document: Dict[str, Any]) -> np.ndarray:
+        """Chroma where_document 형식({"$contains": 문자열}, {"$and"/"$or": [...]})을 비트마스크로 평가합니다."""
+        packed = self._all()
+        for key, condition in where_document.items():
+            if key in ("$and", "$or"):
+                masks = [self._document_mask(sub) for sub in condition]
+                combined = masks[0]
+                for mask in masks[1:]:
+                    combined = (combined & mask) if key == "$and" else (combined | mask)
+                packed = packed & combined
+            elif key in ("$contains", "$not_contains"):
+                hits = self.df[_CONTENT_COLUMN].str.contains(condition, regex=False).to_numpy(dtype=bool)
+                packed = packed & self._packed(hits if key == "$contains" else ~hits)
+            else:
+                raise ValueError(f"mmap 백엔드에서 지원하지 않는 문서 필터 연산자입니다: {key}")
+        return packed
+
+    def candidates(self, where: Optional[Dict[str, Any]], where_document: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """필터를 만족하는 행 위치 (필터가 없으면 None = 전체)"""
+        if not where and not where_document:
+            return None
+        packed = self._all()
+        if where:
+            packed = packed & self._where_mask(where)
+        if where_document:
+            packed = packed & self._document_mask(where_document)
+        return np.flatnonzero(np.unpackbits(packed, count=len(self)))
+
+    # --- 검색 ---
+
+    def _float32_matrix(self) -> Optional[np.ndarray]:
+        """역양자화한 float32 행렬 사본 (캐시 한도를 넘는 컬렉션은 None)"""
+        if self._float32 is None and self._float32_cacheable:
+            with self._lock:
+                if self._float32 is None:
+                    matrix = np.asarray(self.vectors, dtype=np.float32)
+                    if self.scales is not None:
+                        matrix *= self.scales[:, None]
+                    self._float32 = matrix
+        return self._float32
+
+    def rows(self, positions: Optional[np.ndarray]) -> np.ndarray:
+        """해당 행들의 벡터를 float32로 역양자화해 반환합니다."""
+        matrix = self._float32_matrix()
+        if matrix is not None:
+            return matrix if positions is None else matrix[positions]
+        block = self.vectors if positions is None else self.vectors[positions]
+        block = np.asarray(block, dtype=np.float32)
+        if self.scales is not None:
+            scales = self.scales if positions is None else self.scales[positions]
+            block = block * scales[:, None]
+        return block
+
+    def scores(self, query: np.ndarray, positions: Optional[np.ndarray]) -> np.ndarray:
+        """행렬 × 질의 벡터 곱으로 코사인 유사도를 계산합니다. (저장 벡터는 정규화되어 있음)"""
+        matrix = self._float32_matrix()
+        if matrix is not None:
+            return (matrix if positions is None else matrix[positions]) @ query
+        total = len(self) if positions is None else len(positions)
+        raw = np.empty(total, dtype=np.float32)
+        # 변환 버퍼 하나를 재사용해 블록마다 float32로 바꾼 뒤 바로 곱합니다. (전체 float32 사본을 만들지 않음)
+        buffer = np.empty((min(_MATMUL_BLOCK_ROWS, total), self.vectors.shape[1]), dtype=np.float32)
+        for start in range(0, total, _MATMUL_BLOCK_ROWS):
+            end = min(start + _MATMUL_BLOCK_ROWS, total)
+            block = buffer[:end - start]
+            np.copyto(block, self.vectors[start:end] if positions is None else self.vectors[positions[start:end]])
+            np.matmul(block, query, out=raw[start:end])
+        if self.scales is not None:
+            raw *= self.scales if positions is None else self.scales[positions]
+        return raw
+
+    def ids(self) -> List[Optional[str]]:
+        if _ID_COLUMN not in self.df.columns:
+            return [None] * len(self)
+        return [doc_id if pd.notna(doc_id) else None for doc_id in self.df[_ID_COLUMN]]
+
+    def position_map(self) -> Dict[str, int]:
+        """문서 ID → 행 위치 (ID 없이 구축된 이전 색인은 행 위치가 ID)"""
+        if self._positions is None:
+            self._positions = {
+                doc_id if doc_id is not None else str(i): i for i, doc_id in enumerate(self.ids())
+            }
+        return self._positions
+
+    def positions(self, ids: Sequence[str]) -> np.ndarray:
+        """문서 ID들의 행 위치 (주어진 순서, 없는 ID는 제외)"""
+        position_of = self.position_map()
+        return np.asarray([position_of[doc_id] for doc_id in ids if doc_id in position_of], dtype=np.int64)
+
+    def documents(self, positions: np.ndarray) -> List[Document]:
+        rows = self.df.iloc[positions]
+        ids = rows[_ID_COLUMN].tolist() if _ID_COLUMN in rows.columns else [None] * len(rows)
+        # 행마다 Series를 만드는 iterrows 대신 열 단위로 값을 꺼내 조립합니다. (top-k 조립이 행렬곱보다 느렸음)
+        columns = {column: rows[column].tolist() for column in rows.columns if column not in _RESERVED_COLUMNS}
+        documents = []
+        for i, (content, doc_id) in enumerate(zip(rows[_CONTENT_COLUMN].tolist(), ids)):
+            metadata = {
+                key: (values[i].item() if isinstance(values[i], np.generic) else values[i])
+                for key, values in columns.items() if pd.notna(values[i])
+            }
+            documents.append(Document(
+                page_content=content, metadata=metadata, id=doc_id if pd.notna(doc_id) else None
+            ))
+        return documents
+
+
+class MmapVectorIndexService:
+    """
+    Chroma(HNSW + SQLite) 대신 사용할 수 있는 프로세스 내 정확(exact) top-k 벡터 색인입니다.
+    `{INDEX_PATH}/mmap/{컬렉션}/` 에 float16 또는 int8 행렬과 열 기반 메타데이터를 저장하고,
+    검색은 (비트마스크 사전 필터 →) NumPy 행렬곱 한 번 + argpartition 으로 수행합니다.
+    어떤 컬렉션에 사용할지는 VECTOR_BACKENDS 설정으로 컬렉션별로 선택합니다.
+    """
+    def __init__(self, index_dir: str, dtype: str = "float16", float32_cache_bytes: int = 0):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"지원하지 않는 벡터 저장 형식입니다: {dtype} (가능한 값: {', '.join(VECTOR_DTYPES)})")
+        self.index_dir = Path(index_dir) / "mmap"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.dtype = dtype
+        self.float32_cache_bytes = float32_cache_bytes
+        self._collections: Dict[str, _MmapCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection_path(self, collection_name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", collection_name)
+        return self.index_dir / safe_name
+
+    def has_index(self, collection_name: str) -> bool:
+        return collection_name in self._collections or (self._collection_path(collection_name) / "info.json").exists()
+
+    def list_collections(self) -> List[str]:
+        names = []
+        for info_path in self.index_dir.glob("*/info.json"):
+            names.append(json.loads(info_path.read_text(encoding="utf-8"))["collection"])
+        return names
+
+    def count(self, collection_name: str) -> int:
+        collection = self._load(collection_name)
+        return len(collection) if collection is not None else 0
+
+    def _load(self, collection_name: str) -> Optional[_MmapCollection]:
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+        path = self._collection_path(collection_name)
+        if not (path / "info.json").exists():
+            return None
+        with self._lock:
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                collection = _MmapCollection(path, self.float32_cache_bytes)
+                self._collections[collection_name] = collection
+        return collection
+
+    @staticmethod
+    def _to_frame(documents: Sequence[Document], ids: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        df = pd.DataFrame.from_records([doc.metadata for doc in documents])
+        df = df.apply(lambda col: col.astype("category")) if not df.empty else pd.DataFrame(index=range(len(documents)))
+        df[_CONTENT_COLUMN] = [doc.page_content for doc in documents]
+        df[_ID_COLUMN] = list(ids) if ids is not None else [doc.id for doc in documents]
+        return df
+
+    @staticmethod
+    def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        # 열 집합이 다른 문서들도 하나의 표로 합칩니다. (없는 열은 NaN)
+        df = pd.concat([frame.astype("object") for frame in frames], ignore_index=True)
+        return df.apply(lambda col: col if col.name in _RESERVED_COLUMNS else col.astype("category"))
+
+    def _write(
+        self,
+        collection_name: str,
+        blocks: List[np.ndarray],
+        scales: Optional[np.ndarray],
+        df: pd.DataFrame
+    ) -> int:
+        """
+        행렬 블록들을 이어 붙인 새 색인 디렉토리를 만든 뒤 교체합니다. (self._lock 안에서 호출)
+        검색 중인 요청은 교체 전까지 이전 파일을 계속 읽습니다.
+        """
+        total = sum(len(block) for block in blocks)
+        path = self._collection_path(collection_name)
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+
+        matrix = np.lib.format.open_memmap(
+            tmp_path / "vectors.npy", mode="w+", dtype=blocks[0].dtype, shape=(total, blocks[0].shape[1])
+        )
+        offset = 0
+        for block in blocks:
+            matrix[offset:offset + len(block)] = block
+            offset += len(block)
+        matrix.flush()
+        del matrix
+
+        if scales is not None:
+            np.save(tmp_path / "scales.npy", scales)
+        df.to_pickle(tmp_path / "meta.pkl")
+        (tmp_path / "info.json").write_text(
+            json.dumps({"collection": collection_name, "dtype": str(blocks[0].dtype), "count": total}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+
+        shutil.rmtree(path, ignore_errors=True)
+        tmp_path.replace(path)
+        self._collections[collection_name] = _MmapCollection(path, self.float32_cache_bytes)
+        return total
+
+    def _existing(self, collection_name: str) -> Optional[_MmapCollection]:
+        """self._lock 안에서 현재 컬렉션을 엽니다."""
+        existing = self._collections.get(collection_name)
+        if existing is None:
+            path = self._collection_path(collection_name)
+            existing = _MmapCollection(path, self.float32_cache_bytes) if (path / "info.json").exists() else None
+        return existing
+
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: Iterable[Document],
+        embeddings: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+        replace: bool = False
+    ) -> int:
+        """
+        문서와 (이미 계산된) 임베딩을 컬렉션 색인에 추가하고 저장합니다.
+        기존 행렬 뒤에 이어 붙인 새 파일을 만든 뒤 교체합니다. (ids를 생략하면 Document.id 사용)
+        """
+        documents = list(documents)
+        if len(documents) != len(embeddings):
+            raise ValueError("문서 수와 임베딩 수가 다릅니다.")
+        new_vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        new_vectors, new_scales = quantize(new_vectors / norms, self.dtype)
+
+        with self._lock:
+            existing = None if replace else self._existing(collection_name)
+            if existing is not None and existing.vectors.dtype != new_vectors.dtype:
+                raise ValueError(
+                    f"컬렉션 '{collection_name}'은 {existing.vectors.dtype} 형식으로 저장되어 있습니다. (replace=True로 다시 구축하세요)"
+                )
+            new_df = self._to_frame(documents, ids)
+            if existing is not None:
+                blocks = [existing.vectors, new_vectors]
+                scales = None
+                if new_scales is not None:
+                    scales = np.concatenate([existing.scales, new_scales])
+                df = self._concat_frames([existing.df, new_df])
+            else:
+                blocks, scales, df = [new_vectors], new_scales, new_df
+            total = self._write(collection_name, blocks, scales, df)
+        print(f"✅ 컬렉션 '{collection_name}' mmap 벡터 색인 갱신 완료 (총 {total}개, {self.dtype})")
+        return total
+
+    def documents(self, collection_name: str) -> List[Document]:
+        """저장된 모든 문서 (BM25 색인 재생성 등에 사용)"""
+        collection = self._load(collection_name)
+        return collection.documents(np.arange(len(collection))) if collection is not None else []
+
+    def get(
+        self,
+        collection_name: str,
+        ids: Sequence[str],
+        document_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """해당 ID의 문서를 주어진 순서대로 반환합니다. (없는 ID와 document_filter에 맞지 않는 문서는 제외)"""
+        collection = self._load(collection_name)
+        if collection is None:
+            return []
+        positions = collection.positions(ids)
+        if document_filter:
+            positions = positions[np.isin(positions, collection.candidates(None, document_filter))]
+        return collection.documents(positions)
+
+    def embeddings(self, collection_name: str, ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """해당 ID의 저장된 벡터를 float32로 역양자화해 반환합니다. (없는 ID는 제외)"""
+        collection = self._load(collection_name)
+        if collection is None:
+            return {}
+        position_of = collection.position_map()
+        found = [doc_id for doc_id in ids if doc_id in position_of]
+        if not found:
+            return {}
+        rows = collection.rows(np.asarray([position_of[doc_id] for doc_id in found], dtype=np.int64))
+        return dict(zip(found, rows))
+
+    def delete(self, collection_name: str, ids: Iterable[str]) -> int:
+        """해당 ID의 문서를 색인에서 지웁니다. (남은 행만으로 새 파일을 만들어 교체)"""
+        removed = set(ids)
+        with self._lock:
+            existing = self._existing(collection_name)
+            if existing is None or not removed:
+                return 0
+            keep = np.flatnonzero([doc_id not in removed for doc_id in existing.ids()])
+            if len(keep) == len(existing):
+                return 0
+            if len(keep) == 0:
+                self._collections.pop(collection_name, None)
+                shutil.rmtree(self._collection_path(collection_name), ignore_errors=True)
+                return len(existing)
+            scales = existing.scales[keep] if existing.scales is not None else None
+            df = self._concat_frames([existing.df.iloc[keep]])
+            self._write(collection_name, [np.asarray(existing.vectors[keep])], scales, df)
+        return len(existing) - len(keep)
+
+    def update_metadata(self, collection_name: str, documents: Sequence[Document]) -> int:
+        """Document.id가 같은 행의 메타데이터만 바꿉니다. (벡터는 그대로 복사)"""
+        updates = {doc.id: doc for doc in documents}
+        with self._lock:
+            existing = self._existing(collection_name)
+            if existing is None or not updates:
+                return 0
+            positions = np.arange(len(existing))
+            current = existing.documents(positions)
+            changed = 0
+            for i, doc_id in enumerate(existing.ids()):
+                if doc_id in updates:
+                    current[i] = updates[doc_id]
+                    changed += 1
+            if changed:
+                self._write(collection_name, [existing.vectors], existing.scales, self._to_frame(current))
+        return changed
+
+    def ids(self, collection_name: str) -> List[Optional[str]]:
+        collection = self._load(collection_name)
+        return collection.ids() if collection is not None else []
+
+    def drop(self, collection_name: str) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            shutil.rmtree(self._collection_path(collection_name), ignore_errors=True)
+
+    def copy(self, source_collection: str, target_collection: str) -> bool:
+        """색인 디렉토리를 다른 컬렉션 이름으로 복사합니다. (blue/green 구축용, 원본이 없으면 False)"""
+        with self._lock:
+            source_path = self._collection_path(source_collection)
+            if not (source_path / "info.json").exists():
+                return False
+            path = self._collection_path(target_collection)
+            tmp_path = path.with_name(path.name + ".tmp")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.copytree(source_path, tmp_path)
+            info = json.loads((tmp_path / "info.json").read_text(encoding="utf-8"))
+            info["collection"] = target_collection
+            (tmp_path / "info.json").write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+            shutil.rmtree(path, ignore_errors=True)
+            tmp_path.replace(path)
+            self._collections.pop(target_collection, None)
+        return True
+
+    def search(
+        self,
+        collection_name: str,
+        query_embedding: Sequence[float],
+        k: int = 20,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        document_filter: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> Tuple[List[Document], Optional[np.ndarray]]:
+        """
+        코사인 유사도 상위 k개 문서를 반환합니다. (include_embeddings=True면 MMR용 후보 벡터도 함께)
+        """
+        collection = self._load(collection_name)
+        if collection is None or len(collection) == 0:
+            return [], (np.empty((0, 0), dtype=np.float32) if include_embeddings else None)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        positions = collection.candidates(metadata_filter, document_filter)
+        if positions is not None and len(positions) == 0:
+            return [], (np.empty((0, len(query)), dtype=np.float32) if include_embeddings else None)
+
+        scores = collection.scores(query, positions)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if positions is None else positions[top]
+
+        documents = collection.documents(rows)
+        return documents, (collection.rows(rows) if include_embeddings else None)
@@ -3,6 +3,7 @@
 import fitz  # PyMuPDF
 import pdfplumber
 from pathlib import Path
+from core.metrics import timed_stage, track_stage
 
 class OcrProcessingService:
     def __init__(self, upload_dir: str = "uploads"):
@@ -11,23 +12,27 @@ class OcrProcessingService:
         # EasyOCR 제거로 인해 초기화 과정이 매우 가벼워졌습니다.
         print("✅ OcrProcessingService 초기화 완료 (PDF 좌표 기반 모드)")
 
+    @timed_stage("ocr")
     def process_pdf_for_credits(self, pdf_path: str) -> dict:
         """
         PDF 학점표를 받아 좌표 기반으로 데이터를 정밀 추출하여 dict를 반환합니다.
         Router에서 호출하는 메인 진입점입니다.
         """
         # 1. '이수학점 비교' 표의 좌표(Bounding Box) 찾기
-        bbox, page_index = self._find_table_coordinates(pdf_path, keyword="이수학점 비교")
+        with track_stage("ocr", "find_table"):
+            bbox, page_index = self._find_table_coordinates(pdf_path, keyword="이수학점 비교")
         
         if not bbox:
             # Router의 404 처리를 위해 ValueError 발생
             raise ValueError("PDF에서 '이수학점 비교' 키워드나 관련 테이블을 찾을 수 없습니다.")
 
         # 2. 해당 좌표의 데이터를 텍스트/테이블로 추출
-        extracted_rows = self._extract_data_from_bbox(pdf_path, bbox, page_index)
+        with track_stage("ocr", "extract_rows"):
+            extracted_rows = self._extract_data_from_bbox(pdf_path, bbox, page_index)
         
         # 3. 요청된 JSON 포맷으로 파싱
-        final_data = self._parse_rows_to_json(extracted_rows)
+        with track_stage("ocr", "parse_rows"):
+            final_data = self._parse_rows_to_json(extracted_rows)
         
         return final_data
 
@@ -0,0 +1,151 @@
+# services/question_parser.py
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from services.course_table_service import ColumnCondition
+
+logger = logging.getLogger(__name__)
+
+# 'key':'value' 패턴 (작은따옴표/큰따옴표/백틱 모두 허용)
+KEY_VALUE_PATTERN = re.compile(r"('|\"|`)([^'\"]+)\1\s*:\s*('|\"|`)([^'\"]+)\3")
+
+# 질문에서 사용하는 키 → (DB 열 이름, 필터 방식)
+# - "eq": 메타데이터 $eq 필터 (정확히 일치)
+# - "contains": 문서 본문 $contains 필터 (열 기반 표 색인에서는 해당 열의 부분 일치)
+DEFAULT_KEY_MAPPING: Dict[str, Tuple[str, str]] = {
+    "이수구분": ("이수구분", "eq"),
+    "구분": ("이수구분", "eq"),
+    "학년": ("학년", "contains"),
+    "학점": ("학점 (인원)", "contains"),
+    "인원": ("학점 (인원)", "contains"),
+    "강의시간": ("강의시간", "contains"),
+    "시간": ("강의시간", "contains"),
+    "요일": ("강의시간", "contains"),
+    "제목": ("제목", "contains"),
+    "교과목명": ("교과목명", "contains"),
+    "과목명": ("교과목명", "contains"),
+    "담당교수": ("담당교수", "contains"),
+    "교수": ("담당교수", "contains"),
+    "강의실": ("강의실", "contains"),
+    "학수번호": ("학수번호", "contains"),
+}
+
+
+@dataclass(frozen=True)
+class ParsedQuestion:
+    """
+    질문 파싱 결과입니다. LRU 캐시에 보관되어 여러 요청이 같은 객체를 공유하므로
+    필터 딕셔너리는 읽기 전용으로만 사용해야 합니다.
+    """
+    metadata_filter: Optional[dict]
+    document_filter: Optional[dict]
+    search_query: str
+    conditions: Tuple[ColumnCondition, ...] = ()
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(self.metadata_filter or self.document_filter)
+
+
+def load_key_mapping(path: Optional[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    기본 키 매핑에 JSON 파일의 매핑을 덮어씁니다.
+    파일 형식: {"질문 키": ["DB 열 이름", "eq" | "contains"], ...}
+    """
+    mapping = dict(DEFAULT_KEY_MAPPING)
+    if path and Path(path).exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for key, (column, op) in json.load(f).items():
+                if op not in ("eq", "contains"):
+                    raise ValueError(f"지원하지 않는 필터 방식입니다: {key} → {op}")
+                mapping[key] = (column, op)
+    return mapping
+
+
+def _combine(conditions: list, operator: str) -> Optional[dict]:
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {operator: conditions}
+
+
+class QuestionFilterParser:
+    """
+    질문을 (메타데이터 필터, 문서내용 필터, 순수 검색어, 열 조건)으로 분리하는 파서입니다.
+    - 정규식과 키 매핑은 생성 시 한 번만 준비합니다.
+    - 같은 질문의 파싱 결과는 LRU 캐시로 재사용합니다.
+    - 1. 'key':'value' 패턴이 없으면: 필터 없이 질문 전체를 검색어로 사용 (BM25 + 벡터 하이브리드 검색)
+    - 2. 'key':'value' 패턴이 있으면: 해당 $eq, $contains 필터와 열 조건 생성
+    """
+    def __init__(
+        self,
+        key_mapping: Optional[Dict[str, Tuple[str, str]]] = None,
+        cache_size: int = 1024,
+        min_search_query_length: int = 5,
+        fallback_search_query: str = "과목 추천"
+    ):
+        self.key_mapping = dict(key_mapping or DEFAULT_KEY_MAPPING)
+        self.min_search_query_length = min_search_query_length
+        self.fallback_search_query = fallback_search_query
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, question: str) -> ParsedQuestion:
+        return self._parse_cached(question)
+
+    def cache_info(self):
+        return self._parse_cached.cache_info()
+
+    def _parse(self, question: str) -> ParsedQuestion:
+        matches = KEY_VALUE_PATTERN.findall(question)
+        if not matches:
+            # Case 1: 'key':'value' 패턴이 없는 일반 질문
+            return ParsedQuestion(None, None, question)
+
+        # Case 2: 'key':'value' 패턴이 있는 필터 질문
+        metadata_conditions = []
+        document_conditions = []
+        column_conditions = []
+        ignored_keys = []
+
+        for match in matches:
+            key = match[1].strip()
+            value = match[3].strip()
+
+            spec = self.key_mapping.get(key)
+            if not spec:
+                ignored_keys.append(key)
+                continue
+
+            column, op = spec
+            if op == "eq":
+                metadata_conditions.append({column: {"$eq": value}})
+            else:
+                document_conditions.append({"$contains": value})
+            column_conditions.append((column, op, value))
+
+        metadata_filter = _combine(metadata_conditions, "$and")
+        document_filter = _combine(document_conditions, "$and")
+
+        # 순수 검색어 추출
+        search_query = KEY_VALUE_PATTERN.sub('', question).strip()
+        if len(search_query) < self.min_search_query_length:
+            search_query = self.fallback_search_query
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("question_filter_parsed %s", json.dumps({
+                "where": metadata_filter,
+                "where_document": document_filter,
+                "search_query": search_query,
+                "ignored_keys": ignored_keys,
+            }, ensure_ascii=False))
+
+        if not metadata_filter and not document_filter:
+            return ParsedQuestion(None, None, search_query)
+        return ParsedQuestion(metadata_filter, document_filter, search_query, tuple(column_conditions))
@@ -0,0 +1,73 @@
+# services/reranker.py
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 요청별로 선택할 수 있는 재순위 방식
+# - "none": 기존 유사도 검색 결과를 그대로 사용
+# - "mmr" : 후보 문서와 저장된 임베딩을 함께 가져와 MMR로 다양한 top-k 선택
+RERANK_MODES = ("none", "mmr")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_rerank(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5,
+) -> np.ndarray:
+    """
+    Maximal Marginal Relevance로 후보 중 k개를 골라 선택 순서대로 인덱스 배열을 반환합니다.
+    score(d) = λ·sim(q, d) − (1−λ)·max_{s∈선택됨} sim(d, s)
+
+    질의-후보, 후보-후보 코사인 유사도 행렬을 한 번에 계산하고,
+    각 단계에서는 "선택된 문서와의 최대 유사도" 벡터만 np.maximum으로 갱신합니다.
+    (LangChain 구현처럼 단계마다 유사도 행렬을 다시 계산하지 않음)
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or len(candidates) == 0 or k <= 0:
+        return np.array([], dtype=np.int64)
+    k = min(k, len(candidates))
+
+    candidates = _normalize_rows(candidates)
+    query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+
+    query_sim = candidates @ query                  # (n,)
+    pairwise_sim = candidates @ candidates.T        # (n, n)
+
+    selected = np.empty(k, dtype=np.int64)
+    available = np.ones(len(candidates), dtype=bool)
+    max_sim_to_selected = np.full(len(candidates), -np.inf, dtype=np.float32)
+
+    first = int(np.argmax(query_sim))
+    selected[0] = first
+    available[first] = False
+    np.maximum(max_sim_to_selected, pairwise_sim[first], out=max_sim_to_selected)
+
+    for step in range(1, k):
+        scores = lambda_mult * query_sim - (1.0 - lambda_mult) * max_sim_to_selected
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        np.maximum(max_sim_to_selected, pairwise_sim[best], out=max_sim_to_selected)
+    return selected
+
+
+def mean_pairwise_similarity(embeddings: Sequence[Sequence[float]], indexes: Optional[Sequence[int]] = None) -> float:
+    """선택된 문서들 사이의 평균 코사인 유사도 (낮을수록 다양함, 벤치마크/로그용)"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if indexes is not None:
+        matrix = matrix[np.asarray(indexes, dtype=np.int64)]
+    if len(matrix) < 2:
+        return 0.0
+    matrix = _normalize_rows(matrix)
+    sim = matrix @ matrix.T
+    n = len(matrix)
+    return float((sim.sum() - np.trace(sim)) / (n * (n - 1)))
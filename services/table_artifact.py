@@ -0,0 +1,94 @@
+# services/table_artifact.py
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pyarrow as pa
+
+# 표 행 하나(row)는 {"source", "page", "type", "제목", 열 이름: 값, ...} 딕셔너리입니다. (값이 비어 있는 셀은 없음)
+TABLE_ROW_TYPE = "table_kv"
+TABLE_METADATA_COLUMNS = ("source", "page", "type", "제목")
+# 행마다 원래 표의 열 순서(스키마 메타데이터 layouts의 번호)를 가리키는 열
+_LAYOUT_COLUMN = "__layout__"
+_BATCH_ROWS = 4096
+
+
+def table_row_sentence(row: Dict[str, Any]) -> str:
+    """
+    임베딩할 문장 `제목: ..., 열: 값, ...` 을 만듭니다.
+    (예전 RAG-TXT 한 줄에서 앞의 JSON 메타데이터를 뺀 것과 같은 문장, 원래 표의 열 순서 유지)
+    """
+    cells = ", ".join(f"{key}: {value}" for key, value in row.items() if key not in TABLE_METADATA_COLUMNS)
+    return f"제목: {row['제목']}, {cells}"
+
+
+def write_table_artifact(path: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    표 행들을 열 기반 Arrow IPC 파일(.arrow)로 씁니다. 반환값: 행 수
+    - source / type / 제목은 사전 인코딩 문자열, page는 int32, 표의 열은 열마다 하나의 문자열 열(없는 셀은 null)
+    - 표마다 열 구성과 순서가 다르므로, 행별 열 순서는 스키마 메타데이터(layouts)에 따로 기록합니다.
+    """
+    rows = list(rows)
+    layouts: Dict[tuple, int] = {}
+    columns: Dict[str, List[Any]] = {name: [] for name in (*TABLE_METADATA_COLUMNS, _LAYOUT_COLUMN)}
+    for i, row in enumerate(rows):
+        layout = tuple(key for key in row if key not in TABLE_METADATA_COLUMNS)
+        columns[_LAYOUT_COLUMN].append(layouts.setdefault(layout, len(layouts)))
+        for name in TABLE_METADATA_COLUMNS:
+            columns[name].append(row.get(name))
+        for name in layout:
+            # 처음 보는 열은 앞 행들을 null로 채워 만듭니다.
+            columns.setdefault(name, [None] * i).append(row[name])
+        for name, values in columns.items():
+            if len(values) == i:
+                values.append(None)
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    fields = [
+        pa.field("source", dictionary),
+        pa.field("page", pa.int32()),
+        pa.field("type", dictionary),
+        pa.field("제목", dictionary),
+        pa.field(_LAYOUT_COLUMN, pa.int32()),
+    ]
+    fields += [pa.field(name, pa.string()) for name in columns if name not in TABLE_METADATA_COLUMNS + (_LAYOUT_COLUMN,)]
+    schema = pa.schema(fields, metadata={"layouts": json.dumps([list(layout) for layout in layouts], ensure_ascii=False)})
+    table = pa.Table.from_pydict({field.name: columns[field.name] for field in fields}, schema=schema)
+
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table, max_chunksize=_BATCH_ROWS)
+    tmp_path.replace(path)
+    return len(rows)
+
+
+def iter_table_artifact(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    .arrow 표 파일을 memory-map으로 열어 (복사 없이 읽고) 행 딕셔너리를 원래 열 순서대로 내보냅니다.
+    레코드 배치 단위로 필요한 열만 파이썬 값으로 바꾸므로 파일 전체를 한 번에 올리지 않습니다.
+    """
+    with pa.memory_map(str(path), "r") as source:
+        reader = pa.ipc.open_file(source)
+        layouts = [TABLE_METADATA_COLUMNS + tuple(layout) for layout in json.loads(reader.schema.metadata[b"layouts"])]
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            layout_ids = batch.column(_LAYOUT_COLUMN).to_pylist()
+            values: Dict[str, List[Any]] = {}
+            for layout_id in set(layout_ids):
+                for name in layouts[layout_id]:
+                    if name not in values:
+                        column = batch.column(name)
+                        # 사전 인코딩 열은 먼저 풀어야 파이썬 값 변환이 빠릅니다.
+                        if pa.types.is_dictionary(column.type):
+                            column = column.dictionary_decode()
+                        values[name] = column.to_pylist()
+            # 레이아웃(열 순서)별 (열 이름, 값 목록)을 한 번만 준비하고 행은 zip으로 만듭니다.
+            prepared = {
+                layout_id: (layouts[layout_id], [values[name] for name in layouts[layout_id]])
+                for layout_id in set(layout_ids)
+            }
+            for r, layout_id in enumerate(layout_ids):
+                names, columns = prepared[layout_id]
+                yield dict(zip(names, [column[r] for column in columns]))
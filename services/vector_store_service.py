@@ -1,103 +1,625 @@
 # services/vector_store_service.py
 
-from langchain_community.document_loaders import TextLoader
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
 from langchain.text_splitter import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from core.config import settings
+from core.request_stats import record_retrieval
+from core.metrics import record_event, timed_stage, track_stage
+from core.streaming import iterate_in_thread
 from models.llm_factory import embedding_model
-from typing import List, Optional, Dict, Any  # 👈 [수정]
+from services.chroma_registry import ChromaRegistry
+from services.collection_alias_service import CollectionAliasService, generation_base
+from services.keyword_index_service import KeywordIndexService, reciprocal_rank_fusion
+from services.course_table_service import CourseTableService
+from services.embedding_pipeline import EmbeddingPipeline
+from services.ingestion_manifest import IngestionManifest, chunk_ids, metadata_fingerprint
+from services.metadata_index_service import MetadataIndexService
+from services.mmap_vector_index import MmapVectorIndexService
+from services.reranker import mmr_rerank
+from services.table_artifact import iter_table_artifact, table_row_sentence
+from typing import List, Optional, Dict, Any, Tuple, Callable, AsyncIterable, Iterable  # 👈 [수정]
+
+
+@dataclass
+class BuildPlan:
+    """소스 하나를 다시 구축할 때 벡터 저장소/보조 색인에 반영할 청크 변경분"""
+    source: str
+    current: Dict[str, Dict[str, str]]
+    total: int
+    added: List[Document]
+    updated: List[Document]
+    deleted: List[str]
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "updated": len(self.updated),
+            "unchanged": self.total - len(self.added) - len(self.updated),
+            "deleted": len(self.deleted),
+        }
+
+
+class MarkdownSectionSplitter:
+    """
+    Markdown 텍스트를 조각(파일 전체 또는 페이지)으로 받아 '# 헤더' 구역이 끝날 때마다 청크로 나눕니다.
+    MarkdownHeaderTextSplitter는 제목이 같은 구역의 본문이 이어지면(사이에 빈 구역만 있으면) 하나로 합치므로,
+    본문의 제목이 바뀌는 곳에서만 끊어 전체 텍스트를 한 번에 나눈 결과와 같은 청크를 만듭니다.
+    """
+    def __init__(self):
+        self.header_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=[("#", "Header 1")])
+        self.char_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._section: List[str] = []
+        self._pending = ""
+        # 마지막 헤더 제목 / 모아 둔 본문의 제목 / 마지막 본문 이후 헤더가 시작된 위치
+        self._title: Optional[str] = None
+        self._content_title: Optional[str] = None
+        self._has_content = False
+        self._tail_start: Optional[int] = None
+        self._opening_fence = ""
+
+    def _split(self, lines: List[str]) -> List[Document]:
+        return self.char_splitter.split_documents(self.header_splitter.split_text("\n".join(lines)))
+
+    def _classify(self, line: str) -> Tuple[bool, Optional[str]]:
+        """(본문 줄인지, 헤더 제목) — MarkdownHeaderTextSplitter와 같은 기준 (코드 블록 안의 '#'은 헤더가 아님)"""
+        stripped = "".join(filter(str.isprintable, line.strip()))
+        if not self._opening_fence:
+            if stripped.startswith("```") and stripped.count("```") == 1:
+                self._opening_fence = "```"
+            elif stripped.startswith("~~~"):
+                self._opening_fence = "~~~"
+        elif stripped.startswith(self._opening_fence):
+            self._opening_fence = ""
+            return True, None
+        if self._opening_fence:
+            return True, None
+        if stripped.startswith("#") and (len(stripped) == 1 or stripped[1] == " "):
+            return False, stripped[1:].strip()
+        return bool(stripped), None
+
+    def feed(self, text: str) -> List[Document]:
+        """이어지는 텍스트 조각을 넣고, 끝난 구역의 청크를 돌려줍니다."""
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        chunks: List[Document] = []
+        for line in lines:
+            is_content, title = self._classify(line)
+            if title is not None:
+                self._title = title
+                if self._tail_start is None:
+                    self._tail_start = len(self._section)
+            elif is_content:
+                if self._has_content and self._title != self._content_title:
+                    # 본문 제목이 바뀌었으므로 이전 구역을 청크로 만들고, 이후 헤더 줄부터 새 구역을 시작합니다.
+                    chunks.extend(self._split(self._section[:self._tail_start]))
+                    self._section = self._section[self._tail_start:]
+                self._has_content = True
+                self._content_title = self._title
+                self._tail_start = None
+            self._section.append(line)
+        return chunks
+
+    def close(self) -> List[Document]:
+        """남은 구역을 청크로 만들고 처음 상태로 돌아갑니다."""
+        chunks = self.feed("")
+        chunks.extend(self._split(self._section + [self._pending]))
+        self._reset()
+        return chunks
+
+
+def table_row_to_document(row: Dict[str, Any]) -> Document:
+    """
+    표 행 딕셔너리(.arrow 표 파일 / 스트리밍 파이프라인)를 Document로 만듭니다.
+    - page_content는 임베딩용 문장(`제목: ..., 열: 값, ...`)이고,
+    - 메타데이터는 source / page / type / 제목과 표의 열을 파싱 없이 그대로 저장합니다. (쉼표가 든 값도 그대로)
+    """
+    return Document(page_content=table_row_sentence(row), metadata=dict(row))
+
+
+def table_line_to_document(line: str) -> Optional[Document]:
+    """
+    [이전 형식] 'Key: Value' 형태의 RAG-TXT 한 줄을 Document로 만듭니다. (.arrow 이전에 만든 .txt 파일용)
+    - 원본 텍스트 전체는 page_content에 저장하고,
+    - 파싱된 Key:Value 쌍은 metadata에 동적으로 저장합니다.
+    """
+    # 1. 원본 한 줄을 그대로 page_content로 사용합니다.
+    #    이렇게 하면 의미 기반 검색 시 모든 정보를 활용할 수 있습니다.
+    page_content = line.strip()
+    if not page_content:
+        return None
+
+    try:
+        # 2. 메타데이터 딕셔너리를 동적으로 생성합니다.
+        metadata = {}
+        parts = page_content.split(', ')
+        for part in parts:
+            if ': ' in part:
+                key, value = part.split(': ', 1)
+                metadata[key.strip()] = value.strip()
+
+        # 3. page_content와 동적으로 생성된 metadata로 Document 객체를 만듭니다.
+        return Document(page_content=page_content, metadata=metadata)
+
+    except Exception as e:
+        print(f"⚠️ 한 줄을 메타데이터로 파싱하는 중 오류가 발생했습니다 (건너뜁니다): {page_content}")
+        print(f"   오류 내용: {e}")
+        return None
+
 
 class VectorStoreService:
     def __init__(self):
         self.db_path = settings.DB_PATH
         self.embedding_model = embedding_model
+        # 벡터 DB 구축용 비동기 임베딩 (토큰 예산 배치, 동시 실행, rate limit 대응 재시도)
+        self.embedding_pipeline = EmbeddingPipeline(
+            embedding_model,
+            max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+            batch_max_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+            batch_max_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_retries=settings.EMBEDDING_MAX_RETRIES
+        )
+        # Chroma 클라이언트와 컬렉션 핸들은 프로세스 전체에서 한 번만 열어 재사용합니다.
+        self.registry = ChromaRegistry(self.db_path, self.embedding_model)
+        # 일반 질문용 BM25 키워드 색인 (where_document $or/$contains 스캔 대체)
+        self.keyword_index = KeywordIndexService(settings.INDEX_PATH)
+        # 'key':'value' 질문용 열 기반 표 색인 (RAG-TXT 표 행)
+        self.course_table = CourseTableService(settings.INDEX_PATH)
+        # 필터 질문의 후보 문서 ID를 벡터 검색 전에 계산하는 메타데이터 역색인
+        self.metadata_index = MetadataIndexService(settings.INDEX_PATH)
+        # VECTOR_BACKENDS로 "mmap"을 지정한 컬렉션용 memory-mapped 벡터 색인 (Chroma 대체)
+        self.mmap_index = MmapVectorIndexService(
+            settings.INDEX_PATH,
+            settings.MMAP_VECTOR_DTYPE,
+            float32_cache_bytes=settings.MMAP_FLOAT32_CACHE_MAX_MB * 1024 * 1024
+        )
+        # 소스 파일별로 적재한 청크 ID 기록 (재구축 시 추가/변경/삭제 판단)
+        self.manifest = IngestionManifest(settings.INDEX_PATH)
+        # 논리 컬렉션 이름(별칭) → 현재 세대 컬렉션 (blue/green 구축 후 원자적으로 전환)
+        self.aliases = CollectionAliasService(settings.INDEX_PATH)
+        self._publish_locks: Dict[str, asyncio.Lock] = {}
+        # 컬렉션별 데이터 버전 (abuild_from_stream / abuild_from_files가 쓸 때마다 증가, 답변 캐시 무효화에 사용)
+        self._collection_versions: Dict[str, int] = {}
+
+    def get_collection_version(self, collection_name: str) -> int:
+        return self._collection_versions.get(collection_name, 0)
+
+    def _bump_collection_version(self, collection_name: str) -> None:
+        self._collection_versions[collection_name] = self.get_collection_version(collection_name) + 1
+
+    def get_backend(self, collection_name: str) -> str:
+        """컬렉션의 벡터 검색 백엔드 ("chroma" | "mmap", 세대 컬렉션은 별칭에 지정한 백엔드를 따름)"""
+        backend = settings.VECTOR_BACKENDS.get(collection_name)
+        if backend is None:
+            backend = settings.VECTOR_BACKENDS.get(generation_base(collection_name), settings.VECTOR_BACKEND)
+        return backend
+
+    def resolve_collection(self, collection_name: str) -> str:
+        """별칭이면 현재 세대 컬렉션 이름으로 바꿉니다. (별칭이 아니면 그대로)"""
+        return self.aliases.resolve(collection_name)
 
     def _load_db(self, collection_name: str) -> Chroma:
         if not collection_name:
             raise ValueError("Collection name must be provided.")
-        return Chroma(
-            persist_directory=self.db_path,
-            embedding_function=self.embedding_model,
-            collection_name=collection_name
-        )
+        return self.registry.get(collection_name)
 
-    def _process_markdown_file(self, file_path: str) -> list[Document]:
-        loader = TextLoader(file_path, encoding="utf-8")
-        docs = loader.load()
-        headers_to_split_on = [("#", "Header 1")]
-        markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=headers_to_split_on)
-        md_header_splits = markdown_splitter.split_text(docs[0].page_content)
-        char_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        return char_splitter.split_documents(md_header_splits)
-
-
-    def _process_table_text_file(self, file_path: str) -> list[Document]:
-        """
-        'Key: Value' 형태의 텍스트 파일을 한 줄씩 읽어,
-        - 원본 텍스트 전체는 page_content에 저장하고,
-        - 파싱된 Key:Value 쌍은 metadata에 동적으로 저장합니다.
-        """
-        documents = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                # 1. 원본 한 줄을 그대로 page_content로 사용합니다.
-                #    이렇게 하면 의미 기반 검색 시 모든 정보를 활용할 수 있습니다.
-                page_content = line.strip()
-                if not page_content:
-                    continue
-
-                try:
-                    # 2. 메타데이터 딕셔너리를 동적으로 생성합니다.
-                    metadata = {}
-                    parts = page_content.split(', ')
-                    for part in parts:
-                        if ': ' in part:
-                            key, value = part.split(': ', 1)
-                            metadata[key.strip()] = value.strip()
-                    
-                    # 3. page_content와 동적으로 생성된 metadata로 Document 객체를 만듭니다.
-                    documents.append(Document(page_content=page_content, metadata=metadata))
-                
-                except Exception as e:
-                    print(f"⚠️ 한 줄을 메타데이터로 파싱하는 중 오류가 발생했습니다 (건너뜁니다): {page_content}")
-                    print(f"   오류 내용: {e}")
-
-        return documents
-
-    def build_from_files(self, md_path: str, txt_path: str, collection_name: str):
-        db = self._load_db(collection_name)
-        md_chunks = self._process_markdown_file(md_path)
-        txt_chunks = self._process_table_text_file(txt_path)
-        all_chunks = md_chunks + txt_chunks
+    def _stored_ids(self, collection_name: str, ids: List[str]) -> set:
+        """주어진 청크 ID 중 벡터 저장소에 실제로 있는 ID"""
+        if not ids:
+            return set()
+        if self.get_backend(collection_name) == "mmap":
+            return set(ids) & set(self.mmap_index.ids(collection_name))
+        return set(self._load_db(collection_name)._collection.get(ids=ids, include=[])["ids"])
 
-        if not all_chunks:
-            print("처리할 데이터가 없습니다.")
+    def _write_changes(self, collection_name: str, plan: BuildPlan, embeddings: List[List[float]]) -> None:
+        """계산된 임베딩과 함께 삭제/메타데이터 갱신/추가를 벡터 저장소에 반영합니다."""
+        if self.get_backend(collection_name) == "mmap":
+            self.mmap_index.delete(collection_name, plan.deleted)
+            self.mmap_index.update_metadata(collection_name, plan.updated)
+            # mmap 색인은 파일을 통째로 다시 쓰므로 한 번에 추가합니다.
+            if plan.added:
+                self.mmap_index.add_documents(collection_name, plan.added, embeddings)
             return
 
-        batch_size = 64
-        for i in range(0, len(all_chunks), batch_size):
-            batch = all_chunks[i:i + batch_size]
-            db.add_documents(batch)
-            print(f"-> {min(i + batch_size, len(all_chunks))}/{len(all_chunks)}개 문서 처리 완료...")
-        
-        print(f"\n🎉 컬렉션 '{collection_name}'의 Chroma DB 업데이트가 성공적으로 완료되었습니다!")
-    
+        collection = self._load_db(collection_name)._collection
+        if plan.deleted:
+            collection.delete(ids=plan.deleted)
+        if plan.updated:
+            # 본문이 같으므로 다시 임베딩하지 않고 메타데이터만 바꿉니다.
+            collection.update(
+                ids=[doc.id for doc in plan.updated],
+                metadatas=[doc.metadata or None for doc in plan.updated]
+            )
+        # 임베딩은 이미 계산되어 있으므로 큰 묶음으로 upsert 합니다. (Chroma 최대 배치 크기 이내)
+        batch_size = min(settings.VECTOR_UPSERT_BATCH_SIZE, self.registry.client.get_max_batch_size())
+        for i in range(0, len(plan.added), batch_size):
+            batch = plan.added[i:i + batch_size]
+            collection.upsert(
+                ids=[doc.id for doc in batch],
+                embeddings=embeddings[i:i + batch_size],
+                documents=[doc.page_content for doc in batch],
+                metadatas=[doc.metadata or None for doc in batch]
+            )
+            print(f"-> {min(i + batch_size, len(plan.added))}/{len(plan.added)}개 문서 저장 완료...")
+
+    def _update_auxiliary_indexes(self, collection_name: str, plan: BuildPlan) -> None:
+        """보조 색인에서도 바뀐 청크를 빼고 새 내용으로 다시 넣습니다."""
+        changed = plan.added + plan.updated
+        stale_ids = plan.deleted + [doc.id for doc in changed]
+        with track_stage("build_db", "keyword_index"):
+            if self.keyword_index.has_index(collection_name):
+                self.keyword_index.remove_documents(collection_name, stale_ids)
+                self.keyword_index.add_documents(collection_name, changed)
+            else:
+                self._build_keyword_index_from_collection(collection_name)
+        # 'Key: Value' 메타데이터 → 문서 ID 역색인 (필터 질문의 사전 필터)
+        with track_stage("build_db", "metadata_index"):
+            if self.metadata_index.has_index(collection_name):
+                self.metadata_index.remove_documents(collection_name, stale_ids)
+                self.metadata_index.add_documents(collection_name, [doc.id for doc in changed], changed)
+            else:
+                self._build_metadata_index_from_collection(collection_name)
+        # 표 행(RAG-TXT)은 열 기반 표 색인에도 적재
+        with track_stage("build_db", "course_table"):
+            self.course_table.remove_documents(collection_name, stale_ids)
+            self.course_table.add_documents(
+                collection_name, [doc for doc in changed if plan.current[doc.id]["kind"] != "md"]
+            )
+
+    async def _abuild_batch(
+        self,
+        collection_name: str,
+        total: BuildPlan,
+        previous: Dict[str, Dict[str, str]],
+        seen: Dict[str, int],
+        batch: List[Tuple[str, Document]],
+        progress: Callable[..., None],
+        pending: Optional[Tuple[BuildPlan, List[List[float]]]] = None
+    ) -> bool:
+        """
+        스트림에서 모은 청크 한 묶음에 ID를 붙이고, 이전 기록/저장소와 비교해 새 청크만 임베딩해 저장합니다.
+        변경분은 total에 누적합니다. pending이 있으면 저장하지 않고 (변경분, 임베딩)에 모아 둡니다.
+        반환값: 벡터 저장소에 쓴 내용이 있는지
+        """
+        docs = [doc for _, doc in batch]
+        for doc, doc_id in zip(docs, chunk_ids(total.source, docs, seen)):
+            doc.id = doc_id
+        current = {
+            doc.id: {"kind": kind, "fingerprint": metadata_fingerprint(doc.metadata)} for kind, doc in batch
+        }
+        # 기록이 있어도 저장소에 없는 청크는 다시 추가합니다. (기록 없이 저장소에만 있는 청크는 메타데이터 갱신)
+        stored = await asyncio.to_thread(self._stored_ids, collection_name, list(current))
+        plan = BuildPlan(
+            source=total.source,
+            current=current,
+            total=len(docs),
+            added=[doc for doc in docs if doc.id not in stored],
+            updated=[
+                doc for doc in docs
+                if doc.id in stored and previous.get(doc.id, {}).get("fingerprint") != current[doc.id]["fingerprint"]
+            ],
+            deleted=[],
+        )
+        total.current.update(current)
+        total.total += plan.total
+        embedded_before = len(total.added)
+        total.added.extend(plan.added)
+        total.updated.extend(plan.updated)
+        progress(chunks_seen=total.total, chunks_to_embed=len(total.added), chunks_embedded=embedded_before)
+        if not plan.has_changes:
+            return False
+
+        with track_stage("build_db", "embed"):
+            embeddings = await self.embedding_pipeline.aembed(
+                [doc.page_content for doc in plan.added],
+                on_progress=lambda done, _: progress(chunks_embedded=embedded_before + done)
+            )
+        if pending is not None:
+            pending_plan, pending_embeddings = pending
+            pending_plan.added.extend(plan.added)
+            pending_plan.updated.extend(plan.updated)
+            pending_embeddings.extend(embeddings)
+            return False
+        with track_stage("build_db", "store"):
+            await asyncio.to_thread(self._write_changes, collection_name, plan, embeddings)
+        return True
+
+    @timed_stage("build_db")
+    async def abuild_from_stream(
+        self,
+        items: AsyncIterable[Tuple[str, Any]],
+        collection_name: str,
+        source: str,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, int]:
+        """
+        ("md", Markdown 텍스트 조각) / ("table", 표 행 딕셔너리) / ("txt", 이전 형식 RAG-TXT 한 줄) 스트림을 청크로 나누면서
+        INGESTION_STREAM_BATCH_SIZE개가 모일 때마다 바로 임베딩해 컬렉션에 증분 적재합니다.
+        - 파싱과 임베딩이 겹쳐 실행되고, 임베딩 벡터는 묶음 단위로만 메모리에 있습니다.
+          (mmap 컬렉션은 쓸 때마다 파일을 통째로 다시 쓰므로 변경분을 모아 스트림이 끝날 때 한 번만 씁니다)
+        - 청크 ID는 소스 이름 + 본문의 해시이므로 같은 소스를 다시 구축하면 새 청크만 임베딩해 추가하고,
+          메타데이터만 바뀐 청크는 메타데이터만 갱신하며, 스트림에 없던 청크는 마지막에 삭제합니다.
+        - Markdown 조각은 모두 표 행보다 먼저 와야 합니다. (파일에서 읽을 때와 같은 순서/ID)
+        - 스트림이 예외로 끝나면(파싱 실패 등) 이미 적재한 묶음은 남기지만 삭제 단계와 청크 기록 갱신은 건너뜁니다.
+        반환값: {"added", "updated", "unchanged", "deleted"} 청크 수
+        (progress: 진행 상황을 키워드 인자로 받는 콜백 — chunks_seen, chunks_embedded / chunks_to_embed, 청크 변경 내역)
+        """
+        progress = progress or (lambda **fields: None)
+        previous = await asyncio.to_thread(self.manifest.get, collection_name, source)
+        total = BuildPlan(source=source, current={}, total=0, added=[], updated=[], deleted=[])
+        splitter = MarkdownSectionSplitter()
+        seen: Dict[str, int] = {}
+        batch: List[Tuple[str, Document]] = []
+        pending = None
+        if self.get_backend(collection_name) == "mmap":
+            pending = (BuildPlan(source=source, current={}, total=0, added=[], updated=[], deleted=[]), [])
+        written = False
+        try:
+            with track_stage("build_db", "stream"):
+                async for kind, item in items:
+                    if kind == "md":
+                        batch.extend(("md", doc) for doc in splitter.feed(item))
+                    else:
+                        # Markdown이 끝났으므로 남은 구역을 먼저 청크로 만듭니다.
+                        batch.extend(("md", doc) for doc in splitter.close())
+                        doc = table_row_to_document(item) if kind == "table" else table_line_to_document(item)
+                        if doc is not None:
+                            batch.append(("table", doc))
+                    if len(batch) >= settings.INGESTION_STREAM_BATCH_SIZE:
+                        written |= await self._abuild_batch(
+                            collection_name, total, previous, seen, batch, progress, pending
+                        )
+                        batch = []
+                batch.extend(("md", doc) for doc in splitter.close())
+                if batch:
+                    written |= await self._abuild_batch(
+                        collection_name, total, previous, seen, batch, progress, pending
+                    )
+
+            # 스트림을 끝까지 받은 경우에만 여기 도달합니다. (중간에 끊긴 스트림으로 기존 청크를 지우지 않음)
+            total.deleted = [doc_id for doc_id in previous if doc_id not in total.current]
+            if pending is not None:
+                pending[0].deleted = total.deleted
+            elif total.deleted:
+                with track_stage("build_db", "store"):
+                    await asyncio.to_thread(
+                        self._write_changes, collection_name,
+                        BuildPlan(source=source, current={}, total=0, added=[], updated=[], deleted=total.deleted), []
+                    )
+                written = True
+        finally:
+            if pending is not None and pending[0].has_changes:
+                # 스트림이 끊겼으면 그때까지 모은 추가/갱신만 씁니다. (삭제는 끝까지 받은 경우에만)
+                with track_stage("build_db", "store"):
+                    await asyncio.to_thread(self._write_changes, collection_name, *pending)
+                written = True
+            if written:
+                # 일부만 쓰였더라도 이 컬렉션에 대해 캐시된 답변은 더 이상 유효하지 않습니다.
+                self._bump_collection_version(collection_name)
+                self.registry.refresh(collection_name)
+
+        print(f"📋 컬렉션 '{collection_name}' / 소스 '{source}': {total.counts}")
+        progress(**total.counts)
+        if not total.has_changes:
+            print("변경된 청크가 없습니다. (임베딩/저장 생략)")
+        else:
+            await asyncio.to_thread(self._update_auxiliary_indexes, collection_name, total)
+        await asyncio.to_thread(self.manifest.put, collection_name, source, total.current)
+
+        if total.has_changes:
+            print(f"\n🎉 컬렉션 '{collection_name}'의 벡터 DB 업데이트가 성공적으로 완료되었습니다!")
+        return total.counts
+
+    async def abuild_from_files(
+        self,
+        md_path: str,
+        table_path: str,
+        collection_name: str,
+        source: Optional[str] = None,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, int]:
+        """
+        이미 만들어진 MD / 표 행 파일로 컬렉션을 증분 적재합니다. (abuild_from_stream 참고)
+        표 행 파일은 열 기반 .arrow 파일이며, 이전에 만든 RAG-TXT(.txt) 파일도 읽을 수 있습니다.
+        source 기본값은 원본 PDF 파일 이름입니다.
+        """
+        source = source or Path(md_path).with_suffix(".pdf").name
+
+        def read_files():
+            with open(md_path, "r", encoding="utf-8") as f_md:
+                yield "md", f_md.read()
+            if Path(table_path).suffix == ".arrow":
+                for row in iter_table_artifact(table_path):
+                    yield "table", row
+                return
+            with open(table_path, "r", encoding="utf-8") as f_txt:
+                for line in f_txt:
+                    yield "txt", line
+
+        return await self.abuild_from_stream(
+            iterate_in_thread(read_files), collection_name, source, progress=progress
+        )
+
+    def count_documents(self, collection_name: str) -> int:
+        """컬렉션에 저장된 청크 수 (없는 컬렉션은 0)"""
+        if self.get_backend(collection_name) == "mmap" and self.mmap_index.has_index(collection_name):
+            return self.mmap_index.count(collection_name)
+        if collection_name not in self.registry.list_collection_names():
+            return 0
+        return self._load_db(collection_name)._collection.count()
+
+    def _clone_collection(self, source_collection: str, target_collection: str) -> int:
+        """
+        컬렉션의 청크(임베딩 포함), 보조 색인, 청크 기록을 새 이름으로 복사합니다. (재임베딩 없음)
+        반환값: 복사한 청크 수
+        """
+        if self.get_backend(source_collection) == "mmap" and self.mmap_index.has_index(source_collection):
+            self.mmap_index.copy(source_collection, target_collection)
+        elif source_collection in self.registry.list_collection_names():
+            source = self._load_db(source_collection)._collection
+            batch_size = min(settings.VECTOR_UPSERT_BATCH_SIZE, self.registry.client.get_max_batch_size())
+            to_mmap = self.get_backend(target_collection) == "mmap"
+            target = None if to_mmap else self._load_db(target_collection)._collection
+            documents, embeddings = [], []
+            for offset in range(0, source.count(), batch_size):
+                data = source.get(
+                    include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset
+                )
+                if to_mmap:
+                    documents.extend(
+                        Document(page_content=text, metadata=metadata or {}, id=doc_id)
+                        for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+                    )
+                    embeddings.extend(data["embeddings"])
+                elif data["ids"]:
+                    target.upsert(
+                        ids=data["ids"],
+                        embeddings=data["embeddings"],
+                        documents=data["documents"],
+                        metadatas=data["metadatas"]
+                    )
+            if documents:
+                # mmap 색인은 파일을 통째로 다시 쓰므로 한 번에 추가합니다.
+                self.mmap_index.add_documents(
+                    target_collection, documents, embeddings, ids=[doc.id for doc in documents], replace=True
+                )
+        else:
+            return 0
+        self.keyword_index.copy(source_collection, target_collection)
+        self.metadata_index.copy(source_collection, target_collection)
+        self.course_table.copy(source_collection, target_collection)
+        self.manifest.copy(source_collection, target_collection)
+        self.registry.refresh(target_collection)
+        return self.count_documents(target_collection)
+
+    def drop_collection(self, collection_name: str) -> None:
+        """컬렉션과 보조 색인, 청크 기록을 모두 삭제합니다."""
+        if collection_name in self.registry.list_collection_names():
+            self.registry.client.delete_collection(collection_name)
+        self.registry.refresh(collection_name)
+        self.mmap_index.drop(collection_name)
+        self.keyword_index.drop(collection_name)
+        self.metadata_index.drop(collection_name)
+        self.course_table.drop(collection_name)
+        self.manifest.drop(collection_name)
+        self._collection_versions.pop(collection_name, None)
+
+    async def _avalidate_generation(self, collection_name: str, expected: int, live_count: int) -> None:
+        """새 세대 컬렉션을 별칭 전환 전에 검증합니다. (실패하면 ValueError)"""
+        stored = await asyncio.to_thread(self.count_documents, collection_name)
+        if stored == 0 or stored != expected:
+            raise ValueError(f"'{collection_name}' 행 수 검증 실패: 저장 {stored}개, 예상 {expected}개")
+        if stored < live_count * settings.BLUE_GREEN_MIN_ROW_RATIO:
+            raise ValueError(
+                f"'{collection_name}' 행 수 검증 실패: 저장 {stored}개가 현재 세대 {live_count}개의 "
+                f"{settings.BLUE_GREEN_MIN_ROW_RATIO:.0%} 미만입니다."
+            )
+        for query in settings.BLUE_GREEN_VALIDATION_QUERIES:
+            if not await self.asearch(collection_name, query):
+                raise ValueError(f"'{collection_name}' 검증 질문 '{query}'의 검색 결과가 없습니다.")
+
+    async def abuild_and_publish(
+        self,
+        items: AsyncIterable[Tuple[str, Any]],
+        collection_name: str,
+        source: str,
+        progress: Optional[Callable[..., None]] = None,
+        blue_green: Optional[bool] = None
+    ) -> Dict[str, int]:
+        """
+        blue/green 방식으로 컬렉션을 구축합니다.
+        1. collection_name(별칭)이 가리키는 현재 세대를 새 세대 컬렉션으로 복사 (재임베딩 없음)
+        2. 새 세대에 abuild_from_stream으로 증분 적재 (검색 요청은 계속 현재 세대를 사용)
+        3. 행 수와 검증 질문 검색 결과를 확인한 뒤 별칭을 새 세대로 전환
+        4. 이전 세대는 바로 되돌릴 수 있도록 남기고, BLUE_GREEN_KEEP_GENERATIONS개보다 오래된 세대는 삭제
+        검증이나 구축에 실패하면 새 세대를 지우고 예외를 다시 던집니다. (현재 세대는 그대로)
+        blue_green=False(기본값 BLUE_GREEN_BUILDS)이면 현재 세대 컬렉션에 바로 적재합니다.
+        """
+        progress = progress or (lambda **fields: None)
+        if not (settings.BLUE_GREEN_BUILDS if blue_green is None else blue_green):
+            return await self.abuild_from_stream(
+                items, self.resolve_collection(collection_name), source, progress=progress
+            )
+
+        # 같은 별칭의 구축이 겹치면 한쪽 변경이 전환 때 사라지므로 차례로 실행합니다.
+        lock = self._publish_locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            live = self.resolve_collection(collection_name)
+            existing = await asyncio.to_thread(self.list_collections)
+            shadow = self.aliases.new_generation(collection_name, existing)
+            progress(generation=shadow)
+            try:
+                with track_stage("build_db", "clone"):
+                    live_count = await asyncio.to_thread(self._clone_collection, live, shadow)
+                print(f"🟦 컬렉션 '{live}' → 새 세대 '{shadow}' 복사 완료 ({live_count}개 청크)")
+                counts = await self.abuild_from_stream(items, shadow, source, progress=progress)
+                with track_stage("build_db", "validate"):
+                    await self._avalidate_generation(
+                        shadow, live_count + counts["added"] - counts["deleted"], live_count
+                    )
+            except BaseException:
+                record_event("collection_alias", "build_failed")
+                print(f"🗑️ 새 세대 '{shadow}' 구축/검증에 실패해 삭제합니다. (현재 세대 '{live}' 유지)")
+                await asyncio.to_thread(self.drop_collection, shadow)
+                raise
+
+            previous = self.aliases.switch(collection_name, shadow, keep_previous=live in existing)
+            record_event("collection_alias", "switched")
+            print(f"🟩 별칭 '{collection_name}': '{previous}' → '{shadow}' 전환 완료")
+
+            retired = self.aliases.retire(collection_name, settings.BLUE_GREEN_KEEP_GENERATIONS)
+            for name in retired:
+                await asyncio.to_thread(self.drop_collection, name)
+                print(f"🗑️ 오래된 세대 '{name}' 삭제")
+            if retired:
+                record_event("collection_alias", "retired", len(retired))
+        return counts
+
+    def rollback_collection(self, collection_name: str) -> str:
+        """별칭을 바로 이전 세대로 되돌립니다. (되돌린 세대 이름 반환)"""
+        target = self.aliases.rollback(collection_name)
+        record_event("collection_alias", "rollback")
+        print(f"⏪ 별칭 '{collection_name}'을 이전 세대 '{target}'로 되돌렸습니다.")
+        return target
+
     # DB에 저장된 모든 컬렉션 목록을 반환하는 메서드
     def list_collections(self) -> List[str]:
         """
         Chroma DB에 저장된 모든 컬렉션의 이름 목록을 반환합니다.
         """
-        # 특정 컬렉션 이름 없이 Chroma 클라이언트에 연결
-        client = Chroma(
-            persist_directory=self.db_path,
-            embedding_function=self.embedding_model
+        # 레지스트리가 보관 중인 클라이언트를 재사용 (요청마다 새 클라이언트를 만들지 않음)
+        names = self.registry.list_collection_names()
+        # mmap 백엔드로만 구축된 컬렉션도 포함
+        return list(dict.fromkeys(names + self.mmap_index.list_collections()))
+
+    def migrate_to_mmap(self, collection_name: str) -> int:
+        """
+        Chroma에 저장된 컬렉션(문서 + 메타데이터 + 임베딩)을 그대로 mmap 색인으로 옮깁니다. (재임베딩 없음)
+        VECTOR_BACKENDS로 mmap을 지정했지만 색인이 아직 없는 기존 컬렉션은 첫 검색 시 자동으로 옮겨집니다.
+        """
+        print(f"🔧 컬렉션 '{collection_name}'을 Chroma에서 mmap 벡터 색인으로 옮깁니다...")
+        data = self._load_db(collection_name).get(include=["documents", "metadatas", "embeddings"])
+        documents = [
+            Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+        if not documents:
+            return 0
+        return self.mmap_index.add_documents(
+            collection_name, documents, data["embeddings"], ids=data["ids"], replace=True
         )
-        
-        collections = client._client.list_collections()
-        
-        # 컬렉션 객체 리스트에서 이름만 추출하여 반환
-        return [col.name for col in collections] if collections else []
 
     # def get_retriever(self, collection_name: str):
     #     db = self._load_db(collection_name)
@@ -132,4 +654,236 @@ class VectorStoreService:
             search_type=search_type,
             search_kwargs=search_kwargs
         )
+
+    async def asearch(
+        self,
+        collection_name: str,
+        query: str,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        document_filter: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> List[Document]:
+        """
+        검색어로 문서를 한 번만 조회합니다. (요청 통계에 검색 1회로 기록)
+        query_embedding이 주어지면 검색어를 다시 임베딩하지 않고 해당 벡터로 검색합니다.
+        rerank="mmr"이면 후보(fetch_k)를 저장된 임베딩과 함께 가져와 MMR로 다양한 top-k만 반환합니다.
+        """
+        record_retrieval()
+        if self.get_backend(collection_name) == "mmap" and not self.mmap_index.has_index(collection_name):
+            await asyncio.to_thread(self.migrate_to_mmap, collection_name)
+
+        if metadata_filter:
+            k = settings.RERANK_TOP_K if rerank == "mmr" else 20
+            with track_stage("chat", "metadata_prefilter"):
+                candidates = await self._aprefilter(collection_name, metadata_filter)
+            if candidates is not None and len(candidates) <= k:
+                # 후보가 결과 수보다 적으면 유사도 순위와 상관없이 모두 반환되므로 벡터 검색을 건너뛰고 본문만 가져옵니다.
+                record_event("metadata_prefilter", "direct")
+                return await asyncio.to_thread(self._get_by_ids, collection_name, candidates, document_filter)
+            if (
+                candidates is not None
+                and len(candidates) <= settings.METADATA_PREFILTER_MAX_IDS
+                and self.get_backend(collection_name) == "chroma"
+            ):
+                # 후보 ID의 임베딩만 가져와 유사도를 계산합니다. (Chroma where 필터 평가 없음)
+                record_event("metadata_prefilter", "restricted")
+                if query_embedding is None:
+                    query_embedding = await self.embedding_model.aembed_query(query)
+                fetch_k = settings.RERANK_FETCH_K if rerank == "mmr" else k
+                docs, embeddings = await asyncio.to_thread(
+                    self._search_by_ids, collection_name, candidates, query_embedding, fetch_k, document_filter
+                )
+                if rerank != "mmr":
+                    return docs
+                order = mmr_rerank(query_embedding, embeddings, k=k, lambda_mult=settings.MMR_LAMBDA)
+                return [docs[i] for i in order]
+            record_event("metadata_prefilter", "fallback")
+
+        if rerank == "mmr":
+            if query_embedding is None:
+                query_embedding = await self.embedding_model.aembed_query(query)
+            docs, embeddings = await asyncio.to_thread(
+                self._query_with_embeddings,
+                collection_name,
+                query_embedding,
+                settings.RERANK_FETCH_K,
+                metadata_filter,
+                document_filter
+            )
+            order = mmr_rerank(query_embedding, embeddings, k=settings.RERANK_TOP_K, lambda_mult=settings.MMR_LAMBDA)
+            return [docs[i] for i in order]
+
+        if self.get_backend(collection_name) == "mmap":
+            if query_embedding is None:
+                query_embedding = await self.embedding_model.aembed_query(query)
+            docs, _ = await asyncio.to_thread(
+                self.mmap_index.search, collection_name, query_embedding, 20, metadata_filter, document_filter
+            )
+            return docs
+
+        if query_embedding is not None:
+            db = self._load_db(collection_name)
+            return await db.asimilarity_search_by_vector(
+                query_embedding,
+                k=20,
+                filter=metadata_filter,
+                where_document=document_filter
+            )
+
+        with track_stage("chat", "retriever_create"):
+            retriever = self.get_retriever(
+                collection_name,
+                metadata_filter=metadata_filter,
+                document_filter=document_filter
+            )
+        return await retriever.ainvoke(query)
+
+    def _query_with_embeddings(
+        self,
+        collection_name: str,
+        query_embedding: List[float],
+        fetch_k: int,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        document_filter: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Document], List[List[float]]]:
+        """유사도 상위 fetch_k개 후보 문서와 저장된 임베딩을 한 번의 쿼리로 가져옵니다."""
+        if self.get_backend(collection_name) == "mmap":
+            return self.mmap_index.search(
+                collection_name, query_embedding, fetch_k, metadata_filter, document_filter, include_embeddings=True
+            )
+        collection = self._load_db(collection_name)._collection
+        result = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=fetch_k,
+            where=metadata_filter,
+            where_document=document_filter,
+            include=["documents", "metadatas", "embeddings"]
+        )
+        documents = [
+            Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(result["ids"][0], result["documents"][0], result["metadatas"][0])
+        ]
+        return documents, result["embeddings"][0]
+
+    async def _aprefilter(self, collection_name: str, metadata_filter: Dict[str, Any]) -> Optional[List[str]]:
+        """메타데이터 역색인으로 필터를 만족하는 후보 문서 ID를 계산합니다. (판단할 수 없으면 None)"""
+        if not self.metadata_index.has_index(collection_name):
+            await asyncio.to_thread(self._build_metadata_index_from_collection, collection_name)
+        return await asyncio.to_thread(self.metadata_index.candidates, collection_name, metadata_filter)
+
+    def _get_by_ids(
+        self,
+        collection_name: str,
+        ids: List[str],
+        document_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """후보 문서의 본문과 메타데이터를 ID로 가져옵니다. (후보 순서, 지워졌거나 본문 필터에 맞지 않는 문서는 제외)"""
+        if not ids:
+            return []
+        if self.get_backend(collection_name) == "mmap":
+            return self.mmap_index.get(collection_name, ids, document_filter)
+        result = self._load_db(collection_name)._collection.get(
+            ids=ids, where_document=document_filter, include=["documents", "metadatas"]
+        )
+        by_id = {
+            doc_id: Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def stored_embeddings(self, collection_name: str, ids: List[str]) -> Dict[str, np.ndarray]:
+        """청크 ID로 저장된 임베딩을 가져옵니다. (없는 ID는 제외)"""
+        if not ids:
+            return {}
+        if self.get_backend(collection_name) == "mmap":
+            return self.mmap_index.embeddings(collection_name, ids)
+        result = self._load_db(collection_name)._collection.get(ids=ids, include=["embeddings"])
+        return {
+            doc_id: np.asarray(embedding, dtype=np.float32)
+            for doc_id, embedding in zip(result["ids"], result["embeddings"])
+        }
+
+    def _search_by_ids(
+        self,
+        collection_name: str,
+        ids: List[str],
+        query_embedding: List[float],
+        k: int,
+        document_filter: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Document], np.ndarray]:
+        """후보 문서들의 저장된 임베딩만 ID로 가져와 코사인 유사도 상위 k개를 반환합니다."""
+        result = self._load_db(collection_name)._collection.get(
+            ids=ids, where_document=document_filter, include=["embeddings", "documents", "metadatas"]
+        )
+        # 역색인 이후 Chroma에서 지워졌거나 본문 필터에 맞지 않는 문서는 결과에 없습니다.
+        found = [
+            (Document(page_content=text, metadata=metadata or {}, id=doc_id), embedding)
+            for doc_id, text, metadata, embedding in zip(
+                result["ids"], result["documents"], result["metadatas"], result["embeddings"]
+            )
+        ]
+        if not found:
+            return [], np.empty((0, 0), dtype=np.float32)
+        embeddings = np.asarray([embedding for _, embedding in found], dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1)
+        norms[norms == 0] = 1.0
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = (embeddings @ query) / norms
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [found[i][0] for i in top], embeddings[top]
+
+    def _build_metadata_index_from_collection(self, collection_name: str) -> None:
+        """메타데이터 역색인이 없는(이전에 구축된) 컬렉션은 저장된 문서와 ID로 역색인을 만듭니다."""
+        print(f"🔧 컬렉션 '{collection_name}'의 메타데이터 역색인이 없어 저장된 문서로부터 생성합니다...")
+        if self.get_backend(collection_name) == "mmap" and self.mmap_index.has_index(collection_name):
+            documents = self.mmap_index.documents(collection_name)
+            # ID 없이 구축된 이전 mmap 색인은 행 위치를 ID로 사용합니다.
+            ids = [doc.id or str(i) for i, doc in enumerate(documents)]
+        else:
+            data = self._load_db(collection_name).get(include=["documents", "metadatas"])
+            ids = data["ids"]
+            documents = [
+                Document(page_content=text, metadata=metadata or {}, id=doc_id)
+                for doc_id, text, metadata in zip(ids, data["documents"], data["metadatas"])
+            ]
+        self.metadata_index.add_documents(collection_name, ids, documents, replace=True)
+
+    def _build_keyword_index_from_collection(self, collection_name: str) -> None:
+        """BM25 색인이 없는(이전에 구축된) 컬렉션은 Chroma에 저장된 문서로 색인을 만듭니다."""
+        print(f"🔧 컬렉션 '{collection_name}'의 BM25 색인이 없어 저장된 문서로부터 생성합니다...")
+        if self.get_backend(collection_name) == "mmap" and self.mmap_index.has_index(collection_name):
+            documents = self.mmap_index.documents(collection_name)
+        else:
+            data = self._load_db(collection_name).get(include=["documents", "metadatas"])
+            documents = [
+                Document(page_content=text, metadata=metadata or {}, id=doc_id)
+                for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+            ]
+        self.keyword_index.add_documents(collection_name, documents, replace=True)
+
+    async def ahybrid_search(
+        self,
+        collection_name: str,
+        query: str,
+        k: int = 20,
+        query_embedding: Optional[List[float]] = None,
+        rerank: str = "none"
+    ) -> List[Document]:
+        """
+        필터가 없는 일반 질문용 하이브리드 검색입니다.
+        벡터 검색과 BM25 키워드 검색을 동시에 실행하고 RRF로 순위를 합칩니다.
+        (rerank="mmr"이면 벡터 검색 쪽 결과가 MMR로 다양화된 뒤 합쳐집니다)
+        """
+        if not self.keyword_index.has_index(collection_name):
+            await asyncio.to_thread(self._build_keyword_index_from_collection, collection_name)
+
+        vector_docs, keyword_docs = await asyncio.gather(
+            self.asearch(collection_name, query, query_embedding=query_embedding, rerank=rerank),
+            asyncio.to_thread(self.keyword_index.search, collection_name, query, k)
+        )
+        return reciprocal_rank_fusion([vector_docs, keyword_docs], top_n=k)
+
 vector_store_service = VectorStoreService()
\ No newline at end of file